@@ -4,9 +4,22 @@ Practice Player - Reproductor para estudiar solos con loop A-B y control de temp
 Módulos:
 - file_browser: Navegador de archivos WAV
 - audio_player: Engine de reproducción con loop A-B
+- audio_engine: Ring buffer SPSC y productor de bloques para el callback de audio
+- audio_output: Salidas de audio (tarjeta, nula, a fichero)
+- playback_stats: Telemetría de reproducción (xruns, callbacks, time-to-first-audio)
+- waveform_peaks: Índice multi-resolución de picos para la vista de onda
+- onset_index: Detección de transitorios (spectral flux) para pegar A/B
+- beat_grid: Estimación de BPM y rejilla de pulsos
+- zero_crossings: Índice de cruces por cero para bordes de loop sin click
+- analysis_cache: Cache en disco de análisis por archivo
+- time_map: Mapa de anclas entre tiempo original y renders de tempo
 - tempo_controller: Time-stretching con pyrubberband
 - buttons_manager: Gestión de GPIO con tap/hold
+- input_dispatcher: Cola central de eventos de botones (tap/hold/repeat)
+- gpio_input: Backends de entrada (eventos de kernel con gpiod, gpiozero, guion)
 - oled_display: Display OLED con layouts específicos
+- coalescer: Agrupa deltas repetidos durante un hold
+- stall_watchdog: Watchdog de threads colgados y profiler de muestreo
 - main: State machine principal
 """
 
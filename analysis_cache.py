@@ -0,0 +1,76 @@
+"""
+Analysis Cache - Resultados de análisis por archivo guardados en disco
+
+Cada análisis (onsets, beats...) se guarda como .npz identificado por la
+ruta, tamaño y mtime del archivo de audio, el tipo de análisis y su versión.
+Si el archivo cambia o el algoritmo sube de versión, la entrada deja de
+coincidir y se recalcula; reabrir un archivo ya analizado no cuesta nada.
+
+Los arrays grandes (PCM decodificado) van como un .npy suelto para poder
+mapearlos en memoria en vez de leerlos.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+CACHE_DIR = "cache/analysis"
+
+
+def _entry_path(filepath, kind, version, cache_dir, ext="npz"):
+    st = os.stat(filepath)
+    ident = f"{os.path.abspath(filepath)}|{st.st_size}|{st.st_mtime_ns}"
+    digest = hashlib.sha1(ident.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{digest}_{kind}_v{version}.{ext}")
+
+
+def load(filepath, kind, version, cache_dir=CACHE_DIR):
+    """Retorna dict de arrays o None si no hay entrada válida"""
+    try:
+        path = _entry_path(filepath, kind, version, cache_dir)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    except (OSError, ValueError) as e:
+        print(f"⚠ Cache de análisis ilegible ({kind}): {e}")
+        return None
+
+
+def save(filepath, kind, version, cache_dir=CACHE_DIR, **arrays):
+    """Guarda los arrays de forma atómica (un corte de luz no deja basura)"""
+    try:
+        path = _entry_path(filepath, kind, version, cache_dir)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠ No se pudo guardar el análisis ({kind}): {e}")
+
+
+def load_array(filepath, kind, version, cache_dir=CACHE_DIR):
+    """Array mapeado en memoria (solo lectura) o None si no hay entrada válida"""
+    try:
+        path = _entry_path(filepath, kind, version, cache_dir, ext="npy")
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode='r')
+    except (OSError, ValueError) as e:
+        print(f"⚠ Cache ilegible ({kind}): {e}")
+        return None
+
+
+def save_array(filepath, kind, version, array, cache_dir=CACHE_DIR):
+    """Guarda un array como .npy de forma atómica"""
+    try:
+        path = _entry_path(filepath, kind, version, cache_dir, ext="npy")
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠ No se pudo guardar en cache ({kind}): {e}")
@@ -0,0 +1,775 @@
+"""
+Audio Engine - Reproducción por streaming entre el control y el callback de audio
+
+- FrameRing: ring buffer SPSC de bloques preasignados (un bloque por slot)
+- PlaybackEngine: thread productor que llena el ring desde el audio fuente
+  (loop A-B incluido) y render() que lo consume desde el callback de la salida
+
+El control (botones, UI) nunca toca el ring: manda comandos (seek, loop,
+source, play, pause, stop) por una cola que solo lee el productor. El
+callback no toma locks ni crea arrays: copia slots a outdata, avanza el
+índice de lectura y publica la posición del último frame entregado.
+
+Cada slot lleva la posición (segundos del archivo original) de su primer
+frame y una generación: un seek incrementa la generación y el callback
+descarta los slots viejos sin que el productor toque el índice de lectura.
+
+Un cambio de tempo en marcha (swap_source) no vacía el ring: el productor
+sigue en el mismo punto musical del render nuevo (vía su TimeMap) y mezcla
+ambos con un crossfade corto.
+
+La pausa no para el stream ni vacía el ring: el callback deja de leer tras
+un fade-out corto y al reanudar sigue en el mismo frame con un fade-in, así
+que pausa/resume tardan un bloque. En un seek con audio sonando el callback
+funde a silencio lo que venía y entra con fade-in en la posición nueva.
+
+Una fuente que aún se está decodificando (streaming_decoder) llega con
+`available`: el productor no pasa de los frames ya decodificados y espera
+a que haya más en vez de marcar el final.
+
+Una fuente en cola (queue_source) entra exactamente en la costura del loop,
+tras un número dado de vueltas: el bloque en curso termina en el final del
+loop y el siguiente ya empieza en el inicio del loop de la fuente nueva, sin
+crossfade ni hueco (la rampa de tempo del player cambia así de escalón).
+
+Metrónomo: clicks sobre la música en los pulsos del original (llevados a
+frames de la fuente con su TimeMap, así que siguen al tempo) y, opcional,
+un compás de cuenta en silencio antes de cada vuelta del loop. Los clicks
+son buffers preasignados que el productor suma en el frame exacto de cada
+bloque: nada que asignar ni despertar por pulso, y el callback no cambia.
+
+Varispeed: con rate != 1 el productor lee la fuente en posiciones
+fraccionarias (pos + k * rate, interpolación lineal). La velocidad cambia
+sin render previo y el pitch la sigue, como en una cinta.
+"""
+
+import collections
+import math
+import threading
+
+import numpy as np
+
+import stall_watchdog
+
+# Flags por slot
+END = 2  # Último bloque del archivo (sin loop)
+
+# Fades de pausa/seek (~6ms a 44.1kHz): RAMP[g] es la ganancia en el paso g
+FADE_FRAMES = 256
+RAMP = (np.arange(FADE_FRAMES, dtype=np.float32) / FADE_FRAMES)[:, None]
+FADE_OUT = RAMP[::-1].copy()
+
+# Crossfade entre renders de tempo (~46ms, potencia constante)
+XFADE_FRAMES = 2048
+_xfade_angle = (np.arange(XFADE_FRAMES, dtype=np.float32) + 0.5) / XFADE_FRAMES * (np.pi / 2)
+XFADE_IN = np.sin(_xfade_angle)[:, None]
+XFADE_OUT = np.cos(_xfade_angle)[:, None]
+
+# Click del metrónomo: seno corto con caída exponencial (el acento, más agudo)
+CLICK_SECONDS = 0.02
+CLICK_HZ = 1000.0
+ACCENT_HZ = 1600.0
+MAX_CLICKS_PER_BLOCK = 16
+
+
+def make_click(samplerate, freq, channels, volume):
+    """Buffer (frames, canales) de un click"""
+    t = np.arange(int(samplerate * CLICK_SECONDS)) / samplerate
+    wave = np.sin(2 * np.pi * freq * t) * np.exp(-t / (CLICK_SECONDS / 5)) * volume
+    return np.repeat(wave.astype(np.float32)[:, None], channels, axis=1)
+
+
+class FrameRing:
+    """
+    Ring buffer single-producer/single-consumer de bloques de frames
+
+    write_idx solo lo incrementa el productor y read_idx solo el consumidor
+    (contadores que no dan la vuelta: la asignación de un int es atómica)
+    """
+
+    def __init__(self, num_slots=8, blocksize=512, channels=2):
+        self.num_slots = num_slots
+        self.blocksize = blocksize
+        self.channels = channels
+
+        self.frames = np.zeros((num_slots, blocksize, channels), dtype=np.float32)
+        self.lengths = [0] * num_slots     # Frames válidos en el slot
+        self.positions = [0.0] * num_slots  # Posición del primer frame (s)
+        self.steps = [0.0] * num_slots      # Segundos por frame
+        self.gens = [0] * num_slots
+        self.flags = [0] * num_slots
+
+        self.write_idx = 0
+        self.read_idx = 0
+        self.generation = 0  # Solo la cambia el productor
+
+    def free(self):
+        return self.num_slots - (self.write_idx - self.read_idx)
+
+    def available(self):
+        return self.write_idx - self.read_idx
+
+
+class PlaybackEngine:
+    """
+    Motor de reproducción por bloques sobre una salida de audio_output
+    """
+
+    def __init__(self, output, stats=None, on_end=None, num_slots=8, on_seam=None):
+        """
+        output: salida con set_source() (ver audio_output)
+        stats: PlaybackStats para time-to-first-audio
+        on_end: callback() cuando termina el archivo sin loop (thread productor)
+        on_seam: callback(tag) al entrar una fuente en cola (thread productor)
+        """
+        self.output = output
+        self.stats = stats
+        self.on_end = on_end
+        self.on_seam = on_seam
+        self.ring = FrameRing(num_slots, output.blocksize, output.channels)
+        self._xfade_buf = np.zeros((output.blocksize, output.channels), dtype=np.float32)
+
+        self._commands = collections.deque()  # append/popleft atómicos
+        self._wake = threading.Event()
+        self._closed = False
+
+        # Estado del productor
+        self._source = None
+        self._samplerate = 44100
+        self._map = None  # TimeMap original <-> fuente (None = misma escala)
+        self._available = None  # callable() -> frames válidos (None = todos)
+        self._xfade = None  # (fuente anterior, su posición, frames ya mezclados, su rate)
+        self._pos = 0  # Frame de la fuente a escribir a continuación (float en varispeed)
+        self._rate = 1.0  # Frames de la fuente por frame de salida (varispeed)
+        self._loop = (None, None)  # Segundos del original
+        self._loop_frames = None  # (inicio, fin) en frames de la fuente
+        self._crossings = None  # ZeroCrossingIndex de la fuente (bordes sin click)
+        self._queued = None  # Fuente que entra en la costura del loop (ver queue_source)
+
+        # Metrónomo (ver set_metronome)
+        self._beats = None  # Pulsos en segundos del original (None = apagado)
+        self._click_on = False
+        self._count_in_beats = 0
+        self._beats_per_bar = 4
+        self._click_volume = 0.5
+        self._clicks = None  # (samplerate, click, acento) preasignados
+        self._click_frames = None  # Pulsos en frames de la fuente actual
+        self._click_accents = None
+        self._click_tail = None  # (buffer, frames ya sonados) del click que sigue
+        self._block_clicks = np.zeros(MAX_CLICKS_PER_BLOCK, dtype=np.int64)
+        self._block_accents = np.zeros(MAX_CLICKS_PER_BLOCK, dtype=bool)
+        self._num_clicks = 0
+        self._count_in_left = 0  # Frames de cuenta que faltan antes de la vuelta
+        self._count_in_next = 0.0  # Frames hasta el siguiente click de la cuenta
+        self._count_in_ticks = 0
+        self._count_in_period = 0.0
+        self._playing = False
+        self._at_end = False
+
+        # Estado del consumidor (callback)
+        self._offset = 0  # Frames ya leídos del slot actual
+        self._gain = 0  # Paso del fade (0 = silencio, FADE_FRAMES = ganancia 1)
+        self._ended = False
+
+        # Lo escribe el control y lo lee el callback
+        self.paused = False
+
+        # Publicado para el control/UI
+        self.position = 0.0  # Segundos del original del último frame entregado
+        self.starved_blocks = 0  # Callbacks sin datos estando en play
+        self.loop_wraps = 0
+
+        self._thread = threading.Thread(target=self._run, name='playback', daemon=True)
+        self._thread.start()
+        output.set_source(self)
+
+    # ========== CONTROL (cualquier thread) ==========
+
+    def send(self, command, *args):
+        self._commands.append((command, args))
+        self._wake.set()
+
+    def set_source(self, audio, samplerate, time_map=None, available=None, rate=1.0):
+        """
+        Nueva fuente; la reproducción sigue desde la posición publicada
+        available: callable() con los frames ya decodificados (fuente parcial)
+        rate: velocidad varispeed (1.0 = normal)
+        """
+        self.send('source', audio, samplerate, time_map, available, rate)
+
+    def swap_source(self, audio, samplerate, time_map=None, rate=1.0):
+        """Cambia de render sin cortar: mismo punto musical y crossfade"""
+        self.send('swap', audio, samplerate, time_map, rate)
+
+    def queue_source(self, audio, time_map=None, rate=1.0, crossings=None, at_wrap=0, tag=None):
+        """
+        Fuente (mismo sample rate) que entra en la costura del loop cuando loop_wraps llegue a
+        at_wrap (o en la siguiente, si ya pasó). audio=None cancela la cola.
+        crossings: su ZeroCrossingIndex (para que los bordes ya entren alineados)
+        tag: se pasa a on_seam al entrar
+        """
+        if audio is None:
+            self.send('queue', None)
+        else:
+            self.send('queue', (audio, time_map, rate, crossings, at_wrap, tag))
+
+    def set_metronome(self, beats=None, click=True, count_in_beats=0, beats_per_bar=4,
+                      volume=0.5):
+        """
+        beats: array de pulsos en segundos del original (None = apagado)
+        click: clicks sobre la música
+        count_in_beats: pulsos de cuenta antes de cada vuelta del loop (0 = sin cuenta)
+        beats_per_bar: el acento cae en el primer pulso del loop y cada compás
+        """
+        self.send('metronome', beats, click, count_in_beats, beats_per_bar, volume)
+
+    def set_rate(self, rate):
+        """Varispeed sobre la fuente actual, sin cortar (el pitch sigue a la velocidad)"""
+        self.send('rate', rate)
+
+    def set_crossings(self, audio, index):
+        """Índice de cruces por cero de `audio` (se ignora si ya no es la fuente)"""
+        self.send('crossings', audio, index)
+
+    def set_time_map(self, audio, time_map):
+        """TimeMap definitivo de `audio` (se ignora si ya no es la fuente ni la cola)"""
+        self.send('time_map', audio, time_map)
+
+    def seek(self, seconds):
+        self.position = seconds
+        self.send('seek', seconds)
+
+    def set_loop(self, start, end):
+        self.send('loop', start, end)
+
+    def play(self):
+        self.paused = False
+        self.send('play')
+
+    def pause(self):
+        """Efectivo en el siguiente callback (fade-out y silencio)"""
+        self.paused = True
+
+    def resume(self):
+        """Sigue desde el frame exacto donde se pausó (fade-in)"""
+        self.paused = False
+        self._wake.set()
+
+    def stop(self):
+        self.position = 0.0
+        self.send('stop')
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=1.0)
+
+    # ========== PRODUCTOR ==========
+
+    def _run(self):
+        while not self._closed:
+            while self._commands:
+                command, args = self._commands.popleft()
+                getattr(self, '_cmd_' + command)(*args)
+            block_time = self.ring.blocksize / self._samplerate
+
+            if self._playing and self._ended:
+                self._playing = False
+                stall_watchdog.idle('playback')
+                if self.on_end:
+                    try:
+                        self.on_end()
+                    except Exception as e:
+                        print(f"Error en fin de reproducción: {e}")
+                continue
+
+            if not self._playing:
+                stall_watchdog.idle('playback')
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            stall_watchdog.beat('playback')
+            if self._at_end or not self._fill():
+                if self.paused:
+                    # Ring lleno y en pausa: esperar a resume/seek
+                    stall_watchdog.idle('playback')
+                    self._wake.wait()
+                else:
+                    # Ring lleno (o esperando a que se consuma el final)
+                    self._wake.wait(block_time / 2)
+                self._wake.clear()
+
+    def _fill(self):
+        """Escribe bloques en los slots libres; retorna True si escribió alguno"""
+        ring = self.ring
+        src = self._source
+        if src is None:
+            return False
+
+        limit = len(src) if self._available is None else min(len(src), self._available())
+        if self._rate != 1.0 and limit < len(src):
+            limit -= 1  # La interpolación lee también el frame siguiente
+        rate = self._rate
+        wrote = False
+        while ring.free() > 0 and not self._at_end and not self._commands:
+            slot = ring.write_idx % ring.num_slots
+            buf = ring.frames[slot]
+            if self._count_in_left:
+                self._write_count_in(slot)
+                wrote = True
+                continue
+            start_pos = self._pos
+            pos = start_pos
+            filled = 0
+            flags = 0
+
+            while filled < ring.blocksize:
+                if self._loop_frames:
+                    loop_start, end = self._loop_frames
+                    if pos >= end and self._seam_due():
+                        if filled:
+                            break  # El bloque termina en la costura
+                        self.loop_wraps += 1
+                        self._apply_queued()
+                        src, rate = self._source, self._rate
+                        limit = len(src)
+                        pos = self._loop_frames[0] if self._loop_frames else 0
+                        if self._start_count_in(pos):
+                            break
+                        continue
+                    if not loop_start <= pos < end:
+                        if pos >= end:
+                            self.loop_wraps += 1
+                            # En varispeed se conserva la fracción que se pasó del final
+                            over = pos - end
+                            pos = loop_start + over if over < rate else loop_start
+                        else:
+                            pos = loop_start
+                        if self._start_count_in(pos):
+                            break  # La vuelta empieza tras un compás de cuenta
+                else:
+                    end = len(src)
+
+                n = self._frames_until(min(end, limit) - pos, ring.blocksize - filled)
+                if n <= 0:
+                    if pos < end:
+                        break  # Aún sin decodificar: esperar al decoder
+                    self._at_end = True
+                    flags |= END
+                    break
+                if filled == 0:
+                    start_pos = pos
+                self._read(src, pos, n, rate, buf[filled:filled + n])
+                if self._click_on:
+                    self._collect_clicks(pos, n, rate, filled)
+                filled += n
+                pos += n if rate == 1.0 else n * rate
+
+            if not filled and not flags:
+                if self._count_in_left:
+                    self._pos = pos
+                    continue
+                break
+            if self._xfade is not None and filled:
+                self._mix_crossfade(buf, filled)
+            if self._num_clicks or self._click_tail is not None:
+                self._mix_clicks(buf, filled)
+
+            self._pos = pos
+            ring.lengths[slot] = filled
+            first = self._to_original(start_pos)
+            ring.positions[slot] = first / self._samplerate
+            ring.steps[slot] = (self._to_original(start_pos + ring.blocksize * rate) - first) / (
+                ring.blocksize * self._samplerate)
+            ring.gens[slot] = ring.generation
+            ring.flags[slot] = flags
+            ring.write_idx += 1  # Publicar el slot al final
+            wrote = True
+        return wrote
+
+    # ========== METRÓNOMO (productor) ==========
+
+    def _collect_clicks(self, pos, n, rate, offset):
+        """Anota los pulsos que caen en los n frames leídos desde pos"""
+        frames = self._click_frames
+        if frames is None:
+            return
+        i = int(np.searchsorted(frames, pos))
+        j = int(np.searchsorted(frames, pos + n * rate))
+        for k in range(i, j):
+            at = math.ceil((frames[k] - pos) / rate)
+            if at < n:
+                self._add_click(offset + at, self._click_accents[k])
+
+    def _add_click(self, at, accent):
+        if self._num_clicks < MAX_CLICKS_PER_BLOCK:
+            self._block_clicks[self._num_clicks] = at
+            self._block_accents[self._num_clicks] = accent
+            self._num_clicks += 1
+
+    def _mix_clicks(self, buf, filled):
+        """Suma al bloque la cola del click anterior y los clicks anotados"""
+        tail, self._click_tail = self._click_tail, None
+        if tail is not None:
+            sound, done = tail
+            k = min(filled, len(sound) - done)
+            buf[:k] += sound[done:done + k]
+            if done + k < len(sound):
+                self._click_tail = (sound, done + k)
+        if self._clicks is None:
+            self._num_clicks = 0
+            return
+        _, click, accent = self._clicks
+        for c in range(self._num_clicks):
+            at = self._block_clicks[c]
+            sound = accent if self._block_accents[c] else click
+            k = min(filled - at, len(sound))
+            buf[at:at + k] += sound[:k]
+            if k < len(sound):
+                self._click_tail = (sound, k)
+        self._num_clicks = 0
+
+    def _start_count_in(self, loop_start, delay=0):
+        """
+        Programa la cuenta antes de la vuelta que empieza en loop_start; True si
+        hay cuenta. Dura lo justo para que el pulso siguiente a la cuenta sea
+        el primer pulso del loop (aunque A no caiga en un pulso)
+        """
+        frames = self._click_frames
+        if not self._count_in_beats or frames is None:
+            return False
+        i = int(np.searchsorted(frames, loop_start))
+        if i + 1 >= len(frames):
+            return False
+        period = (frames[i + 1] - frames[i]) / self._rate
+        lead = min((frames[i] - loop_start) / self._rate, period)
+        self._count_in_left = max(1, int(round(self._count_in_beats * period - lead))) + delay
+        self._count_in_next = float(delay)
+        self._count_in_ticks = self._count_in_beats
+        self._count_in_period = period
+        self._xfade = None
+        return True
+
+    def _write_count_in(self, slot):
+        """Un bloque de cuenta: silencio con clicks, en la posición del inicio del loop"""
+        ring = self.ring
+        buf = ring.frames[slot]
+        n = min(self._count_in_left, ring.blocksize)
+        buf[:n] = 0
+        while self._count_in_ticks and self._count_in_next < n:
+            first = self._count_in_ticks == self._count_in_beats
+            self._add_click(int(self._count_in_next), first)
+            self._count_in_next += self._count_in_period
+            self._count_in_ticks -= 1
+        self._count_in_next -= n
+        self._count_in_left -= n
+        self._mix_clicks(buf, n)
+
+        ring.lengths[slot] = n
+        ring.positions[slot] = self._to_original(self._pos) / self._samplerate
+        ring.steps[slot] = 0.0
+        ring.gens[slot] = ring.generation
+        ring.flags[slot] = 0
+        ring.write_idx += 1
+
+    def _update_click_frames(self):
+        """Pulsos en frames de la fuente actual y sus acentos (al cambiar fuente o loop)"""
+        if self._beats is None or self._source is None:
+            self._click_frames = self._click_accents = None
+            return
+        frames = self._beats * self._samplerate
+        index = np.arange(len(frames))
+        if self._map is not None:
+            # Un render de una región solo tiene los pulsos de esa región
+            keep = (frames >= self._map.original[0]) & (frames <= self._map.original[-1])
+            index = index[keep]
+            frames = np.interp(frames[keep], self._map.original, self._map.stretched)
+        phase = 0
+        if self._loop_frames and len(frames):
+            phase = index[min(int(np.searchsorted(frames, self._loop_frames[0])), len(index) - 1)]
+        self._click_frames = frames
+        self._click_accents = (index - phase) % self._beats_per_bar == 0
+        if self._clicks is None or self._clicks[0] != self._samplerate:
+            channels = self.ring.channels
+            self._clicks = (self._samplerate,
+                            make_click(self._samplerate, CLICK_HZ, channels, self._click_volume),
+                            make_click(self._samplerate, ACCENT_HZ, channels, self._click_volume))
+
+    # ========== COLA DE FUENTES ==========
+
+    def _seam_due(self):
+        """True si la fuente en cola entra en esta vuelta del loop"""
+        return self._queued is not None and self.loop_wraps + 1 >= self._queued[4]
+
+    def _apply_queued(self):
+        """Pasa a la fuente en cola (en la costura, al inicio de un bloque)"""
+        audio, time_map, rate, crossings, _, tag = self._queued
+        self._queued = None
+        self._source = audio
+        self._map = time_map
+        self._rate = rate
+        self._available = None
+        self._xfade = None
+        self._crossings = crossings
+        self._update_loop_frames()
+        if self.on_seam:
+            try:
+                self.on_seam(tag)
+            except Exception as e:
+                print(f"Error en cambio de fuente en la costura: {e}")
+
+    def _frames_until(self, remaining, space):
+        """Frames de salida (<= space) antes de recorrer `remaining` frames de la fuente"""
+        if self._rate == 1.0:
+            return int(min(space, remaining))
+        return int(min(space, np.ceil(remaining / self._rate)))
+
+    def _read(self, src, pos, n, rate, out):
+        """Copia n frames de src desde pos a out (interpolando si rate != 1)"""
+        if rate == 1.0:
+            chunk = src[pos:pos + n]
+        else:
+            idx = pos + np.arange(n) * rate
+            i = idx.astype(np.int64)
+            frac = (idx - i).astype(np.float32)
+            a = src[i]
+            b = src[np.minimum(i + 1, len(src) - 1)]
+            if a.ndim > 1:
+                frac = frac[:, None]
+            chunk = a + (b - a) * frac
+        if chunk.ndim == 1:
+            out[:len(chunk)] = chunk[:, None]
+        else:
+            out[:len(chunk)] = chunk[:, :self.ring.channels]
+        return len(chunk)
+
+    def _mix_crossfade(self, buf, filled):
+        """Mezcla el render anterior (que sale) con el nuevo (que entra)"""
+        old, old_pos, done, old_rate = self._xfade
+        k = min(filled, XFADE_FRAMES - done)
+        buf[:k] *= XFADE_IN[done:done + k]
+        m = min(k, self._frames_until_old(old, old_pos, old_rate))
+        if m > 0:
+            fade_buf = self._xfade_buf[:m]
+            self._read(old, old_pos, m, old_rate, fade_buf)
+            buf[:m] += fade_buf * XFADE_OUT[done:done + m]
+        done += k
+        old_pos += k if old_rate == 1.0 else k * old_rate
+        self._xfade = None if done >= XFADE_FRAMES else (old, old_pos, done, old_rate)
+
+    def _frames_until_old(self, old, old_pos, old_rate):
+        remaining = len(old) - old_pos
+        if old_rate == 1.0:
+            return int(remaining)
+        return int(np.ceil(remaining / old_rate))
+
+    def _to_original(self, frame):
+        return frame if self._map is None else self._map.to_original(frame)
+
+    def _flush(self, seconds):
+        """Descarta lo pendiente en el ring y sigue desde `seconds`"""
+        self.ring.generation += 1
+        self._xfade = None
+        self._click_tail = None
+        self._count_in_left = 0
+        self._pos = self._frames(seconds)
+        self.position = seconds
+        self._at_end = False
+        self._ended = False
+
+    def _frames(self, seconds):
+        """Segundos del original -> frame de la fuente actual"""
+        frame = seconds * self._samplerate
+        if self._map is not None:
+            frame = self._map.to_stretched(frame)
+        return max(0, int(round(frame)))
+
+    def _update_loop_frames(self):
+        start, end = self._loop
+        if start is None or end is None or self._source is None:
+            self._loop_frames = None
+            self._update_click_frames()
+            return
+        loop_start = self._frames(start)
+        loop_end = min(self._frames(end), len(self._source))
+        if self._crossings is not None:
+            loop_start = self._crossings.snap(loop_start)
+            loop_end = self._crossings.snap(loop_end)
+        self._loop_frames = (loop_start, loop_end) if loop_end > loop_start else None
+        self._update_click_frames()
+
+    def _cmd_source(self, audio, samplerate, time_map, available=None, rate=1.0):
+        self._queued = None  # Una fuente nueva explícita sustituye a la cola
+        if audio is not self._source:
+            self._crossings = None
+        self._source = audio
+        self._samplerate = samplerate
+        self._map = time_map
+        self._available = available
+        self._rate = rate
+        self._update_loop_frames()
+        self._flush(self.position)
+
+    def _cmd_swap(self, audio, samplerate, time_map, rate=1.0):
+        if audio is self._source:
+            self._cmd_rate(rate)
+            return
+        if self._source is None or not self._playing or samplerate != self._samplerate:
+            self._cmd_source(audio, samplerate, time_map, None, rate)
+            return
+
+        # Punto musical del siguiente frame a escribir, en el render nuevo
+        original = self._to_original(self._pos)
+        self._xfade = (self._source, self._pos, 0, self._rate)
+        self._source = audio
+        self._map = time_map
+        self._available = None
+        self._crossings = None
+        self._rate = rate
+        pos = original if time_map is None else time_map.to_stretched(original)
+        self._pos = int(round(pos)) if rate == 1.0 else pos
+        self._at_end = False
+        self._update_loop_frames()
+        if self._count_in_left and self._loop_frames:
+            # En plena cuenta: la vuelta empieza en el inicio del loop del
+            # render nuevo, sin crossfade (antes solo hay silencio)
+            self._xfade = None
+            self._pos = self._loop_frames[0]
+
+    def _cmd_rate(self, rate):
+        if rate == self._rate:
+            return
+        self._rate = rate
+        if rate == 1.0:
+            self._pos = int(round(self._pos))
+        if self._playing:
+            # Lo ya escrito por delante iba a la velocidad anterior
+            self._flush(self.position)
+
+    def _cmd_metronome(self, beats, click, count_in_beats, beats_per_bar, volume):
+        self._beats = None if beats is None else np.asarray(beats, dtype=np.float64)
+        self._click_on = click and beats is not None
+        self._count_in_beats = count_in_beats if beats is not None else 0
+        self._beats_per_bar = beats_per_bar
+        if volume != self._click_volume:
+            self._click_volume = volume
+            self._clicks = None  # Se rehacen con el volumen nuevo
+        self._update_click_frames()
+        if self._playing:
+            self._flush(self.position)
+
+    def _cmd_queue(self, queued):
+        self._queued = queued
+
+    def _cmd_crossings(self, audio, index):
+        if audio is self._source:
+            self._crossings = index
+            self._update_loop_frames()
+
+    def _cmd_time_map(self, audio, time_map):
+        queued = self._queued
+        if queued is not None and queued[0] is audio:
+            self._queued = (audio, time_map) + queued[2:]
+        if audio is self._source:
+            self._map = time_map
+            self._update_loop_frames()
+
+    def _cmd_seek(self, seconds):
+        self._flush(seconds)
+
+    def _cmd_loop(self, start, end):
+        self._loop = (start, end)
+        self._update_loop_frames()
+        if self._playing:
+            # Rehacer lo ya escrito por delante con el loop nuevo
+            self._flush(self.position)
+
+    def _cmd_play(self):
+        self._playing = True
+        self._flush(self.position)
+        if self._loop_frames:
+            loop_start, loop_end = self._loop_frames
+            if loop_start + self.ring.blocksize <= self._pos < loop_end:
+                return
+            # Play en el inicio del loop (o fuera, que salta a él): también con
+            # cuenta, y el primer click después del fade-in de arranque
+            self._pos = loop_start
+            self._start_count_in(self._pos, delay=FADE_FRAMES)
+
+    def _cmd_stop(self):
+        self._playing = False
+        self._flush(0.0)
+
+    # ========== CONSUMIDOR (callback de audio) ==========
+
+    def render(self, outdata, frames):
+        """
+        Llena outdata con los siguientes frames del ring (silencio si no hay)
+        Retorna el número de frames con audio
+        """
+        ring = self.ring
+        playing = not self.paused
+        filled = 0
+        offset = self._offset
+
+        while filled < frames and ring.read_idx < ring.write_idx:
+            if not playing and self._gain == 0:
+                break  # Pausa: el ring se queda como está
+
+            slot = ring.read_idx % ring.num_slots
+            length = ring.lengths[slot]
+            if ring.gens[slot] < ring.generation:
+                # Slot de antes de un seek: si estaba sonando, fundirlo a silencio.
+                # La generación se relee en cada slot: si el productor hace un
+                # flush durante el callback, sus slots nuevos no son viejos
+                n = min(length - offset, self._gain, frames - filled)
+                if n > 0:
+                    out = outdata[filled:filled + n]
+                    out[:] = ring.frames[slot, offset:offset + n]
+                    self._apply_fade(out, n, False)
+                    filled += n
+                self._gain = 0
+                ring.read_idx += 1
+                offset = 0
+                continue
+
+            n = min(length - offset, frames - filled)
+            if not playing:
+                n = min(n, self._gain)  # Solo lo que dura el fade-out
+            if n > 0:
+                out = outdata[filled:filled + n]
+                out[:] = ring.frames[slot, offset:offset + n]
+                if self._gain == 0 and playing and self.stats:
+                    self.stats.on_first_audio()  # Silencio → audio
+                self._apply_fade(out, n, playing)
+                filled += n
+                offset += n
+                self.position = ring.positions[slot] + offset * ring.steps[slot]
+
+            if offset >= length:
+                if ring.flags[slot] & END:
+                    self._ended = True  # El productor lo ve en su siguiente vuelta
+                ring.read_idx += 1
+                offset = 0
+
+        self._offset = offset
+        if filled < frames:
+            outdata[filled:] = 0
+            self._gain = 0
+            if self._playing and playing and not self._at_end:
+                self.starved_blocks += 1
+        return filled
+
+    def _apply_fade(self, out, n, fade_in):
+        """Aplica el tramo de fade que toque a los n frames de out"""
+        g = self._gain
+        if fade_in:
+            if g < FADE_FRAMES:
+                k = min(n, FADE_FRAMES - g)
+                out[:k] *= RAMP[g:g + k]
+                self._gain = g + k
+        elif g > 0:
+            k = min(n, g)
+            out[:k] *= FADE_OUT[FADE_FRAMES - g:FADE_FRAMES - g + k]
+            self._gain = g - k
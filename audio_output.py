@@ -0,0 +1,276 @@
+"""
+Audio Output - Salidas de audio intercambiables para AudioPlayer
+
+- SoundDeviceOutput: tarjeta real vía sounddevice (AudioInjector, device 0)
+- NullOutput: descarta el audio; en tiempo real o "tan rápido como se pueda"
+- FileSinkOutput: como NullOutput pero escribe lo reproducido a un WAV
+
+Todas siguen el modelo de callback: la salida pide bloques a su fuente
+(set_source, ver audio_engine) a su propio ritmo. Además: prepare(samplerate)
+al cargar un archivo y en play/resume, close() al salir y los atributos
+blocksize/channels.
+
+native_samplerate: rate al que conviene entregar el audio (el del codec), o
+None si da igual. AudioPlayer convierte cada archivo a ese rate una sola vez
+(ver resampler) en vez de dejar que PortAudio/ALSA lo haga en cada bloque.
+"""
+
+import threading
+import time
+
+
+class SoundDeviceOutput:
+    """
+    Salida por la tarjeta de sonido (sounddevice / PortAudio)
+    
+    El OutputStream se abre una sola vez (al crear la salida) con un blocksize
+    explícito y se mantiene abierto: en cada callback pide los frames a la
+    fuente (PlaybackEngine.render), que entrega silencio si no hay nada que
+    sonar. Abrir/cerrar el stream en el AudioInjector cuesta decenas de ms y
+    a veces produce clicks. Solo se reabre si cambia el sample rate o si el
+    stream muere por un error del dispositivo: entonces un thread lo reabre
+    enseguida, y prepare() (al cargar y en play/resume) lo comprueba de nuevo
+    por si ese intento falló. reopen_count cuenta estas reaperturas.
+    
+    El callback también lee los flags de underflow de PortAudio y mide cada
+    llamada (ver playback_stats)
+    """
+
+    OPEN_RETRIES = 3
+
+    def __init__(self, device=0, blocksize=512, samplerate=None, channels=2):
+        """samplerate: rate inicial del stream (por defecto el nativo del dispositivo)"""
+        # Import diferido: en máquinas sin PortAudio el resto de la app funciona
+        import sounddevice as sd
+        self.sd = sd
+        self.device = device
+        self.blocksize = blocksize
+        self.channels = channels
+        self.samplerate = None
+        self.sd.default.device = device  # AudioInjector (hw:1,0)
+        self.native_samplerate = self._query_native_samplerate()
+        self.stats = None  # PlaybackStats (lo asigna AudioPlayer)
+
+        self._stream = None
+        self._stream_id = 0  # Qué stream es el actual (los viejos también avisan al cerrar)
+        self._stream_failed = False
+        self._lock = threading.Lock()  # open/close: control y thread de recuperación
+        self._closed = False
+        self._source = None  # Objeto con render(outdata, frames)
+        self.reopen_count = 0
+
+        self.open(samplerate or self.native_samplerate or 44100)
+
+    # ========== STREAM ==========
+
+    def _query_native_samplerate(self):
+        try:
+            info = self.sd.query_devices(self.device, 'output')
+            return int(info['default_samplerate'])
+        except (ValueError, KeyError, self.sd.PortAudioError) as e:
+            print(f"⚠ Sample rate nativo desconocido ({e}): se usará el del archivo")
+            return None
+
+    def open(self, samplerate):
+        """(Re)abre el stream al sample rate indicado"""
+        self._close_stream()
+
+        last_error = None
+        stream_id = self._stream_id + 1
+        for attempt in range(self.OPEN_RETRIES):
+            try:
+                stream = self.sd.OutputStream(
+                    samplerate=samplerate,
+                    channels=self.channels,
+                    dtype='float32',
+                    device=self.device,
+                    blocksize=self.blocksize,
+                    latency='low',
+                    callback=self._callback,
+                    finished_callback=lambda: self._on_stream_finished(stream_id),
+                )
+                stream.start()
+            except self.sd.PortAudioError as e:
+                last_error = e
+                print(f"⚠ Error abriendo salida de audio ({attempt + 1}/{self.OPEN_RETRIES}): {e}")
+                time.sleep(0.1 * (attempt + 1))
+                continue
+
+            self._stream = stream
+            self._stream_id = stream_id
+            self._stream_failed = False
+            self.samplerate = samplerate
+            if self.stats:
+                self.stats.reset_callback_clock()
+            print(f"✓ Salida de audio abierta: {samplerate}Hz, bloque {self.blocksize} "
+                  f"({stream.latency * 1000:.1f}ms)")
+            return
+
+        raise last_error
+
+    def prepare(self, samplerate):
+        """Deja el stream listo para audio a este sample rate (al cargar y en play/resume)"""
+        with self._lock:
+            if self._closed:
+                return
+            failed = (self._stream is None or self._stream_failed
+                      or not self._stream.active)
+            if failed or samplerate != self.samplerate:
+                if failed:
+                    print("⚠ Stream de audio caído: reabriendo")
+                self.open(samplerate)
+                if failed:
+                    self.reopen_count += 1
+
+    def _on_stream_finished(self, stream_id):
+        # Solo llega aquí con el stream actual si PortAudio lo detuvo (error del
+        # dispositivo): se reabre desde otro thread, no desde el de PortAudio
+        if stream_id == self._stream_id and self._stream is not None:
+            self._stream_failed = True
+            threading.Thread(target=self._recover, name='audio-recover', daemon=True).start()
+
+    def _recover(self):
+        try:
+            self.prepare(self.samplerate)
+        except self.sd.PortAudioError as e:
+            print(f"✗ No se pudo reabrir la salida de audio: {e}")
+
+    def _close_stream(self):
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            try:
+                stream.abort()
+                stream.close()
+            except self.sd.PortAudioError as e:
+                print(f"⚠ Error cerrando salida de audio: {e}")
+
+    def set_source(self, source):
+        self._source = source
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._close_stream()
+
+    # ========== CALLBACK ==========
+
+    def _callback(self, outdata, frames, time_info, status):
+        start = time.perf_counter()
+
+        source = self._source
+        if source is None:
+            outdata.fill(0)
+        else:
+            source.render(outdata, frames)
+
+        stats = self.stats
+        if stats:
+            stats.on_callback(start, time.perf_counter(), frames, self.samplerate,
+                              underflow=status.output_underflow)
+
+
+class NullOutput:
+    """
+    Salida que descarta el audio
+
+    Un thread hace de "tarjeta": pide bloques a la fuente como lo haría el
+    callback de PortAudio.
+    realtime=True: un bloque cada blocksize/samplerate segundos (reloj de pared)
+    realtime=False: el audio se consume al instante (benchmarks / soak tests)
+    """
+
+    def __init__(self, realtime=True, blocksize=512, channels=2):
+        self.realtime = realtime
+        self.blocksize = blocksize
+        self.channels = channels
+        self.samplerate = 44100
+        self.native_samplerate = None  # Acepta cualquier rate
+        self.frames_played = 0  # Total de frames "reproducidos"
+        self.stats = None  # PlaybackStats (lo asigna AudioPlayer)
+
+        self._source = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def prepare(self, samplerate):
+        self.samplerate = samplerate
+
+    def set_source(self, source):
+        self._source = source
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='null-output', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        import numpy as np
+        buf = np.zeros((self.blocksize, self.channels), dtype=np.float32)
+        next_time = time.perf_counter()
+
+        while not self._stop_event.is_set():
+            n = self._source.render(buf, self.blocksize)
+            if n:
+                self._write(buf[:n], self.samplerate)
+                self.frames_played += n
+
+            if self.realtime or not n:
+                next_time += self.blocksize / self.samplerate
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    self._stop_event.wait(delay)
+                elif delay < -0.5:
+                    next_time = time.perf_counter()  # Nos dormimos: no recuperar de golpe
+            else:
+                time.sleep(0)  # Ceder el GIL al productor
+
+    def _write(self, data, samplerate):
+        pass
+
+    def close(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+
+class FileSinkOutput(NullOutput):
+    """
+    Escribe a un WAV exactamente lo que se habría oído (sin los silencios)
+    """
+
+    def __init__(self, path, realtime=False):
+        super().__init__(realtime=realtime)
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _write(self, data, samplerate):
+        import soundfile as sf
+        with self._lock:
+            if self._file is None:
+                self._file = sf.SoundFile(self.path, 'w', samplerate=samplerate,
+                                          channels=self.channels)
+            self._file.write(data)
+
+    def close(self):
+        super().close()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def create_audio_output(spec):
+    """
+    Crea una salida a partir de un texto de configuración:
+    'device' (por defecto), 'null', 'null-fast', 'file:PATH', 'file-rt:PATH'
+    """
+    if spec in (None, 'device'):
+        return SoundDeviceOutput()
+    if spec == 'null':
+        return NullOutput(realtime=True)
+    if spec == 'null-fast':
+        return NullOutput(realtime=False)
+    if spec.startswith('file:'):
+        return FileSinkOutput(spec[len('file:'):], realtime=False)
+    if spec.startswith('file-rt:'):
+        return FileSinkOutput(spec[len('file-rt:'):], realtime=True)
+    raise ValueError(f"Salida de audio desconocida: {spec}")
@@ -1,68 +1,165 @@
-import sounddevice as sd
 import soundfile as sf
-import numpy as np
 import threading
-import time
+from collections import namedtuple
 from tempo_controller import TempoController
-sd.default.device = 0  # AudioInjector (hw:1,0)
+from waveform_peaks import PeakIndex
+from onset_index import OnsetIndex, spectral_flux
+from beat_grid import BeatGrid
+from zero_crossings import ZeroCrossingIndex
+from time_map import TimeMap
+from streaming_decoder import StreamingDecoder
+from loop_bookmarks import LoopBookmarks
+from tempo_ramp import TempoRamp
+from resampler import Resampler
+from audio_output import SoundDeviceOutput
+from audio_engine import PlaybackEngine
+from playback_stats import PlaybackStats
+
+# Estado del player leído de una vez (ver AudioPlayer.get_snapshot)
+PlayerSnapshot = namedtuple('PlayerSnapshot', [
+    'state', 'position', 'duration', 'point_a', 'point_b', 'tempo', 'adjusting_point'])
 
 class AudioPlayer:
     """
     Reproductor de audio con loop A-B y control de tempo
     """
     
-    def __init__(self, on_state_change=None):
+    ADJUST_ZOOM_STEPS = 20  # Ancho de la vista de onda en pasos de ajuste
+    TEMPO_MIN = 50
+    TEMPO_MAX = 200
+    PITCH_RANGE = 12  # Transposición máxima en semitonos (±)
+    SNAP_WINDOW = 0.15  # Distancia máxima (s) para pegar una marca a un onset
+    REGION_MARGIN = 0.5  # Segundos extra a cada lado de la región de un bookmark
+    BEATS_PER_BAR = 4
+    
+    def __init__(self, on_state_change=None, output=None, stats_log_interval=60.0,
+                 pcm_cache=False, varispeed=False):
+        """
+        on_state_change: callback(message) para notificar cambios
+        output: salida de audio (por defecto la tarjeta, ver audio_output)
+        stats_log_interval: segundos entre líneas de log de telemetría
+        pcm_cache: guardar el PCM de FLAC/OGG/MP3 decodificados (ver streaming_decoder)
+        varispeed: el tempo cambia la velocidad de lectura (el pitch la sigue) en vez
+                   de renderizar un time-stretch: sin espera y casi sin CPU
+        """
         self.filepath = None
         self.audio_data = None
+        self._decoder = None  # StreamingDecoder del archivo actual
+        self.pcm_cache = pcm_cache
         self.samplerate = None
         self.duration = 0.0
         
+        # Salida de audio y engine de streaming (ver audio_engine)
+        self.output = output or SoundDeviceOutput()
+        self.output_lock = threading.Lock()
+        
+        # Telemetría (underflows, tiempos de callback, time-to-first-audio)
+        self.stats = PlaybackStats()
+        self.output.stats = self.stats
+        self.stats.start_logging(interval=stats_log_interval)
+        self._seek_pending = False  # La posición se movió en pausa
+        
+        self.engine = PlaybackEngine(self.output, stats=self.stats,
+                                     on_end=self._on_playback_end, on_seam=self._on_seam)
         
         # Estado de reproducciÃƒÂ³n
         self.is_playing = False
         self.is_paused = False
-        self.current_position = 0.0  # PosiciÃƒÂ³n en segundos
         
-        # Loop A-B
-        self.point_a = None
-        self.point_b = None
+        # Loop A-B: una sola tupla para que A y B se lean siempre juntos
+        self._loop = (None, None)
         
         # Tempo
         self.tempo_percent = 100  # 100% = velocidad normal
-        self.tempo_controller = TempoController()  # ⭐ AÑADIR ESTA LÍNEA
-        self.processed_audio = None  # Audio con tempo aplicado
+        self.pitch = 0.0  # Transposición en semitonos (0.01 = 1 cent)
+        self.varispeed = varispeed
+        self.tempo_controller = TempoController()
+        self.processed_audio = None  # Audio con tempo/pitch aplicado
+        self._processed = (100, 0.0, None)  # (tempo, pitch, región) de processed_audio
         
-        # Threading
-        self.playback_thread = None
-        self.stop_event = threading.Event()
-        self.pause_event = threading.Event()
-        self.sd_lock = threading.Lock()
+        # Por cada fuente (original y tempos): cruces por cero y mapa de tiempo
+        self._crossings = {}  # id(audio) -> (audio, ZeroCrossingIndex)
+        self._time_maps = {}  # id(render) -> (render, TimeMap)
+        self._render_lock = threading.Lock()  # Un render de tempo a la vez
         
         # Callback para notificar cambios
         self.on_state_change = on_state_change
         
         # Ajuste fino (para hold)
         self.adjusting_point = None  # 'A' o 'B' cuando estamos ajustando
+        self.adjust_step = 0.1  # Último paso usado (define el zoom de la onda)
+        
+        # Índice de picos para la vista de onda (se construye en background)
+        self.peak_index = None
+        
+        # Análisis por archivo (en background, con cache): onsets para pegar
+        # A/B a transitorios y rejilla de pulsos para ajustar en beats
+        self.onset_index = None
+        self.snap_to_onsets = True
+        self.beat_grid = None
+        self.adjust_unit = 'seconds'  # 'seconds' o 'beats' (solo con beat_grid)
+        self._restored_unit = None  # Unidad de la sesión, a la espera del análisis
+        
+        # Loops guardados del archivo (ver loop_bookmarks). Mientras el loop
+        # esté dentro de la región del bookmark se renderiza solo esa región
+        self.bookmarks = None
+        self.bookmark_index = None
+        self._region = None  # (inicio, fin) en frames del original, con margen
+        
+        # Rampa de tempo en curso (ver tempo_ramp)
+        self.ramp = None
+        
+        # Metrónomo: (click, count_in, bpm, volumen) o None; se aplica a cada
+        # archivo en cuanto se conoce su pulso
+        self.metronome = None
         
     # ========== CARGA DE ARCHIVO ==========
     
     def load_file(self, filepath):
-        """Carga un archivo WAV en memoria"""
+        """
+        Carga un archivo de audio (WAV/FLAC/OGG/MP3)
+        Solo se decodifica el primer tramo; el resto sigue en background y
+        los análisis se lanzan al terminar (ver _on_decoded)
+        """
         try:
             self.stop()  # Detener reproducciÃƒÂ³n anterior
             
             print(f"Cargando: {filepath}")
-            self.audio_data, self.samplerate = sf.read(filepath)
+            # Al rate nativo de la salida: la conversión se hace aquí, una vez
+            decoder = StreamingDecoder(filepath, pcm_cache=self.pcm_cache,
+                                       on_done=self._on_decoded,
+                                       samplerate=self.output.native_samplerate)
+            self._decoder = decoder
+            self.audio_data, self.samplerate = decoder.audio, decoder.samplerate
             self.filepath = filepath
             self.duration = len(self.audio_data) / self.samplerate
             self.original_duration = self.duration
             
+            # El stream sigue abierto (con el audio ya al rate nativo no se reabre)
+            with self.output_lock:
+                self.output.prepare(self.samplerate)
+            
             # Reset de estado
+            self.stop_ramp()
             self.current_position = 0.0
+            self._set_processed(None)
+            self._region = None
+            self.bookmark_index = None
+            self.bookmarks = LoopBookmarks(filepath)
             self.point_a = None
             self.point_b = None
             self.tempo_percent = 100
-            self.processed_audio = None
+            self.pitch = 0.0
+            self._crossings = {}
+            self._time_maps = {}
+            self.peak_index = None
+            self.onset_index = None
+            self.beat_grid = None
+            self.adjust_unit = 'seconds'
+            self._restored_unit = None
+            self._apply_metronome()  # Con bpm fijo ya; con el detectado tras el análisis
+            self._send_source()
+            decoder.start()
             
             print(f"Ã¢Å“â€œ Cargado: {self.duration:.1f}s @ {self.samplerate}Hz")
             
@@ -75,103 +172,285 @@ class AudioPlayer:
             print(f"Error al cargar {filepath}: {e}")
             return False
     
+    def _on_decoded(self, decoder):
+        """Archivo completo (thread del decoder): crossings y análisis"""
+        if self._decoder is not decoder:
+            return  # Ya se cargó otro archivo
+        if decoder.audio is not self.audio_data:
+            # La estimación de frames (MP3) no era exacta: array definitivo
+            self.audio_data = decoder.audio
+            self.duration = self.original_duration = len(self.audio_data) / self.samplerate
+            self._send_source()
+        else:
+            self._send_crossings(self.audio_data)
+        self._build_peak_index()
+        self._build_analysis()
+        self._prerender_bookmarks()
+    
+    def _wait_decoded(self):
+        """Espera al archivo completo (renders de tempo, guardar loop)"""
+        if self._decoder is not None and not self._decoder.done:
+            print("Esperando a la decodificación...")
+            self._decoder.wait()
+    
+    def _build_peak_index(self):
+        """Construye el índice de picos en background para no retrasar la carga"""
+        self.peak_index = None
+        audio_data, samplerate = self.audio_data, self.samplerate
+        
+        def worker():
+            index = PeakIndex(audio_data, samplerate)
+            # Descartar si mientras tanto se cargó otro archivo
+            if self.audio_data is audio_data:
+                self.peak_index = index
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _build_analysis(self):
+        """Onsets y beats en background (o desde la cache de análisis)"""
+        self.onset_index = None
+        self.beat_grid = None
+        filepath, audio_data, samplerate = self.filepath, self.audio_data, self.samplerate
+        
+        def worker():
+            flux = []  # El flux se calcula una vez y solo si falta algún análisis
+            def get_flux():
+                if not flux:
+                    flux.append(spectral_flux(audio_data, samplerate))
+                return flux[0]
+            
+            try:
+                onsets = OnsetIndex.for_file(filepath, audio_data, samplerate, get_flux)
+                grid = BeatGrid.for_file(filepath, audio_data, samplerate, get_flux)
+            except Exception as e:
+                print(f"⚠ Error analizando {filepath}: {e}")
+                return
+            
+            if self.audio_data is audio_data:
+                self.onset_index = onsets
+                self.beat_grid = grid
+                if grid is None:
+                    self.adjust_unit = 'seconds'  # Sin grid no hay beats
+                elif self._restored_unit == 'beats':
+                    self.adjust_unit = 'beats'
+                self._restored_unit = None
+                bpm = f", {grid.bpm:.1f} BPM" if grid else ""
+                print(f"✓ Análisis: {len(onsets)} onsets{bpm}")
+                self._apply_metronome()
+                # El render que ya suena iba con el mapa lineal
+                audio, region = self.processed_audio, self._processed[2]
+                if audio is not None:
+                    self._send_time_map(audio, region)
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _snap(self, value, window, exclude=None):
+        """value pegado al onset más cercano dentro de ±window (si snap activo)"""
+        if not self.snap_to_onsets or self.onset_index is None or value is None:
+            return value
+        onset = self.onset_index.nearest(value, window, exclude=exclude)
+        return value if onset is None else onset
+    
     # ========== REPRODUCCIÃƒâ€œN ==========
    
     
     def play(self):
-        """Inicia o resume la reproducciÃƒÂ³n"""
+        """Inicia la reproducción (o resume desde la posición de pausa)"""
         if self.audio_data is None:
-            print("Ã¢Å¡Â  No hay archivo cargado")
+            print("⚠ No hay archivo cargado")
             return
         
         if self.is_playing:
             return
+        self._ensure_output()
             
+        render_tempo = self._render_tempo()
+        needs_render = (self._is_processed(render_tempo, self.pitch) and
+                        not self.tempo_controller.is_cached(
+                            render_tempo, self.pitch, self._render_source(self._render_region())))
+        self.stats.mark_request('tempo' if needs_render else 'play')
     
-        # Si el tempo cambió y no está en cache, procesar antes de reproducir
-        if self.tempo_percent != 100:
-            if self.tempo_percent not in self.tempo_controller.cache:
-                if self.on_state_change:
-                    self.on_state_change(f"Processing {self.tempo_percent}%...")
+        # Render pendiente con el mismo pitch: arrancar ya en preview (varispeed
+        # sobre lo que haya) y el render de calidad entra al terminar
+        preview = needs_render and self._processed[1] == self.pitch
+        
+        # Si el tempo/pitch cambió, procesar antes de reproducir (en cache es inmediato)
+        if preview:
+            pass  # Suena processed_audio (u original) a tempo_percent / su tempo
+        elif self._is_processed(render_tempo, self.pitch):
+            if needs_render and self.on_state_change:
+                self.on_state_change(f"Processing {self.tempo_percent}%...")
+            with self._render_lock:
                 self._process_tempo_sync()
-        elif self.tempo_percent == 100:
+        else:
             # Si volvemos a 100%, usar audio original
-            self.processed_audio = None
-            # ⭐ RESTAURAR DURACIÓN ORIGINAL
-            #self.duration = len(self.audio_data) / self.samplerate
+            self._set_processed(None)
+        self._send_source()
         
-        # Ã¢Â­Â Solo resetear posiciÃƒÂ³n si NO estamos resumiendo desde pausa
+        # Solo resetear posición si NO estamos resumiendo desde pausa
         if not self.is_paused:
             self.current_position = 0.0
         
         self.is_playing = True
         self.is_paused = False
-        self.stop_event.clear()
-        self.pause_event.clear()
-        
-        # Lanzar thread de reproducciÃƒÂ³n
-        self.playback_thread = threading.Thread(target=self._playback_worker, daemon=True)
-        self.playback_thread.start()
+        self.engine.play()
+        if preview:
+            self._render_async(render_tempo, self.pitch)
         
         if self.on_state_change:
             self.on_state_change("Reproduciendo")
     
     def pause(self):
-        """Pausa la reproducciÃƒÂ³n"""
+        """Pausa la reproducción"""
         if not self.is_playing or self.is_paused:
             return
         
         self.is_paused = True
-        self.pause_event.set()
-        with self.sd_lock:
-            sd.stop()
-            
-        time.sleep(0.05)
+        self.engine.pause()  # Gate en el callback: el stream y el ring siguen
         
         if self.on_state_change:
             self.on_state_change("Pausado")
     
     def resume(self):
-        """Resume despuÃƒÂ©s de pausa"""
+        """Resume después de pausa"""
         if not self.is_paused:
             return
         
+        self._ensure_output()
+        self.stats.mark_request('seek' if self._seek_pending else 'play')
+        self._seek_pending = False
         self.is_paused = False
-        self.pause_event.clear()
-        
-        # Ã¢Â­Â Si el thread muriÃƒÂ³, relanzarlo
-        if self.playback_thread is None or not self.playback_thread.is_alive():
-            self.is_playing = True
-            self.stop_event.clear()
-            self.playback_thread = threading.Thread(target=self._playback_worker, daemon=True)
-            self.playback_thread.start()
+        self.is_playing = True
+        self.engine.resume()
         
         if self.on_state_change:
             self.on_state_change("Reproduciendo")
     
     def stop(self):
-        """Detiene completamente la reproducciÃƒÂ³n"""
+        """Detiene completamente la reproducción"""
         if not self.is_playing:
             return
         
+        self.stop_ramp()
         self.is_playing = False
         self.is_paused = False
-        self.stop_event.set()
-        self.pause_event.set()
-        with self.sd_lock:
-            sd.stop()
-        
-        # Esperar a que termine el thread
-        if self.playback_thread and self.playback_thread.is_alive():
-            self.playback_thread.join(timeout=1.0)
-        time.sleep(0.1)
-        
-        # Ã¢Â­Â Resetear posiciÃƒÂ³n al detener
-        self.current_position = 0.0
+        self.engine.stop()  # También vuelve la posición a 0
         
         if self.on_state_change:
             self.on_state_change("Detenido")
     
+    def _ensure_output(self):
+        """Reabre la salida si su stream murió por un error del dispositivo"""
+        try:
+            with self.output_lock:
+                self.output.prepare(self.samplerate)
+        except Exception as e:
+            print(f"✗ Salida de audio no disponible: {e}")
+    
+    def _on_playback_end(self):
+        """El engine llegó al final del archivo (sin loop)"""
+        self.is_playing = False
+    
+    def _send_source(self, swap=False):
+        """
+        Pasa al engine el audio a reproducir (procesado o original)
+        swap: cambio de tempo en marcha (mismo punto musical, crossfade)
+        """
+        audio = self.processed_audio
+        if audio is None or audio is self.audio_data:
+            audio = self.audio_data
+        rate = self._playback_rate()
+        decoder = self._decoder
+        if audio is self.audio_data and decoder is not None and not decoder.done:
+            # Aún decodificando: el engine no pasa de lo disponible y los
+            # cruces por cero llegan desde _on_decoded
+            self.engine.set_source(audio, self.samplerate, None, decoder.available, rate)
+            return
+        time_map = self._time_map_for(audio, self._processed[2])
+        if swap:
+            self.engine.swap_source(audio, self.samplerate, time_map, rate)
+        else:
+            self.engine.set_source(audio, self.samplerate, time_map, rate=rate)
+        self._send_crossings(audio)
+    
+    def _time_map_for(self, audio, region=None):
+        """
+        TimeMap original <-> render (None para el original), sin esperar: el
+        de onsets si ya está; si no, el lineal mientras se calcula en
+        background (llega al engine con set_time_map)
+        """
+        if audio is self.audio_data:
+            return None
+        entry = self._time_maps.get(id(audio))
+        if entry is not None and entry[0] is audio:
+            return entry[1]
+        if self.onset_index is not None:
+            threading.Thread(target=self._send_time_map, args=(audio, region),
+                             name='time-map', daemon=True).start()
+        return self._linear_map(audio, region)
+    
+    def _linear_map(self, audio, region=None):
+        start, stop = region or (0, len(self.audio_data))
+        time_map = TimeMap.linear(stop - start, len(audio))
+        return time_map.shifted(start) if start else time_map
+    
+    def _build_time_map(self, audio, region=None):
+        """
+        TimeMap con un ancla por onset localizado en el render. Analiza todo el
+        render: solo desde threads de render/análisis, nunca el de control
+        region: el render es solo de esos frames del original
+        """
+        maps, onsets = self._time_maps, self.onset_index
+        entry = maps.get(id(audio))
+        if entry is not None and entry[0] is audio:
+            return entry[1]
+        if onsets is None:
+            return self._linear_map(audio, region)  # Sin guardar: falta el análisis
+        
+        start, stop = region or (0, len(self.audio_data))
+        if len(onsets):
+            times = onsets.times
+            times = times[(times >= start / self.samplerate) & (times < stop / self.samplerate)]
+            time_map = TimeMap.from_onsets(times - start / self.samplerate, audio,
+                                           self.samplerate, stop - start)
+            if start:
+                time_map = time_map.shifted(start)
+        else:
+            time_map = self._linear_map(audio, region)
+        maps[id(audio)] = (audio, time_map)
+        return time_map
+    
+    def _send_time_map(self, audio, region=None):
+        """Calcula el TimeMap de un render y lo pasa al engine (thread propio)"""
+        try:
+            self.engine.set_time_map(audio, self._build_time_map(audio, region))
+        except Exception as e:
+            print(f"⚠ Error calculando el mapa de tiempos: {e}")
+    
+    def _send_crossings(self, audio):
+        """Bordes del loop en cruces por cero: índice en background la primera vez"""
+        entry = self._crossings.get(id(audio))
+        if entry is not None and entry[0] is audio:
+            self.engine.set_crossings(audio, entry[1])
+            return
+        
+        crossings, samplerate = self._crossings, self.samplerate
+        
+        def worker():
+            index = ZeroCrossingIndex(audio, samplerate)
+            crossings[id(audio)] = (audio, index)
+            self.engine.set_crossings(audio, index)
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def close(self):
+        """Detiene y libera la salida de audio (al salir de la app)"""
+        self.stop()
+        self.stats.stop_logging()
+        self.engine.close()
+        with self.output_lock:
+            self.output.close()
+    
     def toggle_play_pause(self):
         """Alterna entre play y pause"""
         if self.is_playing and not self.is_paused:
@@ -194,25 +473,24 @@ class AudioPlayer:
                 self.on_state_change(message)
         
         try:
-            # Procesar audio completo
-            self.processed_audio = self.tempo_controller.change_tempo(
-                self.audio_data,
+            # Procesar el audio completo (o solo la región del bookmark)
+            self._wait_decoded()
+            region = self._render_region()
+            rendered = self.tempo_controller.change_tempo(
+                self._render_input(self.audio_data, region),
                 self.samplerate,
-                self.tempo_percent,
-                on_progress=progress_callback
+                self._render_tempo(),
+                on_progress=progress_callback,
+                pitch=self.pitch,
+                source=self._render_source(region)
             )
-            
-
-            if self.processed_audio is not None:
-                # Actualizar duración para reflejar el audio procesado
-                #self.duration = len(self.processed_audio) / self.samplerate
-            	pass
+            self._set_processed(rendered, self._render_tempo(), self.pitch, region)
             
         except Exception as e:
             print(f"Error procesando tempo: {e}")
             if self.on_state_change:
                 self.on_state_change(f"Error: {e}")
-            self.processed_audio = None
+            self._set_processed(None)
 
 
 
@@ -224,7 +502,7 @@ class AudioPlayer:
         if self.audio_data is None:
             return
         
-        self.point_a = self.current_position
+        self.point_a = self._snap(self.current_position, self.SNAP_WINDOW)
         
         # Si B estÃƒÂ¡ antes de A, lo quitamos
         if self.point_b is not None and self.point_b < self.point_a:
@@ -248,7 +526,7 @@ class AudioPlayer:
         if self.audio_data is None:
             return
         
-        self.point_b = self.current_position
+        self.point_b = self._snap(self.current_position, self.SNAP_WINDOW)
         
         # Si A estÃƒÂ¡ despuÃƒÂ©s de B, lo quitamos
         if self.point_a is not None and self.point_a > self.point_b:
@@ -290,6 +568,7 @@ class AudioPlayer:
             return
         
         self.adjusting_point = 'A'
+        self.adjust_step = 0.1
         self.pause()
         print("Modo ajuste punto A (Ã‚Â±0.1s)")
     
@@ -300,6 +579,7 @@ class AudioPlayer:
             return
         
         self.adjusting_point = 'B'
+        self.adjust_step = 0.1
         self.pause()
         print("Modo ajuste punto B (Ã‚Â±0.1s)")
     
@@ -310,35 +590,110 @@ class AudioPlayer:
             return
         
         self.adjusting_point = 'POSITION'
+        self.adjust_step = 0.1
         print("Modo ajuste posiciÃƒÂ³n (Ã‚Â±0.1s)")
         
         if self.on_state_change:
             self.on_state_change("Ajustando posiciÃƒÂ³n")
     
+    def _adjust_max_duration(self):
+        """
+        Límite máximo para el ajuste: A, B y la posición van en segundos del
+        original, sea cual sea el render cargado (tempo != 100, región)
+        """
+        return self.duration
+    
+    def get_adjust_value(self, extra=0.0):
+        """
+        Valor del punto en ajuste + extra (sin aplicarlo), limitado al archivo
+        La UI lo usa para mostrar el objetivo mientras se acumulan deltas
+        """
+        if self.adjusting_point == 'A':
+            value = self.point_a
+        elif self.adjusting_point == 'B':
+            value = self.point_b
+        elif self.adjusting_point == 'POSITION':
+            value = self.current_position
+        else:
+            return None
+        
+        if value is None:
+            return None
+        if self.adjust_unit == 'beats' and self.beat_grid and extra:
+            value = self.beat_grid.shift(value, extra)  # extra en pulsos
+        else:
+            value = value + extra
+        return max(0, min(self._adjust_max_duration(), value))
+    
+    def toggle_adjust_unit(self):
+        """Alterna el ajuste entre segundos y pulsos (si hay rejilla de beats)"""
+        if self.adjust_unit == 'beats':
+            self.adjust_unit = 'seconds'
+        elif self.beat_grid is None:
+            print("⚠ Sin rejilla de beats para este archivo")
+            return
+        else:
+            self.adjust_unit = 'beats'
+        print(f"Ajuste en {self.adjust_unit}")
+    
+    def adjust_amount(self, step):
+        """
+        Convierte el paso del botón (0.1/0.5/1.0s según el hold) a la unidad
+        activa: en beats, 1 pulso al principio y 1 compás al acelerar
+        Actualiza adjust_step (zoom de la onda) en segundos
+        """
+        if self.adjust_unit == 'beats' and self.beat_grid:
+            beats = 1 if step < 0.5 else self.BEATS_PER_BAR
+            self.adjust_step = beats * self.beat_grid.period
+            return beats
+        self.adjust_step = step
+        return step
+    
+    def get_adjust_step_label(self):
+        if self.adjust_unit == 'beats' and self.beat_grid:
+            beats = round(self.adjust_step / self.beat_grid.period)
+            return "±1 bar" if beats >= self.BEATS_PER_BAR else "±1 beat"
+        return f"±{self.adjust_step}s"
+    
     def adjust_fine(self, delta):
         """
         Ajusta el punto activo en Ã‚Â±delta segundos
-        delta: tÃƒÂ­picamente Ã‚Â±0.1
+        delta: tÃƒÂ­picamente Ã‚Â±0.1 (o la suma de varios pasos durante un hold)
+        En modo beats delta son pulsos (ver adjust_amount)
         """
-        # ⭐ Calcular límite máximo (usar duración procesada si existe)
-        if self.processed_audio is not None:
-            max_duration = len(self.processed_audio) / self.samplerate
-        else:
-            max_duration = self.original_duration
+        new_value = self.get_adjust_value(delta)
+        if new_value is None:
+            return
         
+        # A/B: si hay un transitorio cerca del destino, ir a él (sin quedarse en el actual)
+        if self.adjusting_point in ('A', 'B') and self.adjust_unit == 'seconds':
+            current = self.get_adjust_value()
+            new_value = self._snap(new_value, abs(delta) / 2, exclude=current)
         
-        if self.adjusting_point == 'A' and self.point_a is not None:
-            self.point_a = max(0, min(max_duration, self.point_a + delta))
+        if self.adjusting_point == 'A':
+            self.point_a = new_value
             print(f"Punto A ajustado: {self.point_a:.3f}s")
             
-        elif self.adjusting_point == 'B' and self.point_b is not None:
-            self.point_b = max(0, min(max_duration, self.point_b + delta))
+        elif self.adjusting_point == 'B':
+            self.point_b = new_value
             print(f"Punto B ajustado: {self.point_b:.3f}s")
             
         elif self.adjusting_point == 'POSITION':
-            self.current_position = max(0, min(max_duration, self.current_position + delta))
+            self.current_position = new_value
+            self._seek_pending = True
             print(f"PosiciÃƒÂ³n ajustada: {self.current_position:.3f}s")
     
+    def get_adjust_waveform(self, center, num_cols=128):
+        """
+        Picos (mins, maxs) alrededor de center para la pantalla de ajuste
+        El zoom sigue al paso actual: 0.1s → ventana de 2s, 1.0s → 20s
+        Retorna None si el índice aún no está listo
+        """
+        if self.peak_index is None or center is None:
+            return None
+        span = self.adjust_step * self.ADJUST_ZOOM_STEPS
+        return self.peak_index.columns(center, span, num_cols)
+    
     def finish_adjusting(self):
         """Sale del modo ajuste"""
         was_position = (self.adjusting_point == 'POSITION')
@@ -349,28 +704,289 @@ class AudioPlayer:
         if not was_position:
             self.resume()
     
+    # ========== METRÓNOMO ==========
+    
+    def set_metronome(self, click=True, count_in=False, bpm=None, volume=0.5):
+        """
+        Click sobre la música y/o un compás de cuenta antes de cada vuelta del loop
+        bpm: pulso del original (None = el detectado); tempo_percent lo escala
+        """
+        self.metronome = (click, count_in, bpm, volume) if click or count_in else None
+        self._apply_metronome()
+        if self.metronome:
+            what = " + ".join(name for name, on in (("click", click), ("cuenta", count_in)) if on)
+            print(f"✓ Metrónomo: {what} @ {bpm or 'BPM detectado'}")
+    
+    def _apply_metronome(self):
+        """Pasa al engine los pulsos del archivo actual (o lo apaga)"""
+        grid = None
+        if self.metronome is not None and self.audio_data is not None:
+            click, count_in, bpm, volume = self.metronome
+            if bpm:
+                # Con BPM fijo se conserva la fase detectada si la hay
+                grid = BeatGrid(bpm, self.beat_grid.offset if self.beat_grid else 0.0)
+            else:
+                grid = self.beat_grid
+        if grid is None:
+            self.engine.set_metronome(None)
+            return
+        self.engine.set_metronome(grid.times(self.duration), click=click,
+                                  count_in_beats=self.BEATS_PER_BAR if count_in else 0,
+                                  beats_per_bar=self.BEATS_PER_BAR, volume=volume)
+    
     # ========== TEMPO ==========
     
+    def get_effective_bpm(self, tempo=None):
+        """BPM del archivo al tempo indicado (por defecto el actual), o None"""
+        if self.beat_grid is None:
+            return None
+        if tempo is None:
+            tempo = self.tempo_percent
+        return self.beat_grid.bpm * tempo / 100
+    
+    def get_tempo_target(self, extra=0):
+        """Tempo actual + extra limitado al rango permitido (sin aplicarlo)"""
+        return max(self.TEMPO_MIN, min(self.TEMPO_MAX, self.tempo_percent + extra))
+    
     def change_tempo(self, delta_percent):
         """
-        Cambia el tempo en ±delta_percent (solo actualiza el número)
-        El procesamiento ocurre cuando se presiona play()
+        Cambia el tempo en ±delta_percent
+        Parado: solo actualiza el número (el render se hace en play())
+        En reproducción/pausa: render en background y cambio sin cortar
         """
         if self.audio_data is None:
             return
     
         # Calcular nuevo tempo
-        new_tempo = self.tempo_percent + delta_percent
-        new_tempo = max(50, min(200, new_tempo))  # Limitar 50-200%
+        new_tempo = self.get_tempo_target(delta_percent)
     
         if new_tempo == self.tempo_percent:
             return
     
+        self.stop_ramp()  # El tempo manual manda sobre la rampa
         self.tempo_percent = new_tempo
         print(f"Tempo: {self.tempo_percent}%")
     
         if self.on_state_change:
             self.on_state_change(f"Tempo: {self.tempo_percent}%")    
+        
+        if self.is_playing:
+            cached = self.tempo_controller.is_cached(new_tempo, self.pitch,
+                                                     self._render_source(self._render_region()))
+            if self.varispeed or not cached:
+                # Inmediato, sin render (en two-tier: preview hasta el render de calidad)
+                self.engine.set_rate(self._playback_rate())
+            if not self.varispeed:
+                self._render_async(new_tempo, self.pitch)
+    
+    def change_pitch(self, delta_semitones):
+        """
+        Transpone ±delta_semitones (admite fracciones: 0.01 = 1 cent)
+        Mismo pipeline que el tempo: un solo render con ambos parámetros
+        """
+        if self.audio_data is None:
+            return
+        self.set_pitch(self.pitch + delta_semitones)
+    
+    def set_pitch(self, semitones, cents=0):
+        """Fija la transposición en semitonos + cents"""
+        if self.audio_data is None:
+            return
+        new_pitch = round(semitones + cents / 100, 2)
+        new_pitch = max(-self.PITCH_RANGE, min(self.PITCH_RANGE, new_pitch))
+        if new_pitch == self.pitch:
+            return
+        
+        self.stop_ramp()  # Los escalones ya renderizados tienen el pitch anterior
+        self.pitch = new_pitch
+        print(f"Pitch: {self.pitch:+.2f} st")
+        if self.on_state_change:
+            self.on_state_change(f"Pitch: {self.pitch:+.2f}")
+        
+        if self.is_playing:
+            self._render_async(self._render_tempo(), new_pitch)
+    
+    def _render_tempo(self):
+        """Tempo del render: en varispeed el tempo lo pone la velocidad de lectura"""
+        return 100 if self.varispeed else self.tempo_percent
+    
+    def _playback_rate(self):
+        """
+        Velocidad de lectura del engine para processed_audio: tempo pedido /
+        tempo del render. En varispeed el render va a 100; si no, es distinto
+        de 1 solo mientras el render de calidad del tempo nuevo no está listo
+        """
+        return self.tempo_percent / self._processed[0]
+    
+    def _set_processed(self, audio, tempo=100, pitch=0.0, region=None):
+        """processed_audio junto con el (tempo, pitch, región) con que se renderizó"""
+        if audio is None or audio is self.audio_data:
+            audio, tempo, pitch, region = None, 100, 0.0, None  # Backend no disponible: el original
+        self.processed_audio = audio
+        self._processed = (tempo, pitch, region)
+    
+    def _is_processed(self, tempo, pitch):
+        """True si (tempo, pitch) necesita un render (no es el original)"""
+        return tempo != 100 or pitch != 0
+    
+    def _render_source(self, region=None):
+        """Clave de la fuente en la cache de renders: (archivo, rate, región)"""
+        return (self.filepath, self.samplerate, region)
+    
+    def _render_input(self, audio, region):
+        """Lo que se renderiza: el archivo o solo la región"""
+        return audio if region is None else audio[region[0]:region[1]]
+    
+    def _region_for(self, point_a, point_b):
+        """Frames del original (con margen) que cubren el loop point_a-point_b"""
+        margin = self.REGION_MARGIN * self.samplerate
+        return (max(0, int(point_a * self.samplerate - margin)),
+                min(len(self.audio_data), int(point_b * self.samplerate + margin)))
+    
+    def _covers(self, region, point_a, point_b):
+        """True si el loop point_a-point_b cae dentro de la región"""
+        return (region is not None and point_a is not None and point_b is not None
+                and region[0] <= point_a * self.samplerate
+                and point_b * self.samplerate <= region[1])
+    
+    def _render_region(self):
+        """Región a renderizar para el loop actual (None = archivo completo)"""
+        return self._region if self._covers(self._region, *self._loop) else None
+    
+    def _switch_render(self):
+        """
+        El render que corresponde cambió (loop dentro/fuera de la región de un
+        bookmark, tempo de un bookmark): si está en cache entra ya con crossfade;
+        si no, preview varispeed y render de calidad en background
+        """
+        tempo, pitch = self._render_tempo(), self.pitch
+        if not self._is_processed(tempo, pitch):
+            target = (100, 0.0, None)
+        else:
+            target = (tempo, pitch, self._render_region())
+        if self._processed == target:
+            self.engine.set_rate(self._playback_rate())  # Solo cambió el tempo (varispeed)
+            return
+        if target[2] is None and not self._is_processed(tempo, pitch):
+            self._set_processed(None)
+            self._send_source(swap=True)
+            return
+        
+        source = self._render_source(target[2])
+        if self.tempo_controller.is_cached(tempo, pitch, source):
+            rendered = self.tempo_controller.change_tempo(
+                self._render_input(self.audio_data, target[2]), self.samplerate, tempo,
+                pitch=pitch, source=source)
+            self._set_processed(rendered, tempo, pitch, target[2])
+            self._send_source(swap=True)
+            return
+        
+        if self._processed[2] is not None and not self._covers(self._processed[2], *self._loop):
+            # El render de la región no sirve fuera de ella: preview sobre el original
+            self._set_processed(None)
+            self._send_source(swap=True)
+        else:
+            self.engine.set_rate(self._playback_rate())
+        self._render_async(tempo, pitch)
+    
+    def _render_async(self, tempo, pitch):
+        """Renderiza (tempo, pitch) en background y lo pasa al engine al terminar"""
+        decoder = self._decoder
+        region = self._render_region()
+        source = self._render_source(region)
+        
+        def still_wanted():
+            return (self._render_tempo() == tempo and self.pitch == pitch
+                    and self._render_region() == region
+                    and self._decoder is decoder and self.is_playing)
+        
+        def worker():
+            with self._render_lock:
+                if not still_wanted():
+                    return  # Superado por otro cambio mientras esperaba
+                try:
+                    if not self._is_processed(tempo, pitch):
+                        rendered = None
+                    else:
+                        self._wait_decoded()
+                        if (not self.tempo_controller.is_cached(tempo, pitch, source)
+                                and self.on_state_change):
+                            self.on_state_change(f"Processing {tempo}%...")
+                        # Sin prisa (la preview ya suena): siempre a máxima calidad
+                        rendered = self.tempo_controller.change_tempo(
+                            self._render_input(decoder.audio, region), self.samplerate, tempo,
+                            pitch=pitch, source=source, quick=False)
+                        self._build_time_map(rendered, region)  # Aquí y no en el thread de control
+                except Exception as e:
+                    print(f"Error procesando tempo: {e}")
+                    return
+                
+                if still_wanted():
+                    self._set_processed(rendered, tempo, pitch, region)
+                    self._send_source(swap=True)
+                    print(f"✓ Tempo {tempo}% / pitch {pitch:+.2f} st en marcha")
+        
+        threading.Thread(target=worker, name='tempo-render', daemon=True).start()
+
+    def restore_state(self, point_a=None, point_b=None, tempo=100, pitch=0.0,
+                      adjust_unit='seconds'):
+        """
+        Estado guardado de una sesión anterior (tras load_file), sin snap ni
+        render: el render se precalienta en background (ver prewarm)
+        """
+        if self.audio_data is None:
+            return
+        self.tempo_percent = self.get_tempo_target(tempo - self.tempo_percent)
+        self.pitch = max(-self.PITCH_RANGE, min(self.PITCH_RANGE, round(pitch, 2)))
+        valid = lambda t: t is not None and 0 <= t <= self.duration
+        point_a = point_a if valid(point_a) else None
+        point_b = point_b if valid(point_b) else None
+        if point_a is not None and point_b is not None and point_b <= point_a:
+            point_b = None
+        for index, loop in enumerate(self.bookmarks or []):
+            if (loop['a'], loop['b']) == (point_a, point_b):
+                # Era un bookmark: se sigue renderizando solo su región
+                self.bookmark_index = index
+                self._region = self._region_for(point_a, point_b)
+                break
+        self._set_loop(point_a, point_b)
+        # 'beats' solo con rejilla: si el análisis no ha terminado lo aplica él
+        self._restored_unit = adjust_unit
+        if adjust_unit == 'beats' and self.beat_grid is not None:
+            self.adjust_unit = 'beats'
+        loop = "-".join("--" if t is None else f"{t:.2f}s" for t in (point_a, point_b))
+        print(f"✓ Sesión restaurada: tempo {self.tempo_percent}%, pitch {self.pitch:+.2f} st, "
+              f"loop {loop}")
+        self.prewarm()
+
+    def prewarm(self):
+        """
+        Renderiza en background el (tempo, pitch) actual para que el próximo
+        play() lo encuentre en cache (o, si aún no terminó, arranque en preview)
+        """
+        tempo, pitch = self._render_tempo(), self.pitch
+        if not self._is_processed(tempo, pitch):
+            return
+        decoder = self._decoder
+        region = self._render_region()
+        source = self._render_source(region)
+
+        def worker():
+            with self._render_lock:
+                if (self._decoder is not decoder or self.is_playing
+                        or (self._render_tempo(), self.pitch) != (tempo, pitch)):
+                    return  # Ya lo pidió play() o cambió algo
+                try:
+                    self._wait_decoded()
+                    rendered = self.tempo_controller.change_tempo(
+                        self._render_input(decoder.audio, region), self.samplerate, tempo,
+                        pitch=pitch, source=source, quick=False)
+                    self._build_time_map(rendered, region)
+                    print(f"✓ Precalentado: tempo {tempo}% / pitch {pitch:+.2f} st")
+                except Exception as e:
+                    print(f"⚠ Error precalentando tempo: {e}")
+
+        threading.Thread(target=worker, name='prewarm', daemon=True).start()
 
 
     def _apply_tempo_to_section(self):
@@ -381,108 +997,256 @@ class AudioPlayer:
         # Por ahora solo placeholder
         # En el siguiente archivo implementaremos tempo_controller.py
         pass
-    
-    # ========== PLAYBACK WORKER ==========
-    
-    def _playback_worker(self):
-        """Thread de reproducciÃƒÂ³n (loop infinito)"""
-        try:
-            while not self.stop_event.is_set():
-                # Determinar quÃƒÂ© reproducir
-                if self.point_a is not None and self.point_b is not None:
-                    # Modo loop A-B
-                    self._play_section(self.point_a, self.point_b)
-                else:
-                    
-                    
-                    if self.processed_audio is not None:
-                        end_time = len(self.processed_audio) / self.samplerate
-                    else:
-                        end_time = self.duration
-                    self._play_section(0, end_time)
-                
-                # Si no estamos en loop, terminar
-                if self.point_a is None or self.point_b is None:
-                    break
-        
-        except Exception as e:
-            print(f"Error en playback: {e}")
-        
-        finally:
-            with self.sd_lock:
-                sd.stop()
-            self.is_playing = False
 
-    def _play_section(self, start_time, end_time):
-        """Reproduce una sección específica del audio"""
-        
-        # ⭐ Si current_position está entre start_time y end_time, resumir desde ahí
-        if start_time < self.current_position < end_time:
-            actual_start = self.current_position
+    # ========== BOOKMARKS DE LOOP ==========
+
+    def current_bookmark(self):
+        """Bookmark seleccionado si el loop sigue siendo el suyo (o None)"""
+        if self.bookmarks is None or self.bookmark_index is None:
+            return None
+        if self.bookmark_index >= len(self.bookmarks):
+            return None
+        loop = self.bookmarks[self.bookmark_index]
+        return loop if (loop['a'], loop['b']) == self._loop else None
+
+    def save_bookmark(self, name=None):
+        """
+        Guarda el loop A-B actual con el tempo actual (si el loop ya es un
+        bookmark, actualiza su tempo). Retorna el nombre o None
+        """
+        point_a, point_b = self._loop
+        if self.bookmarks is None or point_a is None or point_b is None:
+            print("⚠ No se puede guardar: marca primero los puntos A y B")
+            return None
+
+        loop = self.current_bookmark()
+        if loop is not None:
+            self.bookmarks.update(self.bookmark_index, tempo=self.tempo_percent)
         else:
-            actual_start = start_time
-            self.current_position = start_time
-    
-        # ⭐ ELEGIR QUÉ AUDIO USAR
-        if self.processed_audio is not None:
-            audio_to_play = self.processed_audio
-            
-        
-            # ⭐ CALCULAR RATIO DE ESCALA
-            original_duration = len(self.audio_data) / self.samplerate
-            processed_duration = len(self.processed_audio) / self.samplerate
-            time_scale = processed_duration / original_duration
+            self.bookmark_index = self.bookmarks.add(point_a, point_b, self.tempo_percent, name)
+            loop = self.bookmarks[self.bookmark_index]
+            self._region = self._region_for(point_a, point_b)
+        print(f"✓ Bookmark '{loop['name']}': {point_a:.2f}-{point_b:.2f}s @ {loop['tempo']}%")
+        if self.on_state_change:
+            self.on_state_change(f"Bookmark: {loop['name']}")
+        self._prerender_bookmarks()
+        return loop['name']
+
+    def select_bookmark(self, index):
+        """Salta al loop y tempo del bookmark (inmediato si su render está listo)"""
+        if not self.bookmarks or not 0 <= index < len(self.bookmarks):
+            return None
+        loop = self.bookmarks[index]
+        self.bookmark_index = index
+        self._region = self._region_for(loop['a'], loop['b'])
+        self.tempo_percent = self.get_tempo_target(loop['tempo'] - self.tempo_percent)
+        self._set_loop(loop['a'], loop['b'], retarget=True)
+        if self.is_playing:
+            self.current_position = loop['a']
+            if self.is_paused:
+                self._seek_pending = True
+        print(f"→ Bookmark '{loop['name']}' ({index + 1}/{len(self.bookmarks)}) @ {self.tempo_percent}%")
+        if self.on_state_change:
+            self.on_state_change(f"Bookmark: {loop['name']}")
+        return loop['name']
+
+    def next_bookmark(self):
+        """Siguiente bookmark (en ciclo); retorna su nombre o None si no hay"""
+        if not self.bookmarks:
+            return None
+        index = 0 if self.bookmark_index is None else (self.bookmark_index + 1) % len(self.bookmarks)
+        return self.select_bookmark(index)
+
+    def delete_bookmark(self, index=None):
+        """Borra un bookmark (por defecto el seleccionado)"""
+        index = self.bookmark_index if index is None else index
+        if not self.bookmarks or index is None or not 0 <= index < len(self.bookmarks):
+            return
+        name = self.bookmarks[index]['name']
+        self.bookmarks.remove(index)
+        self.bookmark_index = None
+        print(f"✓ Bookmark '{name}' borrado")
+
+    def _prerender_bookmarks(self):
+        """
+        Renderiza en background la región de cada bookmark a su tempo (y el
+        pitch actual), uno por vez, para que cambiar entre ellos no espere
+        """
+        if not self.bookmarks:
+            return
+        decoder = self._decoder
+        jobs = [(self._region_for(loop['a'], loop['b']), loop['tempo']) for loop in self.bookmarks]
+
+        def worker():
+            decoder.wait()
+            rendered = 0
+            for region, tempo in jobs:
+                # Un render por vez: lo que pida el usuario puede pasar entre medio
+                with self._render_lock:
+                    if self._decoder is not decoder:
+                        return  # Se cargó otro archivo
+                    tempo = 100 if self.varispeed else tempo
+                    pitch = self.pitch
+                    source = self._render_source(region)
+                    if (not self._is_processed(tempo, pitch)
+                            or self.tempo_controller.is_cached(tempo, pitch, source)):
+                        continue
+                    try:
+                        audio = self.tempo_controller.change_tempo(
+                            self._render_input(decoder.audio, region), self.samplerate, tempo,
+                            pitch=pitch, source=source, quick=False)
+                        self._build_time_map(audio, region)
+                        rendered += 1
+                    except Exception as e:
+                        print(f"⚠ Error renderizando bookmark: {e}")
+            if rendered:
+                print(f"✓ Bookmarks listos ({rendered} render(s))")
+
+        threading.Thread(target=worker, name='bookmark-render', daemon=True).start()
+
+    # ========== RAMPA DE TEMPO ==========
+
+    def start_ramp(self, start=70, end=100, step=5, loops_per_step=2):
+        """
+        Practica el loop A-B subiendo (o bajando) el tempo de start a end en
+        pasos de step, loops_per_step vueltas por escalón. Los escalones se
+        renderizan por delante y cada uno entra en la costura del loop
+        """
+        point_a, point_b = self._loop
+        if self.audio_data is None or point_a is None or point_b is None:
+            print("⚠ La rampa necesita un loop A-B")
+            return False
+        self.stop_ramp()
+        start, end = self.get_tempo_target(start - self.tempo_percent), \
+            self.get_tempo_target(end - self.tempo_percent)
+        ramp = TempoRamp(start, end, step, loops_per_step, (point_a, point_b))
         
+        self._region = self._region_for(point_a, point_b)
+        self.ramp = ramp
+        self.tempo_percent = ramp.tempo
+        if self.is_playing:
+            self._switch_render()
         else:
-            audio_to_play = self.audio_data
-            time_scale = 1.0
-    
-        # Convertir tiempos a samples (escalados si es audio procesado)
-   
-        start_sample = int(actual_start * self.samplerate * time_scale)
-        end_sample = int(end_time * self.samplerate * time_scale)
-    
-        # Extraer sección
-        section = audio_to_play[start_sample:end_sample]  # ⭐ Usar audio_to_play    
-        
-        # TODO: Aplicar tempo si es necesario
-        
-        # Reproducir
-        playback_start_time = time.perf_counter()  # Ã¢Â­Â Timestamp de inicio
-        with self.sd_lock:
-            sd.play(section, self.samplerate, device=0)
-        time.sleep(0.01)  # Ã¢Â­Â PequeÃƒÂ±o delay para que el stream se inicialice
-        
-        # Actualizar posiciÃƒÂ³n mientras reproduce
-        while sd.get_stream().active and not self.stop_event.is_set():
-            # Manejar pausa
-            if self.pause_event.is_set():
-                with self.sd_lock:
-                    sd.stop()
-                # Esperar a que se quite la pausa
-                while self.pause_event.is_set() and not self.stop_event.is_set():
-                    time.sleep(0.05)
-                # Reanudar desde donde estÃƒÂ¡bamos
-                if not self.stop_event.is_set():
-                    remaining_start = int(self.current_position * self.samplerate * time_scale)  # ⭐ escalar
-                    remaining_section = audio_to_play[remaining_start:end_sample]  # ⭐ usar audio_to_play
-                    
-                    playback_start_time = time.perf_counter()  # Ã¢Â­Â Reset timestamp
-                    with self.sd_lock:
-                        sd.play(remaining_section, self.samplerate, device=0)
-                    time.sleep(0.01)  # Ã¢Â­Â Delay para inicializaciÃƒÂ³n del stream
-            
-            # Actualizar posiciÃƒÂ³n usando perf_counter en vez de sd.get_stream().time
-            if sd.get_stream().active:
-                elapsed = time.perf_counter() - playback_start_time  # Ã¢Â­Â Calcular elapsed
-                #convertire el tiempo elapsed de tiempo procesado a tiempo original
-                elapsed_original = elapsed / time_scale
-                self.current_position = actual_start + elapsed_original
-            
-            time.sleep(0.05)
+            self.play()
+        self.current_position = point_a  # El primer escalón con la vuelta completa
+        ramp.seam_wraps = self.engine.loop_wraps
         
-        with self.sd_lock:
-            sd.wait()
+        print(f"✓ Rampa: {ramp.tempos[0]}% → {ramp.tempos[-1]}% "
+              f"({len(ramp.tempos)} escalones, {ramp.loops_per_step} vueltas)")
+        if self.on_state_change:
+            self.on_state_change(f"Ramp {ramp.tempo}%")
+        threading.Thread(target=self._run_ramp, args=(ramp, self._decoder),
+                         name='tempo-ramp', daemon=True).start()
+        return True
+
+    def stop_ramp(self):
+        """Cancela la rampa (el tempo se queda en el escalón actual)"""
+        ramp = self.ramp
+        if ramp is None:
+            return
+        self.ramp = None
+        ramp.cancel()
+        self.engine.queue_source(None)
+        print(f"Rampa detenida en {self.tempo_percent}%")
+
+    def _run_ramp(self, ramp, decoder):
+        """Thread de la rampa: renderiza el siguiente escalón y lo deja en cola"""
+        region = self._region
+        decoder.wait()
+        for index in range(1, len(ramp.tempos)):
+            try:
+                step = self._ramp_step(ramp.tempos[index], region, decoder)
+            except Exception as e:
+                print(f"⚠ Error renderizando la rampa: {e}")
+                return
+            # Un escalón en cola a la vez: esperar a que entre el anterior
+            if index > 1 and not ramp.wait_advance():
+                return
+            if self.ramp is not ramp:
+                return
+            audio, time_map, rate, crossings, processed = step
+            self.engine.queue_source(audio, time_map, rate, crossings,
+                                     at_wrap=ramp.seam_wraps + ramp.loops_per_step,
+                                     tag=(ramp, index, audio, processed))
+
+    def _ramp_step(self, tempo, region, decoder):
+        """Fuente de un escalón: (audio, time_map, rate, crossings, (tempo, pitch, región))"""
+        with self._render_lock:
+            render_tempo, pitch = (100 if self.varispeed else tempo), self.pitch
+            if self._is_processed(render_tempo, pitch):
+                audio = self.tempo_controller.change_tempo(
+                    self._render_input(decoder.audio, region), self.samplerate, render_tempo,
+                    pitch=pitch, source=self._render_source(region), quick=False)
+            else:
+                audio = decoder.audio
+            if audio is decoder.audio:
+                processed = (100, 0.0, None)  # El original (o sin backend de stretch)
+            else:
+                processed = (render_tempo, pitch, region)
+            time_map = self._build_time_map(audio, processed[2])
+            
+            entry = self._crossings.get(id(audio))
+            if entry is not None and entry[0] is audio:
+                crossings = entry[1]
+            else:
+                crossings = ZeroCrossingIndex(audio, self.samplerate)
+                self._crossings[id(audio)] = (audio, crossings)
+        return audio, time_map, tempo / processed[0], crossings, processed
+
+    def _on_seam(self, tag):
+        """El engine entró en el siguiente escalón (thread productor)"""
+        ramp, index, audio, processed = tag
+        if self.ramp is not ramp:
+            return
+        self.processed_audio = None if audio is self.audio_data else audio
+        self._processed = processed
+        self.tempo_percent = ramp.tempos[index]
+        ramp.advance(index, self.engine.loop_wraps)
+        if ramp.finished:
+            self.ramp = None
+        print(f"Rampa: {self.tempo_percent}%" + (" (final)" if ramp.finished else ""))
+        if self.on_state_change:
+            self.on_state_change(f"Ramp {self.tempo_percent}%")
+
+    # ========== ESTADO COMPARTIDO ==========
+    
+    @property
+    def current_position(self):
+        """Posición en segundos (la publica el engine según lo que ya sonó)"""
+        return self.engine.position
+    
+    @current_position.setter
+    def current_position(self, seconds):
+        self.engine.seek(seconds)
+    
+    @property
+    def point_a(self):
+        return self._loop[0]
+    
+    @point_a.setter
+    def point_a(self, value):
+        self._set_loop(value, self._loop[1])
+    
+    @property
+    def point_b(self):
+        return self._loop[1]
+    
+    @point_b.setter
+    def point_b(self, value):
+        self._set_loop(self._loop[0], value)
+    
+    def _set_loop(self, point_a, point_b, retarget=False):
+        """retarget: también cambió el tempo (bookmark), revisar el render igualmente"""
+        if self.ramp is not None and (point_a, point_b) != self.ramp.loop:
+            self.stop_ramp()
+        self._loop = (point_a, point_b)
+        region = self._render_region()
+        if self.audio_data is not None and (retarget or self._processed[2] != region):
+            if self.is_playing:
+                self._switch_render()  # Entró o salió de la región de un bookmark
+            elif self._processed[2] not in (None, region):
+                self._set_processed(None)  # play() elige el render
+        self.engine.set_loop(point_a, point_b)
     
     # ========== GETTERS ==========
     
@@ -503,6 +1267,16 @@ class AudioPlayer:
         """Retorna posiciÃƒÂ³n actual en segundos"""
         return self.current_position
     
+    def get_snapshot(self):
+        """Estado coherente para la UI (cada valor compartido se lee una vez)"""
+        point_a, point_b = self._loop
+        return PlayerSnapshot(self.get_state(), self.engine.position, self.duration,
+                              point_a, point_b, self.tempo_percent, self.adjusting_point)
+    
+    def get_stats(self):
+        """Telemetría de reproducción (ver PlaybackStats.get_stats)"""
+        return self.stats.get_stats()
+    
     def save_loop(self, output_dir="audio_files"):
         """
         Guarda la secciÃƒÂ³n A-B como nuevo archivo WAV
@@ -547,17 +1321,22 @@ class AudioPlayer:
             counter += 1
         
         try:
+            self._wait_decoded()
             # Extraer secciÃƒÂ³n A-B
             start_sample = int(self.point_a * self.samplerate)
             end_sample = int(self.point_b * self.samplerate)
             section = self.audio_data[start_sample:end_sample]
             
-            # Aplicar tempo si es diferente de 100%
-            if self.tempo_percent != 100:
-                print(f"Aplicando tempo {self.tempo_percent}% al loop...")
-                from tempo_controller import TempoController
-                tempo_ctrl = TempoController()
-                section = tempo_ctrl.change_tempo(section, self.samplerate, self.tempo_percent)
+            # Aplicar tempo/pitch si no es el original (cacheado por región)
+            if self._is_processed(self._render_tempo(), self.pitch):
+                print(f"Aplicando tempo {self.tempo_percent}% / pitch {self.pitch:+.2f} st al loop...")
+                section = self.tempo_controller.change_tempo(
+                    section, self.samplerate, self._render_tempo(), pitch=self.pitch,
+                    source=self._render_source((start_sample, end_sample)))
+            if self.varispeed and self.tempo_percent != 100:
+                # Lo que se oye: misma lectura a otra velocidad
+                section = Resampler(self.samplerate * self.tempo_percent,
+                                    self.samplerate * 100).resample(section)
             
             # Guardar
             print(f"Guardando: {output_filename}")
@@ -0,0 +1,112 @@
+"""
+Beat Grid - Estimación de BPM y rejilla de pulsos del archivo
+
+A partir del flux espectral de onset_index:
+- BPM: autocorrelación (vía FFT) de la envolvente de onsets, ponderada hacia
+  ~120 BPM para no elegir la mitad/el doble del tempo
+- Fase: el desplazamiento cuya rejilla de pulsos acumula más energía de onset
+
+Se asume tempo constante (grabaciones de práctica, backing tracks). El
+resultado (bpm, offset) se guarda en analysis_cache junto a los onsets.
+"""
+
+import numpy as np
+
+import analysis_cache
+from onset_index import HOP, frame_times, spectral_flux
+
+VERSION = 2  # 2: offset en el centro del frame
+MIN_BPM = 60
+MAX_BPM = 200
+PRIOR_BPM = 120  # Centro de la ponderación (en octavas)
+
+
+def estimate_tempo(flux, samplerate, hop=HOP, min_bpm=MIN_BPM, max_bpm=MAX_BPM):
+    """Retorna (bpm, offset_segundos) o None si no hay pulso claro"""
+    fps = samplerate / hop
+    n = len(flux)
+    max_lag = int(fps * 60 / min_bpm)
+    if n < 2 * max_lag:
+        return None
+
+    # Envolvente: flux sin la tendencia lenta (media móvil de ~1s)
+    width = max(1, int(fps))
+    trend = np.convolve(flux, np.ones(width) / width, mode='same')
+    env = np.maximum(flux - trend, 0.0).astype(np.float64)
+    if not env.any():
+        return None
+    # Suavizado corto: picos más anchos, menos sensibles a lags no enteros
+    env = np.convolve(env, np.hanning(7), mode='same')
+
+    spectrum = np.fft.rfft(env, 2 * n)
+    autocorr = np.fft.irfft(spectrum * np.conj(spectrum))[:n]
+
+    min_lag = max(1, int(fps * 60 / max_bpm))
+    lags = np.arange(min_lag, max_lag + 1)
+    bpms = 60 * fps / lags
+    prior = np.exp(-0.5 * np.log2(bpms / PRIOR_BPM) ** 2)
+    scores = autocorr[lags] / (n - lags) * prior  # Normalizado por solapamiento
+    best = int(np.argmax(scores))
+    lag = float(lags[best])
+
+    # Interpolación parabólica para un periodo por debajo de un frame
+    if 0 < best < len(scores) - 1:
+        left, mid, right = scores[best - 1], scores[best], scores[best + 1]
+        denom = left - 2 * mid + right
+        if denom != 0:
+            lag += 0.5 * (left - right) / denom
+
+    # Fase: sumar la envolvente sobre cada rejilla candidata
+    num_beats = int((n - lag) // lag)
+    phases = np.arange(int(np.ceil(lag)))
+    positions = np.round(phases[:, None] + np.arange(num_beats)[None, :] * lag).astype(np.int64)
+    positions = np.minimum(positions, n - 1)
+    offset_frames = int(phases[np.argmax(env[positions].sum(axis=1))])
+
+    return 60 * fps / lag, float(frame_times(offset_frames, samplerate, hop=hop))
+
+
+class BeatGrid:
+    """
+    Rejilla de pulsos de tempo constante: offset + k * period
+    """
+
+    def __init__(self, bpm, offset):
+        self.bpm = float(bpm)
+        self.offset = float(offset)
+        self.period = 60.0 / self.bpm
+
+    @classmethod
+    def for_file(cls, filepath, audio_data, samplerate, get_flux=None):
+        """
+        Desde la cache de análisis si existe; si no, calcular y guardar
+        Retorna None si no se detecta pulso (también se cachea)
+        """
+        cached = analysis_cache.load(filepath, 'beats', VERSION)
+        if cached is not None:
+            bpm, offset = cached['grid']
+            return cls(bpm, offset) if bpm > 0 else None
+
+        flux = get_flux() if get_flux else spectral_flux(audio_data, samplerate)
+        result = estimate_tempo(flux, samplerate)
+        bpm, offset = result if result else (0.0, 0.0)
+        analysis_cache.save(filepath, 'beats', VERSION, grid=np.array([bpm, offset]))
+        return cls(bpm, offset) if result else None
+
+    def times(self, duration):
+        """Tiempos de todos los pulsos dentro de [0, duration)"""
+        first = int(np.ceil(-self.offset / self.period))
+        last = int(np.floor((duration - self.offset) / self.period))
+        times = self.offset + np.arange(first, last + 1) * self.period
+        return times[(times >= 0) & (times < duration)]
+
+    def beat_index(self, t):
+        """Índice del pulso más cercano a t"""
+        return int(round((t - self.offset) / self.period))
+
+    def beat_time(self, index):
+        return self.offset + index * self.period
+
+    def shift(self, t, beats):
+        """Tiempo del pulso a `beats` pulsos del más cercano a t"""
+        return self.beat_time(self.beat_index(t) + beats)
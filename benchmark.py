@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Benchmark end-to-end del Practice Player
+
+Mide con WAVs sintéticos (varias duraciones, sample rates y canales):
+- AudioPlayer.load_file
+- Cada backend de TempoController a varios tempos
+- Hueco al reiniciar el loop A-B
+- Render de frames de OledDisplay (display en memoria)
+- FileBrowser._scan sobre árboles grandes
+
+El resultado es JSON para poder comparar versiones:
+    ./benchmark.py --output bench.json
+    ./benchmark.py --quick --compare bench.json
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+from audio_output import NullOutput
+
+TEMPO_BACKENDS = ['tempo_controller', 'tempo_controller_soundstretch']
+
+
+# ========== UTILIDADES ==========
+
+def measure(fn, repeat):
+    """Ejecuta fn repeat veces y devuelve estadísticas en ms"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000.0)
+    return summarize(times)
+
+
+def summarize(values_ms):
+    if not values_ms:
+        return {'n': 0}
+    return {
+        'n': len(values_ms),
+        'min_ms': round(min(values_ms), 3),
+        'median_ms': round(statistics.median(values_ms), 3),
+        'mean_ms': round(statistics.mean(values_ms), 3),
+        'max_ms': round(max(values_ms), 3),
+    }
+
+
+def make_wav(directory, duration, samplerate, channels):
+    """WAV sintético: acorde con ataques cada 0.5s (algo parecido a música)"""
+    t = np.arange(int(duration * samplerate)) / samplerate
+    signal = sum(np.sin(2 * np.pi * f * t) for f in (220.0, 277.2, 329.6)) / 3
+    envelope = np.exp(-6 * (t % 0.5))
+    mono = (0.5 * signal * envelope).astype(np.float32)
+    data = mono if channels == 1 else np.stack([mono] * channels, axis=1)
+
+    path = os.path.join(directory, f"synth_{duration}s_{samplerate}_{channels}ch.wav")
+    sf.write(path, data, samplerate, subtype='PCM_16')
+    return path
+
+
+# ========== BENCHMARKS ==========
+
+def bench_load(wavs, repeat):
+    from audio_player import AudioPlayer
+
+    results = []
+    for path, params in wavs:
+        player = AudioPlayer(output=NullOutput(realtime=False))
+        stats = measure(lambda: player.load_file(path), repeat)
+        player.close()
+        results.append({'name': 'load_file', 'params': params, 'stats': stats})
+    return results
+
+
+def bench_tempo(wavs, tempos, repeat):
+    results = []
+    for module_name in TEMPO_BACKENDS:
+        try:
+            module = importlib.import_module(module_name)
+            available = module.TempoController().is_available()
+        except Exception as e:
+            results.append({'name': 'tempo', 'params': {'backend': module_name},
+                            'error': str(e)})
+            continue
+
+        for path, params in wavs:
+            audio, samplerate = sf.read(path, dtype='float32')
+            for tempo in tempos:
+                entry = {'name': 'tempo',
+                         'params': dict(params, backend=module_name, tempo=tempo)}
+                if not available:
+                    entry['error'] = 'backend no disponible'
+                    results.append(entry)
+                    continue
+                try:
+                    # Controller nuevo en cada vuelta: medir render, no cache
+                    entry['stats'] = measure(
+                        lambda: module.TempoController().change_tempo(audio, samplerate, tempo),
+                        repeat)
+                except Exception as e:
+                    entry['error'] = str(e)
+                results.append(entry)
+    return results
+
+
+def bench_loop_seam(path, params, loops, region=0.5):
+    """
+    Hueco al volver de B a A: bloques sin audio (ring vacío) por vuelta
+    Con el engine de streaming el salto ocurre dentro del bloque, así que lo
+    esperado es 0
+    """
+    from audio_player import AudioPlayer
+
+    output = NullOutput(realtime=True)
+    player = AudioPlayer(output=output)
+    player.load_file(path)
+    player.point_a = 1.0
+    player.point_b = 1.0 + region
+    block_ms = output.blocksize / output.samplerate * 1000.0
+
+    engine = player.engine
+    player.play()
+    gaps = []
+    last_wraps, last_starved = engine.loop_wraps, engine.starved_blocks
+    deadline = time.perf_counter() + (loops + 1) * region * 3
+    while len(gaps) < loops and time.perf_counter() < deadline:
+        time.sleep(0.01)
+        if engine.loop_wraps != last_wraps:
+            gaps.append((engine.starved_blocks - last_starved) * block_ms)
+            last_wraps, last_starved = engine.loop_wraps, engine.starved_blocks
+    player.close()
+
+    return [{'name': 'loop_seam', 'params': dict(params, region_s=region),
+             'stats': summarize(gaps)}]
+
+
+def bench_ui(repeat):
+    from oled_display import OledDisplay, FramebufferDevice
+    from waveform_peaks import PeakIndex
+
+    display = OledDisplay(device=FramebufferDevice())
+    samplerate = 44100
+    audio = np.random.default_rng(0).standard_normal(samplerate * 300).astype(np.float32)
+    peaks = PeakIndex(audio, samplerate)
+
+    frames = {
+        'browser': lambda: display.show_browser("solo_django.wav", 3, 15,
+                                                help_text="SELECT=Load HOLD=Exit"),
+        'player': lambda: display.show_player("PLAYING", 8.1, 204.5, 80.0, 165.0, 85),
+        'adjusting': lambda: display.show_adjusting(
+            'A', 150.0, waveform=peaks.columns(150.0, 2.0, display.W), step=0.1),
+    }
+    return [{'name': 'ui_frame', 'params': {'screen': screen}, 'stats': measure(fn, repeat)}
+            for screen, fn in frames.items()]
+
+
+def bench_browser(directory, sizes, repeat):
+    from file_browser import FileBrowser
+
+    results = []
+    for num_files in sizes:
+        root = os.path.join(directory, f"tree_{num_files}")
+        os.makedirs(root)
+        for i in range(num_files // 10):
+            os.makedirs(os.path.join(root, f"dir_{i:05d}"))
+        for i in range(num_files):
+            open(os.path.join(root, f"track_{i:05d}.wav"), 'wb').close()
+
+        browser = FileBrowser(audio_dir=root)
+        results.append({'name': 'browser_scan', 'params': {'files': num_files},
+                        'stats': measure(browser._scan, repeat)})
+    return results
+
+
+# ========== COMPARACIÓN ==========
+
+def _key(entry):
+    return entry['name'] + json.dumps(entry['params'], sort_keys=True)
+
+
+def compare(current, baseline, threshold):
+    """Imprime ratios contra una corrida anterior; retorna nº de regresiones"""
+    old = {_key(e): e for e in baseline['results'] if 'stats' in e}
+    regressions = 0
+    for entry in current['results']:
+        prev = old.get(_key(entry))
+        if 'stats' not in entry or prev is None or not prev['stats'].get('median_ms'):
+            continue
+        ratio = entry['stats']['median_ms'] / prev['stats']['median_ms']
+        flag = ""
+        if ratio > threshold:
+            regressions += 1
+            flag = "  ⚠ REGRESIÓN"
+        print(f"{entry['name']:14} {json.dumps(entry['params'], sort_keys=True):70} "
+              f"x{ratio:5.2f}{flag}")
+    return regressions
+
+
+# ========== MAIN ==========
+
+def run(quick=False):
+    if quick:
+        durations, rates, channels = [10], [44100], [2]
+        tempos, browser_sizes, repeat = [90], [500], 3
+    else:
+        durations, rates, channels = [10, 60, 300], [44100, 48000], [1, 2]
+        tempos, browser_sizes, repeat = [75, 90, 120], [500, 5000], 5
+
+    workdir = tempfile.mkdtemp(prefix="pp_bench_")
+    try:
+        wavs = []
+        for duration in durations:
+            for samplerate in rates:
+                for ch in channels:
+                    params = {'duration_s': duration, 'samplerate': samplerate, 'channels': ch}
+                    wavs.append((make_wav(workdir, duration, samplerate, ch), params))
+
+        short = [w for w in wavs if w[1]['duration_s'] == min(durations)]
+
+        results = []
+        results += bench_load(wavs, repeat)
+        results += bench_tempo(short, tempos, max(1, repeat // 2))
+        results += bench_loop_seam(*short[0], loops=3 if quick else 8)
+        results += bench_ui(repeat * 20)
+        results += bench_browser(workdir, browser_sizes, repeat)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'quick': quick,
+        },
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del Practice Player")
+    parser.add_argument("--quick", action="store_true", help="Conjunto reducido")
+    parser.add_argument("--output", help="Guardar resultados JSON en este fichero")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Ratio de mediana a partir del cual se marca regresión")
+    args = parser.parse_args()
+
+    # Los módulos imprimen su progreso: mandarlo a stderr para no mezclarlo con el JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(quick=args.quick)
+    text = json.dumps(report, indent=2)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+        print(f"✓ Resultados guardados en {args.output}")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Coalescer - Agrupa deltas repetidos para no encolar trabajo redundante
+
+Durante un hold, los botones de tempo/ajuste disparan un delta cada 100-150ms.
+El primer delta se aplica al momento (un tap responde sin espera); los
+siguientes se suman en `pending` y se aplican una sola vez cuando el valor se
+estabiliza (settle_time sin nuevos deltas). La UI muestra valor + pending.
+"""
+
+import time
+
+
+class Coalescer:
+    """
+    Suma deltas mientras llegan rápido y aplica solo el total final
+    """
+
+    def __init__(self, apply, call_later, settle_time=0.4):
+        """
+        apply: callable(total_delta) que hace el trabajo real
+        call_later: callable(delay, fn) del thread de entrada (serializa con los callbacks)
+        settle_time: segundos sin deltas para considerar el valor estable
+                     (mayor que el retardo inicial de repetición del botón)
+        """
+        self.apply = apply
+        self.call_later = call_later
+        self.settle_time = settle_time
+
+        self.pending = 0  # Delta acumulado aún no aplicado
+        self._last_push = None  # None = inactivo
+        self._timer_armed = False
+
+    def push(self, delta):
+        """Registra un delta (llamar desde el thread de entrada)"""
+        now = time.monotonic()
+
+        if self._last_push is None:
+            # Inactivo: aplicar al momento
+            self._last_push = now
+            self.apply(delta)
+        else:
+            self.pending += delta
+            self._last_push = now
+
+        if not self._timer_armed:
+            self._timer_armed = True
+            self.call_later(self.settle_time, self._check_settled)
+
+    def flush(self):
+        """Aplica ya lo pendiente (p.ej. antes de salir del modo ajuste)"""
+        self._last_push = None
+        if self.pending:
+            total, self.pending = self.pending, 0
+            self.apply(total)
+
+    def cancel(self):
+        """Descarta lo pendiente sin aplicarlo"""
+        self._last_push = None
+        self.pending = 0
+
+    def _check_settled(self):
+        if self._last_push is None:
+            self._timer_armed = False
+            return
+
+        remaining = self._last_push + self.settle_time - time.monotonic()
+        if remaining > 0.001:
+            # Siguen llegando deltas: volver a mirar cuando toque
+            self.call_later(remaining, self._check_settled)
+            return
+
+        self._timer_armed = False
+        self.flush()
@@ -122,6 +122,16 @@ if [ ! -z "$PID" ]; then
     echo "" | tee -a $OUTPUT_FILE
 fi
 
+# 11. IN-PROCESS STALL LOG (written by stall_watchdog when a thread stops progressing)
+STALL_LOG="$(dirname "$0")/logs/stalls.log"
+echo "=== 11. IN-PROCESS STALL LOG ===" | tee -a $OUTPUT_FILE
+if [ -f "$STALL_LOG" ]; then
+    tail -200 "$STALL_LOG" 2>&1 | tee -a $OUTPUT_FILE
+else
+    echo "No stall log at $STALL_LOG" | tee -a $OUTPUT_FILE
+fi
+echo "" | tee -a $OUTPUT_FILE
+
 echo "========================================" | tee -a $OUTPUT_FILE
 echo "DIAGNOSTIC COMPLETE" | tee -a $OUTPUT_FILE
 echo "Report saved to: $OUTPUT_FILE" | tee -a $OUTPUT_FILE
@@ -1,5 +1,13 @@
 import os
-import glob
+
+# Formatos que abre streaming_decoder. Aquí y no allí: el browser es lo
+# primero que se dibuja y no debe importar numpy/soundfile (ver main)
+EXTENSIONS = ('.wav', '.flac', '.ogg', '.mp3')
+
+
+def is_supported(filename):
+    return filename.lower().endswith(EXTENSIONS)
+
 
 class FileBrowser:
     def __init__(self, audio_dir="audio_files"):
@@ -31,8 +39,11 @@ class FileBrowser:
         for d in dirs:
             self.items.append(('dir', d))
 
-        # Luego archivos WAV (ordenados por fecha, más reciente primero)
-        wavs = glob.glob(os.path.join(self.current_dir, "*.wav"))
+        # Luego archivos de audio: WAV/FLAC/OGG/MP3 (por fecha, más reciente primero)
+        wavs = [
+            os.path.join(self.current_dir, f) for f in os.listdir(self.current_dir)
+            if is_supported(f) and not f.startswith('.')
+        ]
         wavs = sorted(wavs, key=os.path.getmtime, reverse=True)
         for w in wavs:
             self.items.append(('wav', os.path.basename(w)))
@@ -91,6 +102,22 @@ class FileBrowser:
     def refresh(self):
         self._scan()
 
+    def go_to(self, directory, filename=None):
+        """
+        Abre `directory` (debe estar dentro de audio_dir) y se posiciona en
+        `filename` si está. Retorna False si la carpeta no es válida.
+        """
+        directory = os.path.abspath(directory)
+        if os.path.commonpath([directory, self.audio_dir]) != self.audio_dir:
+            return False
+        if not os.path.isdir(directory):
+            return False
+        self.current_dir = directory
+        self._scan()
+        if filename in [name for kind, name in self.items if kind == 'wav']:
+            self.current_index = self.items.index(('wav', filename))
+        return True
+
     # ---- Getters para la UI ----
 
     def get_current_item_name(self):
@@ -0,0 +1,221 @@
+"""
+GPIO Input - Backends de entrada que convierten los botones en flancos
+
+Cada backend recibe los perfiles de botón y una función post(nombre, flanco,
+timestamp) que encola el flanco en el InputDispatcher.
+
+- GpiodInput: eventos de flanco del kernel (libgpiod v2) con debounce en el
+  kernel. El thread lector bloquea en select() sin polling: CPU cero en reposo
+  y timestamps del kernel (CLOCK_MONOTONIC) para medir la latencia real.
+- GpiozeroInput: fallback con gpiozero + lgpio (polling) si no hay gpiod.
+- ScriptedInput: reproduce un guion de pulsaciones (sin hardware, para
+  benchmarks y soak tests).
+"""
+
+import os
+import glob
+import select
+import threading
+import time
+from datetime import timedelta
+
+try:
+    import gpiod
+    from gpiod.line import Bias, Edge
+    GPIOD_AVAILABLE = True
+except ImportError:
+    GPIOD_AVAILABLE = False
+
+
+class GpiodInput:
+    """
+    Entrada por eventos de flanco del kernel (sin polling)
+    """
+
+    def __init__(self, profiles, post, chip_path=None, consumer="practice_player"):
+        self.post = post
+        self.chip_path = chip_path or self._find_chip()
+
+        # GPIO -> nombre del botón
+        self._names = {p['pin']: name for name, p in profiles.items()}
+
+        config = {}
+        for name, p in profiles.items():
+            config[p['pin']] = gpiod.LineSettings(
+                edge_detection=Edge.BOTH,
+                bias=Bias.PULL_UP,
+                debounce_period=timedelta(milliseconds=p['debounce_ms']),
+            )
+
+        self._request = gpiod.request_lines(self.chip_path, consumer=consumer, config=config)
+
+        # Pipe para despertar al lector al cerrar
+        self._wake_r, self._wake_w = os.pipe()
+        self._running = True
+        self._thread = threading.Thread(target=self._reader, daemon=True)
+        self._thread.start()
+
+        print(f"✓ GPIO por eventos de kernel ({self.chip_path})")
+
+    @staticmethod
+    def _find_chip():
+        """Busca el gpiochip del header de la Raspberry (label 'pinctrl-*')"""
+        for path in sorted(glob.glob("/dev/gpiochip*")):
+            try:
+                with gpiod.Chip(path) as chip:
+                    if chip.get_info().label.startswith("pinctrl-"):
+                        return path
+            except OSError:
+                continue
+        return "/dev/gpiochip0"
+
+    def _reader(self):
+        """Bloquea hasta que el kernel entrega flancos (o hasta close)"""
+        fd = self._request.fd
+        while self._running:
+            ready, _, _ = select.select([fd, self._wake_r], [], [])
+            if self._wake_r in ready or not self._running:
+                break
+
+            for event in self._request.read_edge_events():
+                name = self._names.get(event.line_offset)
+                if name is None:
+                    continue
+                # Pull-up: pulsado = flanco de bajada
+                pressed = event.event_type == gpiod.EdgeEvent.Type.FALLING_EDGE
+                self.post(name, 'press' if pressed else 'release',
+                          event.timestamp_ns / 1e9)
+
+    def close(self):
+        self._running = False
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+        if self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+        self._request.release()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+
+class GpiozeroInput:
+    """
+    Fallback con gpiozero (lgpio hace polling de los pines)
+    """
+
+    def __init__(self, profiles, post):
+        from gpiozero import Button, Device
+        from gpiozero.pins.lgpio import LGPIOFactory
+
+        if not isinstance(Device.pin_factory, LGPIOFactory):
+            Device.pin_factory = LGPIOFactory()
+
+        self.post = post
+        self._buttons = []
+        for name, p in profiles.items():
+            btn = Button(p['pin'], pull_up=True, bounce_time=p['debounce_ms'] / 1000.0)
+            btn.when_pressed = self._make_edge_handler(name, 'press')
+            btn.when_released = self._make_edge_handler(name, 'release')
+            self._buttons.append(btn)
+
+        print("⚠ gpiod no disponible - usando gpiozero (polling)")
+
+    def _make_edge_handler(self, name, edge):
+        """Handler mínimo para el thread de GPIO: solo encola el flanco"""
+        def handler():
+            self.post(name, edge)
+        return handler
+
+    def close(self):
+        try:
+            for btn in self._buttons:
+                btn.close()
+        except:
+            pass
+
+
+class ScriptedInput:
+    """
+    Entrada simulada que reproduce un guion de pulsaciones
+
+    Formato (una acción por línea, tiempos en segundos desde el inicio):
+        0.5  play      tap
+        1.0  tempo_up  hold 2.0
+        4.0  mark_a    press
+        4.2  mark_a    release
+    """
+
+    TAP_DURATION = 0.05
+
+    def __init__(self, profiles, post, script, speed=1.0, on_done=None):
+        """
+        script: texto del guion o lista de (tiempo, botón, flanco)
+        speed: factor de velocidad (2.0 = el doble de rápido)
+        on_done: callable() al terminar el guion
+        """
+        self.post = post
+        self.speed = speed
+        self.on_done = on_done
+
+        if isinstance(script, str):
+            script = self.parse(script)
+        for _, name, _ in script:
+            if name not in profiles:
+                raise ValueError(f"Botón desconocido en guion: {name}")
+        self.events = sorted(script, key=lambda e: e[0])
+
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._player, daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def parse(cls, text):
+        """Convierte el texto del guion en [(tiempo, botón, 'press'|'release')]"""
+        events = []
+        for line_no, line in enumerate(text.splitlines(), 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split()
+            try:
+                t, name, action = float(parts[0]), parts[1], parts[2]
+                if action == 'tap':
+                    events.append((t, name, 'press'))
+                    events.append((t + cls.TAP_DURATION, name, 'release'))
+                elif action == 'hold':
+                    events.append((t, name, 'press'))
+                    events.append((t + float(parts[3]), name, 'release'))
+                elif action in ('press', 'release'):
+                    events.append((t, name, action))
+                else:
+                    raise ValueError(action)
+            except (IndexError, ValueError):
+                raise ValueError(f"Línea {line_no} inválida en guion: {line}")
+        return events
+
+    def _player(self):
+        start = time.monotonic()
+        for t, name, edge in self.events:
+            due = start + t / self.speed
+            if self._stop_event.wait(max(0.0, due - time.monotonic())):
+                return
+            self.post(name, edge, time.monotonic())
+
+        if self.on_done:
+            self.on_done()
+
+    def close(self):
+        self._stop_event.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+
+
+def create_gpio_input(profiles, post):
+    """Elige el backend: eventos de kernel si hay gpiod, si no gpiozero"""
+    if GPIOD_AVAILABLE:
+        try:
+            return GpiodInput(profiles, post)
+        except OSError as e:
+            print(f"⚠ gpiod falló ({e}) - usando gpiozero")
+    return GpiozeroInput(profiles, post)
@@ -0,0 +1,228 @@
+"""
+Input Dispatcher - Cola central de eventos de botones
+
+Los threads de GPIO solo encolan flancos con timestamp (post). Un único thread
+despachador los consume y es dueño de toda la lógica de tiempos (tap/hold y
+repetición progresiva), así los callbacks se ejecutan serializados y un
+callback que falla no mata el thread de entrada.
+"""
+
+import heapq
+import itertools
+import queue
+import threading
+import time
+import traceback
+
+import stall_watchdog
+
+# Modos de botón
+TAP_HOLD = 'tap_hold'      # TAP al soltar (si no hubo hold), HOLD tras hold_time
+                           # (con long_hold: HOLD al soltar y LONG HOLD tras long_hold_time)
+PRESS_HOLD = 'press_hold'  # TAP al pulsar, HOLD adicional tras hold_time
+PRESS = 'press'            # Solo al pulsar
+REPEAT = 'repeat'          # Al pulsar + repetición progresiva mientras se mantiene
+
+# Repetición progresiva: (segundos pulsado, delta, periodo)
+REPEAT_STEPS = [
+    (1.0, 0.1, 0.15),           # 0-1s: ajuste fino, cada 150ms
+    (2.0, 0.5, 0.12),           # 1-2s: ajuste medio, cada 120ms
+    (float('inf'), 1.0, 0.10),  # >2s: ajuste rápido, cada 100ms
+]
+
+
+class InputDispatcher:
+    """
+    Thread único que convierte flancos de botones en eventos tap/hold/repeat
+    """
+
+    def __init__(self, on_event):
+        """
+        on_event: callable(event_name, *args) que ejecuta el callback asignado
+        """
+        self.on_event = on_event
+
+        self._queue = queue.Queue()
+        self._timers = []  # heap de (deadline, seq, fn, args)
+        self._seq = itertools.count()
+
+        self._buttons = {}  # nombre -> perfil
+        self._press_id = {}  # nombre -> id de la pulsación en curso (None si suelto)
+        self._press_time = {}  # nombre -> timestamp de la pulsación
+        self._held = {}  # nombre -> True si ya pasó hold_time
+        self._long_held = {}  # nombre -> True si ya disparó long hold
+
+        # Latencia flanco → despacho (ms)
+        self._latency = {'count': 0, 'last_ms': 0.0, 'max_ms': 0.0, 'total_ms': 0.0}
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='input', daemon=True)
+        self._thread.start()
+
+    # ========== CONFIGURACIÓN ==========
+
+    def add_button(self, name, mode, tap_event=None, hold_event=None, hold_time=1.0,
+                   long_hold_event=None, long_hold_time=3.0):
+        """
+        Registra un botón lógico y qué eventos produce
+        hold_time: tiempo hasta HOLD (en REPEAT, retardo antes de repetir)
+        long_hold_event: solo TAP_HOLD; un tercer gesto tras long_hold_time
+        """
+        self._buttons[name] = {
+            'mode': mode,
+            'tap_event': tap_event,
+            'hold_event': hold_event,
+            'hold_time': hold_time,
+            'long_hold_event': long_hold_event if mode == TAP_HOLD else None,
+            'long_hold_time': long_hold_time,
+        }
+        self._press_id[name] = None
+        self._held[name] = False
+        self._long_held[name] = False
+
+    # ========== API THREAD-SAFE ==========
+
+    def post(self, button, edge, timestamp=None):
+        """
+        Encola un flanco ('press' o 'release') desde cualquier thread
+        timestamp: time.monotonic() del flanco (por defecto, ahora)
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        self._queue.put(('edge', timestamp, button, edge))
+
+    def call_later(self, delay, fn, *args):
+        """Ejecuta fn(*args) en el thread despachador tras delay segundos"""
+        self._queue.put(('call', time.monotonic() + delay, fn, args))
+
+    def get_latency_stats(self):
+        """Latencia desde el flanco (timestamp del backend) hasta su despacho"""
+        stats = dict(self._latency)
+        total_ms = stats.pop('total_ms')
+        stats['avg_ms'] = total_ms / stats['count'] if stats['count'] else 0.0
+        return stats
+
+    def close(self):
+        """Detiene el thread despachador"""
+        self._running = False
+        self._queue.put(('stop', time.monotonic(), None, None))
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+
+    # ========== THREAD DESPACHADOR ==========
+
+    def _run(self):
+        while self._running:
+            timeout = None
+            if self._timers:
+                timeout = max(0.0, self._timers[0][0] - time.monotonic())
+
+            stall_watchdog.idle('input')
+            try:
+                kind, timestamp, a, b = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                kind = None
+            stall_watchdog.beat('input')
+
+            if kind == 'edge':
+                self._record_latency(timestamp)
+                self._safe(self._handle_edge, a, b, timestamp)
+            elif kind == 'call':
+                self._schedule(timestamp, a, *b)
+
+            # Ejecutar timers vencidos
+            now = time.monotonic()
+            while self._timers and self._timers[0][0] <= now:
+                _, _, fn, args = heapq.heappop(self._timers)
+                self._safe(fn, *args)
+
+    def _record_latency(self, timestamp):
+        latency_ms = (time.monotonic() - timestamp) * 1000.0
+        stats = self._latency
+        stats['count'] += 1
+        stats['last_ms'] = latency_ms
+        stats['max_ms'] = max(stats['max_ms'], latency_ms)
+        stats['total_ms'] += latency_ms
+
+    def _schedule(self, deadline, fn, *args):
+        heapq.heappush(self._timers, (deadline, next(self._seq), fn, args))
+
+    def _safe(self, fn, *args):
+        """Ejecuta fn aislando excepciones para no matar el thread de entrada"""
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"⚠ Error en callback de botón: {e}")
+            traceback.print_exc()
+
+    def _fire(self, event, *args):
+        if event:
+            self._safe(self.on_event, event, *args)
+
+    # ========== GESTOS ==========
+
+    def _handle_edge(self, name, edge, timestamp):
+        profile = self._buttons.get(name)
+        if profile is None:
+            return
+
+        if edge == 'press':
+            if self._press_id[name] is not None:
+                return  # Flanco duplicado
+            press_id = next(self._seq)
+            self._press_id[name] = press_id
+            self._press_time[name] = timestamp
+            self._held[name] = False
+            self._long_held[name] = False
+            self._on_press(name, profile, press_id, timestamp)
+
+        elif edge == 'release':
+            if self._press_id[name] is None:
+                return
+            self._press_id[name] = None
+            if profile['mode'] == TAP_HOLD and not self._held[name]:
+                self._fire(profile['tap_event'])
+            elif profile['long_hold_event'] and not self._long_held[name]:
+                self._fire(profile['hold_event'])  # Soltado entre hold y long hold
+
+    def _on_press(self, name, profile, press_id, timestamp):
+        mode = profile['mode']
+
+        if mode in (PRESS, PRESS_HOLD):
+            self._fire(profile['tap_event'])
+
+        if mode in (TAP_HOLD, PRESS_HOLD) and profile['hold_event']:
+            self._schedule(timestamp + profile['hold_time'], self._on_hold_timer, name, press_id)
+        if profile['long_hold_event']:
+            self._schedule(timestamp + profile['long_hold_time'], self._on_long_hold_timer,
+                           name, press_id)
+
+        if mode == REPEAT:
+            # Primera llamada inmediata con el paso fino
+            self._fire(profile['tap_event'], REPEAT_STEPS[0][1])
+            self._schedule(timestamp + profile['hold_time'], self._on_repeat_timer, name, press_id)
+
+    def _on_hold_timer(self, name, press_id):
+        if self._press_id.get(name) != press_id:
+            return  # Se soltó antes del hold
+        self._held[name] = True
+        if not self._buttons[name]['long_hold_event']:
+            self._fire(self._buttons[name]['hold_event'])  # Con long hold: al soltar
+
+    def _on_long_hold_timer(self, name, press_id):
+        if self._press_id.get(name) != press_id:
+            return
+        self._held[name] = self._long_held[name] = True
+        self._fire(self._buttons[name]['long_hold_event'])
+
+    def _on_repeat_timer(self, name, press_id):
+        if self._press_id.get(name) != press_id:
+            return
+        elapsed = time.monotonic() - self._press_time[name]
+
+        for limit, delta, period in REPEAT_STEPS:
+            if elapsed < limit:
+                break
+
+        self._fire(self._buttons[name]['tap_event'], delta)
+        self._schedule(time.monotonic() + period, self._on_repeat_timer, name, press_id)
@@ -75,6 +75,10 @@ check_success "gpiozero instalado"
 pip install lgpio > /dev/null 2>&1
 check_success "lgpio instalado"
 
+# gpiod (eventos de flanco del kernel, sin polling)
+pip install gpiod > /dev/null 2>&1
+check_success "gpiod instalado"
+
 deactivate
 
 echo ""
@@ -0,0 +1,92 @@
+"""
+Loop Bookmarks - Loops A-B con nombre guardados por archivo
+
+Antes la única forma de guardar una región era exportarla como WAV nuevo
+(save_loop). Los bookmarks van en un JSON al lado del audio
+("solo.flac" -> "solo.flac.loops.json"), así que viajan con el archivo y no
+aparecen en el browser. Cada uno guarda A, B (segundos del original) y su
+tempo preferido.
+"""
+
+import json
+import os
+
+from session_store import write_json
+
+SUFFIX = ".loops.json"
+VERSION = 1
+
+
+class LoopBookmarks:
+    """
+    Lista ordenada de bookmarks de un archivo: dicts {name, a, b, tempo}
+    """
+
+    def __init__(self, filepath):
+        self.path = filepath + SUFFIX
+        self.loops = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            print(f"⚠ Bookmarks ilegibles, se ignoran: {e}")
+            return []
+        if not isinstance(data, dict) or data.get('version') != VERSION:
+            return []
+        loops = []
+        for entry in data.get('loops', []):
+            try:
+                a, b = float(entry['a']), float(entry['b'])
+                tempo = int(entry.get('tempo', 100))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if b > a >= 0:
+                loops.append({'name': str(entry.get('name') or f"Loop {len(loops) + 1}"),
+                              'a': a, 'b': b, 'tempo': tempo})
+        return loops
+
+    def save(self):
+        try:
+            write_json(self.path, {'version': VERSION, 'loops': self.loops})
+        except OSError as e:
+            print(f"⚠ No se pudieron guardar los bookmarks: {e}")
+
+    def __len__(self):
+        return len(self.loops)
+
+    def __getitem__(self, index):
+        return self.loops[index]
+
+    def __iter__(self):
+        return iter(self.loops)
+
+    def add(self, a, b, tempo, name=None):
+        """Añade un bookmark y lo guarda; retorna su índice"""
+        if name is None:
+            taken = {loop['name'] for loop in self.loops}
+            number = len(self.loops) + 1
+            while f"Loop {number}" in taken:
+                number += 1
+            name = f"Loop {number}"
+        self.loops.append({'name': name, 'a': a, 'b': b, 'tempo': tempo})
+        self.save()
+        return len(self.loops) - 1
+
+    def update(self, index, **fields):
+        """Cambia name/a/b/tempo de un bookmark y lo guarda"""
+        self.loops[index].update(fields)
+        self.save()
+
+    def remove(self, index):
+        del self.loops[index]
+        if self.loops:
+            self.save()
+        else:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
@@ -7,40 +7,181 @@ Estados:
 - PLAYER: ReproducciÃƒÂ³n con controles
 """
 
-import signal
 import time
+_STARTUP_T0 = time.perf_counter()  # Referencia para los tiempos de arranque
+
+import argparse
+import os
+import signal
+import threading
+from contextlib import contextmanager
 from threading import Event
 from file_browser import FileBrowser
-from audio_player import AudioPlayer
 from buttons_manager import ButtonsManager
 from oled_display import OledDisplay
+from coalescer import Coalescer
+from session_store import SessionStore, SESSION_PATH
+import stall_watchdog
 
 import faulthandler, signal
 faulthandler.register(signal.SIGUSR1)
 
-class PracticePlayer:
+
+class StartupTimer:
+    """Cronometra cada etapa del arranque y la registra en el log"""
+    
     def __init__(self):
+        self.stages = []  # [(nombre, ms)]
+    
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        yield
+        ms = (time.perf_counter() - start) * 1000
+        self.stages.append((name, ms))
+        print(f"[STARTUP] {name}: {ms:.0f}ms (t+{(time.perf_counter() - _STARTUP_T0) * 1000:.0f}ms)")
+
+
+class PracticePlayer:
+    def __init__(self, display=None, input_factory=None, audio_output=None,
+                 audio_dir="audio_files", boot_menu=True, stall_ms=3000, profile_path=None,
+                 pcm_cache=False, varispeed=False, session_path=SESSION_PATH,
+                 click=False, count_in=False, bpm=None):
+        """
+        Los backends son intercambiables para correr sin hardware:
+        display: OledDisplay (por defecto OLED por I2C)
+        input_factory: backend de botones (ver gpio_input; por defecto GPIO)
+        audio_output: salida de audio (ver audio_output; por defecto la tarjeta)
+        boot_menu: volver al boot menu al salir
+        stall_ms: umbral del watchdog de threads colgados (0 = desactivado)
+        profile_path: si se indica, guarda collapsed stacks del profiler de muestreo
+        pcm_cache: guardar en disco el PCM de FLAC/OGG/MP3 ya decodificados
+        varispeed: tempo por velocidad de lectura (sin render, el pitch la sigue)
+        session_path: journal de la sesión para retomarla al arrancar (None = no)
+        click/count_in/bpm: metrónomo (ver AudioPlayer.set_metronome)
+        """
+        # Diagnóstico de congelamientos: watchdog siempre, profiler opcional
+        if stall_ms:
+            stall_watchdog.start(stall_ms=stall_ms)
+        self.profiler = None
+        if profile_path:
+            self.profiler = stall_watchdog.SamplingProfiler(profile_path).start()
+        
         self.exit_event = Event()
         self.state = 'BROWSER'  # Estado inicial
+        self.boot_menu = boot_menu
+        self.startup = StartupTimer()
+        
+        # Arranque por etapas: primero lo necesario para dibujar el browser;
+        # audio (numpy, soundfile, PortAudio) y engine de tempo van en background
+        with self.startup.stage("display"):
+            self.display = display or OledDisplay()
+            self.display.show_message("Practice Player")
+        
+        with self.startup.stage("browser"):
+            self.browser = FileBrowser(audio_dir=audio_dir)
+        
+        # Última sesión (archivo, loop, tempo): se restaura al tener el player
+        self.session = SessionStore(session_path) if session_path else None
+        
+        # El player se crea en background (ver _background_init)
+        self.player = None
+        self.player_ready = Event()
+        self._audio_output = audio_output
+        self._pcm_cache = pcm_cache
+        self._varispeed = varispeed
+        self._metronome = (click, count_in, bpm)
+        
+        with self.startup.stage("input"):
+            if input_factory:
+                self.buttons = ButtonsManager(input_factory=input_factory)
+            else:
+                self.buttons = ButtonsManager()
         
-        # Componentes
-        self.display = OledDisplay()
-        self.browser = FileBrowser(audio_dir="audio_files")
-        self.player = AudioPlayer(on_state_change=self._update_ui)
-        self.buttons = ButtonsManager()
+        # Agrupar deltas durante un hold: solo se aplica el valor final
+        self.adjust_coalescer = Coalescer(self._apply_adjust, self.buttons.call_later)
+        self.tempo_coalescer = Coalescer(self._apply_tempo, self.buttons.call_later)
         
         # Configurar botones segÃƒÂºn estado inicial
         self._set_browser_mode()
         
-        # SeÃƒÂ±ales de sistema
-        signal.signal(signal.SIGINT, self._signal_handler)
-        signal.signal(signal.SIGTERM, self._signal_handler)
+        # SeÃƒÂ±ales de sistema (solo se pueden instalar desde el thread principal)
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self._signal_handler)
+            signal.signal(signal.SIGTERM, self._signal_handler)
         
         # UI refresh thread
         self.ui_refresh_active = True
-        import threading
-        self.ui_thread = threading.Thread(target=self._ui_refresh_loop, daemon=True)
+        self.ui_thread = threading.Thread(target=self._ui_refresh_loop, name='ui', daemon=True)
         self.ui_thread.start()
+        
+        # Resto del arranque sin bloquear la primera pantalla
+        threading.Thread(target=self._background_init, name='startup', daemon=True).start()
+    
+    def _background_init(self):
+        """Imports pesados, apertura del dispositivo de audio y sondeo del engine de tempo"""
+        try:
+            with self.startup.stage("audio imports"):
+                from audio_player import AudioPlayer
+            
+            with self.startup.stage("audio device"):
+                player = AudioPlayer(on_state_change=self._update_ui, output=self._audio_output,
+                                     pcm_cache=self._pcm_cache, varispeed=self._varispeed)
+            
+            with self.startup.stage("tempo engine"):
+                player.tempo_controller.warm_up()
+            
+            click, count_in, bpm = self._metronome
+            if click or count_in:
+                player.set_metronome(click=click, count_in=count_in, bpm=bpm)
+            
+            self.player = player
+            with self.startup.stage("session"):
+                self._restore_session()
+            self.player_ready.set()
+            total_ms = (time.perf_counter() - _STARTUP_T0) * 1000
+            print(f"[STARTUP] listo en {total_ms:.0f}ms")
+        
+        except Exception as e:
+            print(f"✗ Error inicializando audio: {e}")
+            import traceback
+            traceback.print_exc()
+    
+    # ========== SESIÓN ==========
+    
+    def _session_state(self):
+        """Lo que se guarda para retomar la sesión (dict plano, JSON)"""
+        state = {'dir': self.browser.current_dir}
+        player = self.player
+        if player is not None and player.filepath and self.state == 'PLAYER':
+            state.update(file=player.filepath, point_a=player.point_a, point_b=player.point_b,
+                         tempo=player.tempo_percent, pitch=player.pitch,
+                         adjust_unit=player.adjust_unit)
+        return state
+    
+    def _save_session(self):
+        if self.session is not None:
+            self.session.save(self._session_state())
+    
+    def _restore_session(self):
+        """
+        Vuelve a la carpeta y al archivo de la última sesión, con su loop,
+        tempo y pitch; el render se precalienta en background (AudioPlayer.prewarm)
+        """
+        state = self.session.load() if self.session is not None else None
+        if not state or self.state != 'BROWSER':
+            return
+        filepath = state.get('file')
+        filename = os.path.basename(filepath) if filepath else None
+        self.browser.go_to(state.get('dir') or self.browser.audio_dir, filename)
+        if not filepath or not os.path.isfile(filepath):
+            return
+        if not self.player.load_file(filepath):
+            return
+        self.player.restore_state(point_a=state.get('point_a'), point_b=state.get('point_b'),
+                                  tempo=state.get('tempo', 100), pitch=state.get('pitch', 0.0),
+                                  adjust_unit=state.get('adjust_unit', 'seconds'))
+        self._set_player_mode()
     
     # ========== MÃƒÂQUINA DE ESTADOS ==========
     
@@ -70,6 +211,8 @@ class PracticePlayer:
             on_back=self._player_back,
             on_tempo_down=self._player_tempo_down,
             on_tempo_up=self._player_tempo_up,
+            on_bookmark_next=self._player_bookmark_next,
+            on_bookmark_save=self._player_bookmark_save,
             on_save_loop=self._player_save_loop
         )
         self._update_ui("Modo PLAYER")
@@ -100,6 +243,14 @@ class PracticePlayer:
         action, filepath = self.browser.select()
 
         if action == 'wav':
+            # El audio puede seguir inicializándose si se elige archivo muy rápido
+            if not self.player_ready.is_set():
+                self.display.show_processing("Starting...")
+                if not self.player_ready.wait(timeout=15):
+                    print("⚠ Audio no disponible")
+                    self.display.show_message("Error: audio not ready")
+                    return
+            
             if self.player.load_file(filepath):
                 self._set_player_mode()
             else:
@@ -120,8 +271,12 @@ class PracticePlayer:
         """GPIO5: Play/Pause"""
         print("Ã¢â€ â€™ [PLAYER] Play/Pause")
         
-        # Si estamos ajustando, salir del modo ajuste
+        # Play usa el tempo final aunque el hold acabe de soltarse
+        self.tempo_coalescer.flush()
+        
+        # Si estamos ajustando, aplicar lo pendiente y salir del modo ajuste
         if self.player.adjusting_point:
+            self.adjust_coalescer.flush()
             self.player.finish_adjusting()
         else:
             self.player.toggle_play_pause()
@@ -137,6 +292,10 @@ class PracticePlayer:
     def _player_mark_a_tap(self):
         """GPIO26 TAP: Marcar/desmarcar punto A"""
         print("Ã¢â€ â€™ [PLAYER] Toggle punto A")
+        if self.player.adjusting_point:
+            # En ajuste: alternar segundos/beats
+            self._toggle_adjust_unit()
+            return
         self.player.toggle_point_a()
         self._update_ui()
     
@@ -149,6 +308,9 @@ class PracticePlayer:
     def _player_mark_b_tap(self):
         """GPIO6 TAP: Marcar/desmarcar punto B"""
         print("Ã¢â€ â€™ [PLAYER] Toggle punto B")
+        if self.player.adjusting_point:
+            self._toggle_adjust_unit()
+            return
         self.player.toggle_point_b()
         self._update_ui()
     
@@ -158,6 +320,12 @@ class PracticePlayer:
         self.player.start_adjusting_b()
         self._update_ui()
     
+    def _toggle_adjust_unit(self):
+        """Aplica lo pendiente en la unidad actual y cambia segundos <-> beats"""
+        self.adjust_coalescer.flush()
+        self.player.toggle_adjust_unit()
+        self._update_ui()
+    
     def _player_stop(self):
         """GPIO13 TAP: Stop"""
         print("Ã¢â€ â€™ [PLAYER] Stop")
@@ -176,15 +344,11 @@ class PracticePlayer:
         delta: segundos a ajustar (0.1, 0.5, o 1.0 segÃƒÂºn tiempo pulsado)
         """
         if self.player.adjusting_point:
-            # En modo ajuste: mover -delta segundos
-            print(f"â†’ [PLAYER] Ajustar -{delta}s")
-            self.player.adjust_fine(-delta)
+            # En modo ajuste: mover -delta segundos o pulsos (el zoom sigue al paso)
+            self.adjust_coalescer.push(-self.player.adjust_amount(delta))
         else:
             # Normal: tempo -1%
-            print("Ã¢â€ â€™ [PLAYER] Tempo -1%")
-            self.player.change_tempo(-1)
-        
-        self._update_ui()
+            self.tempo_coalescer.push(-1)
     
     def _player_tempo_up(self, delta=0.1):
         """
@@ -192,41 +356,62 @@ class PracticePlayer:
         delta: segundos a ajustar (0.1, 0.5, o 1.0 segÃºn tiempo pulsado)
         """
         if self.player.adjusting_point:
-            # En modo ajuste: mover +delta segundos
-            print(f"â†’ [PLAYER] Ajustar +{delta}s")
-            self.player.adjust_fine(+delta)
+            # En modo ajuste: mover +delta segundos o pulsos (el zoom sigue al paso)
+            self.adjust_coalescer.push(+self.player.adjust_amount(delta))
         else:
             # Normal: tempo +1%
-            print("Ã¢â€ â€™ [PLAYER] Tempo +1%")
-            self.player.change_tempo(+1)
-        
+            self.tempo_coalescer.push(+1)
+    
+    def _apply_adjust(self, total):
+        """Aplica el ajuste acumulado (una vez por tap o al soltar el hold)"""
+        if self.player.adjust_unit == 'beats':
+            print(f"→ [PLAYER] Ajustar {total:+d} beats")
+        else:
+            print(f"→ [PLAYER] Ajustar {total:+.1f}s")
+        self.player.adjust_fine(total)
+        self._update_ui()
+    
+    def _apply_tempo(self, total):
+        """Aplica el cambio de tempo acumulado"""
+        print(f"→ [PLAYER] Tempo {total:+d}%")
+        self.player.change_tempo(total)
+        self._update_ui()
+    
+    def _player_bookmark_next(self):
+        """GPIO25 TAP: Siguiente loop guardado (bookmark) con su tempo"""
+        print("→ [PLAYER] Siguiente bookmark")
+        # El tempo pendiente de un hold no debe pisar el del bookmark
+        self.tempo_coalescer.flush()
+        if self.player.next_bookmark() is None:
+            print("⚠ No hay bookmarks en este archivo")
+        self._update_ui()
+    
+    def _player_bookmark_save(self):
+        """GPIO25 HOLD (soltar antes de 3s): Guardar el loop A-B y el tempo como bookmark"""
+        print("→ [PLAYER] Guardar bookmark")
+        self.tempo_coalescer.flush()
+        if self.player.save_bookmark() is None:
+            self.display.show_message("Error: Check A-B points")
+            time.sleep(2)
         self._update_ui()
     
     def _player_save_loop(self):
-        """GPIO4: Guardar sección A-B como nuevo archivo"""
+        """GPIO25 HOLD LARGO: Exportar la sección A-B como WAV nuevo"""
         print("✓ [PLAYER] Guardar loop")
-        
-        # Mostrar mensaje de procesamiento
         self.display.show_processing("Saving loop...")
         
-        # Guardar el loop
         filename = self.player.save_loop(output_dir="audio_files")
         
         if filename:
-            # Éxito - mostrar mensaje
             self.display.show_message(f"Saved: {filename}")
             time.sleep(2)
-            
             # Refrescar browser para que aparezca el nuevo archivo
             self.browser.refresh()
-            
             print(f"✓ Loop guardado como: {filename}")
         else:
-            # Error
             self.display.show_message("Error: Check A-B points")
             time.sleep(2)
         
-        # Volver a mostrar player UI
         self._update_ui()
     
     # ========== UI ==========
@@ -245,13 +430,20 @@ class PracticePlayer:
     
     def _ui_refresh_loop(self):
         """Thread que actualiza el UI periÃƒÂ³dicamente"""
+        frame = 0
         while self.ui_refresh_active and not self.exit_event.is_set():
+            stall_watchdog.beat('ui')
             try:
                 if self.state == 'BROWSER':
                     self._render_browser_ui()
                 elif self.state == 'PLAYER':
                     self._render_player_ui()
                 
+                # Journal de sesión: ~1 vez por segundo, solo escribe si cambió
+                frame += 1
+                if frame % 10 == 0 and self.player_ready.is_set():
+                    self._save_session()
+                
                 time.sleep(0.1)  # 10 FPS es suficiente
                 
             except Exception as e:
@@ -271,18 +463,16 @@ class PracticePlayer:
         """Renderiza UI del player"""
         # Si estamos ajustando un punto, mostrar pantalla especial
         if self.player.adjusting_point:
-            if self.player.adjusting_point == 'A':
-                point_value = self.player.point_a
-            elif self.player.adjusting_point == 'B':
-                point_value = self.player.point_b
-            else:  # POSITION
-                point_value = self.player.current_position
+            # Mostrar el valor objetivo, incluyendo los deltas aún no aplicados
+            point_value = self.player.get_adjust_value(self.adjust_coalescer.pending)
             
-            self.display.show_adjusting(self.player.adjusting_point, point_value)
+            waveform = self.player.get_adjust_waveform(point_value, num_cols=self.display.W)
+            self.display.show_adjusting(self.player.adjusting_point, point_value,
+                                        waveform=waveform, step=self.player.adjust_step,
+                                        step_label=self.player.get_adjust_step_label())
         else:
-            # Pantalla normal de player
-            state = self.player.get_state()
-            current_time = self.player.get_current_time()
+            # Pantalla normal de player (una sola lectura del estado compartido)
+            snap = self.player.get_snapshot()
             
             #Esta opcion estala el tiempo total con el tempo modifier
             #if self.player.processed_audio is not None:
@@ -290,17 +480,18 @@ class PracticePlayer:
             #else:
             #    total_time = self.player.get_duration()
             
-            total_time = self.player.get_duration()
-            
-            help_text = "PLAY A B STOP(3s)=Back"
+            bookmark = self.player.current_bookmark()
+            help_text = f"[{bookmark['name']}]" if bookmark else "PLAY A B STOP(3s)=Back"
+            tempo = self.player.get_tempo_target(self.tempo_coalescer.pending)
             
             self.display.show_player(
-                state=state,
-                current_time=current_time,
-                total_time=total_time,
-                point_a=self.player.point_a,
-                point_b=self.player.point_b,
-                tempo=self.player.tempo_percent,
+                state=snap.state,
+                current_time=snap.position,
+                total_time=snap.duration,
+                point_a=snap.point_a,
+                point_b=snap.point_b,
+                tempo=tempo,
+                bpm=self.player.get_effective_bpm(tempo),
                 help_text=help_text
             )
     
@@ -334,16 +525,94 @@ class PracticePlayer:
         print("Limpiando recursos...")
         
         self.ui_refresh_active = False
-        self.player.stop()
+        if self.player_ready.is_set():
+            self._save_session()
+        if self.player:
+            print(self.player.stats.log_line())
+            self.player.close()
+        stall_watchdog.stop()
+        if self.profiler:
+            self.profiler.stop()
         self.display.clear()
         self.buttons.close()
         
         print("Ã‚Â¡AdiÃƒÂ³s!")
         
         # Volver al boot menu
-        import subprocess
-        subprocess.Popen(["/usr/bin/python3", "/home/Javo/Proyects/boot_menu/boot_menu.py"])
+        if self.boot_menu:
+            import subprocess
+            subprocess.Popen(["/usr/bin/python3", "/home/Javo/Proyects/boot_menu/boot_menu.py"])
+
+
+def create_headless(script=None, audio="null", audio_dir="audio_files", speed=1.0, **kwargs):
+    """
+    Crea la app completa sin hardware: display en memoria, botones desde un
+    guion y salida de audio nula/fichero. Al terminar el guion la app sale.
+    
+    audio: 'null' (tiempo real), 'null-fast', 'file:PATH' o 'file-rt:PATH'
+    kwargs: resto de opciones de PracticePlayer (stall_ms, profile_path...)
+    """
+    from oled_display import FramebufferDevice
+    from gpio_input import ScriptedInput
+    from audio_output import create_audio_output
+    
+    app = None
+    
+    def on_script_done():
+        if app is not None:
+            app.exit_event.set()
+    
+    def input_factory(profiles, post):
+        return ScriptedInput(profiles, post, script or [], speed=speed,
+                             on_done=on_script_done)
+    
+    app = PracticePlayer(
+        display=OledDisplay(device=FramebufferDevice()),
+        input_factory=input_factory,
+        audio_output=create_audio_output(audio),
+        audio_dir=audio_dir,
+        boot_menu=False,
+        **kwargs,
+    )
+    return app
+
 
 if __name__ == "__main__":
-    player = PracticePlayer()
+    parser = argparse.ArgumentParser(description="Practice Player")
+    parser.add_argument("--headless", action="store_true",
+                        help="Sin hardware: display en memoria y botones desde --script")
+    parser.add_argument("--script", help="Guion de pulsaciones (ver gpio_input.ScriptedInput)")
+    parser.add_argument("--audio", default=None,
+                        help="Salida de audio: device, null, null-fast, file:PATH, file-rt:PATH")
+    parser.add_argument("--audio-dir", default="audio_files")
+    parser.add_argument("--speed", type=float, default=1.0, help="Velocidad del guion")
+    parser.add_argument("--stall-ms", type=int, default=3000,
+                        help="Umbral del watchdog de threads colgados (0 = off)")
+    parser.add_argument("--profile", help="Guardar collapsed stacks del profiler en este fichero")
+    parser.add_argument("--pcm-cache", action="store_true",
+                        help="Guardar el PCM de FLAC/OGG/MP3 decodificados en cache/pcm")
+    parser.add_argument("--varispeed", action="store_true",
+                        help="Tempo sin time-stretch: cambia la velocidad y el pitch (sin espera)")
+    parser.add_argument("--no-session", action="store_true",
+                        help="No retomar ni guardar la sesión anterior (cache/session.json)")
+    parser.add_argument("--click", action="store_true",
+                        help="Click de metrónomo sobre la música (sigue al tempo)")
+    parser.add_argument("--count-in", action="store_true",
+                        help="Un compás de cuenta antes de cada vuelta del loop")
+    parser.add_argument("--bpm", type=float, default=None,
+                        help="BPM del original para el metrónomo (por defecto el detectado)")
+    args = parser.parse_args()
+    
+    options = dict(stall_ms=args.stall_ms, profile_path=args.profile,
+                   pcm_cache=args.pcm_cache, varispeed=args.varispeed,
+                   session_path=None if args.no_session else SESSION_PATH,
+                   click=args.click, count_in=args.count_in, bpm=args.bpm)
+    if args.headless:
+        script = open(args.script).read() if args.script else None
+        player = create_headless(script=script, audio=args.audio or "null",
+                                 audio_dir=args.audio_dir, speed=args.speed, **options)
+    else:
+        from audio_output import create_audio_output
+        player = PracticePlayer(audio_output=create_audio_output(args.audio),
+                                audio_dir=args.audio_dir, **options)
     player.run()
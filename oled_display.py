@@ -1,16 +1,49 @@
-from luma.core.interface.serial import i2c
-from luma.oled.device import ssd1306
 from PIL import Image, ImageDraw, ImageFont
 import threading
 import time
 
+class FramebufferDevice:
+    """
+    Device en memoria con la misma interfaz que luma (size + display)
+    Para correr la app sin OLED: guarda el último frame y cuenta frames
+    """
+    
+    def __init__(self, width=128, height=64):
+        self.size = (width, height)
+        self.frame = Image.new("1", self.size)
+        self.frame_count = 0
+    
+    def display(self, img):
+        self.frame = img.copy()
+        self.frame_count += 1
+    
+    def save(self, path):
+        """Guarda el último frame como PNG"""
+        self.frame.save(path)
+
+
 class OledDisplay:
     """Display OLED para Practice Player con protección timeout I2C"""
     
-    def __init__(self, port=1, address=0x3C, width=128, height=64):
-        # Inicializar I2C y device
-        self.serial = i2c(port=port, address=address)
-        self.device = ssd1306(self.serial, width=width, height=height)
+    def __init__(self, port=1, address=0x3C, width=128, height=64, device=None):
+        """
+        device: device ya creado (p.ej. FramebufferDevice); si es None se
+        abre el SSD1306 por I2C
+        """
+        if device is None:
+            # Import diferido: luma solo hace falta con el OLED real
+            from luma.core.interface.serial import i2c
+            from luma.oled.device import ssd1306
+            
+            # Inicializar I2C y device
+            self.serial = i2c(port=port, address=address)
+            device = ssd1306(self.serial, width=width, height=height)
+            self.use_timeout = True
+        else:
+            # Devices en memoria no se bloquean: sin thread de timeout
+            self.use_timeout = False
+        
+        self.device = device
         self.W, self.H = self.device.size
         
         # Flag para detectar errores I2C
@@ -39,6 +72,10 @@ class OledDisplay:
         if self.i2c_disabled:
             return False
         
+        if not self.use_timeout:
+            self.device.display(img)
+            return True
+        
         result = {'success': False, 'error': None}
         
         def display_worker():
@@ -111,11 +148,12 @@ class OledDisplay:
         self._safe_display(img)
     
     def show_player(self, state, current_time, total_time, point_a=None, point_b=None, 
-                    tempo=100, help_text="PLAY A B STOP"):
+                    tempo=100, help_text="PLAY A B STOP", bpm=None):
         """
         Muestra el modo PLAYER
+        bpm: BPM efectivo al tempo actual (si se conoce, al lado del estado)
         ┌────────────────────────┐
-        │ ▶ PLAYING   100%       │
+        │ ▶ PLAYING ♩96   100%   │
         │ 00:08.1 / 03:24.5      │
         │ A:01:20  B:02:45       │
         │ PLAY A B STOP          │
@@ -124,9 +162,16 @@ class OledDisplay:
         img = Image.new("1", (self.W, self.H))
         d = ImageDraw.Draw(img)
         
-        # Línea 1: Estado y tempo
+        # Línea 1: Estado (con el BPM al lado si se conoce) y tempo
         state_icon = "▶" if state == "PLAYING" else "⏸" if state == "PAUSED" else "⏹"
-        d.text((0, 0), f"{state_icon} {state}", font=self.font_big, fill=255)
+        label = f"{state_icon} {state}"
+        if bpm:
+            # Estado en fuente media para que el BPM quepa antes del tempo
+            d.text((0, 2), label, font=self.font_med, fill=255)
+            x = d.textlength(label, font=self.font_med) + 4
+            d.text((x, 4), f"♩{bpm:.0f}", font=self.font_small, fill=255)
+        else:
+            d.text((0, 0), label, font=self.font_big, fill=255)
         d.text((100, 0), f"{tempo}%", font=self.font_med, fill=255)
         
         # Línea 2: Tiempo
@@ -145,36 +190,73 @@ class OledDisplay:
         
         self._safe_display(img)
     
-    def show_adjusting(self, point_name, value):
+    def show_adjusting(self, point_name, value, waveform=None, step=0.1, step_label=None):
         """
         Muestra pantalla de ajuste fino
         ┌────────────────────────┐
-        │   ADJUSTING POINT A    │
-        │                        │
-        │    00:08.147           │
-        │                        │
-        │  ◀ -0.1s    +0.1s ▶    │
+        │ ADJUSTING POINT A      │
+        │ ▁▃▇█▅▂▁│▂▆█▇▃▁▁▂▅▇▅▂▁  │
+        │ 00:08.147       ±0.1s  │
+        │ ◀ -       +  ▶         │
         └────────────────────────┘
+        waveform: (mins, maxs) normalizados a [-1, 1], una entrada por columna
+        step_label: texto del paso (p.ej. "±1 beat"); por defecto ±{step}s
         """
         img = Image.new("1", (self.W, self.H))
         d = ImageDraw.Draw(img)
         
-        # Título centrado
+        # Título
         if point_name == 'POSITION':
             title = "ADJUSTING POSITION"
         else:
             title = f"ADJUSTING POINT {point_name}"
-        d.text((10, 5), title, font=self.font_small, fill=255)
         
-        # Valor grande centrado
+        if waveform is None:
+            # Sin índice de picos todavía: layout clásico
+            d.text((10, 5), title, font=self.font_small, fill=255)
+            time_str = self._format_time(value, show_ms=True)
+            d.text((25, 25), time_str, font=self.font_big, fill=255)
+            label = step_label.lstrip('±') if step_label else f"{step}s"
+            d.text((5, 50), f"◀ -{label}    +{label} ▶", font=self.font_small, fill=255)
+            self._safe_display(img)
+            return
+        
+        d.text((0, 0), title, font=self.font_small, fill=255)
+        
+        # Forma de onda (banda de 26px centrada en y=25)
+        self._draw_waveform(d, waveform, top=12, height=26)
+        
+        # Cursor en el centro (invertido para que se vea sobre la onda)
+        mid_x = self.W // 2
+        for y in range(12, 38):
+            d.point((mid_x, y), fill=0 if img.getpixel((mid_x, y)) else 255)
+        
+        # Valor y paso actual
         time_str = self._format_time(value, show_ms=True)
-        d.text((25, 25), time_str, font=self.font_big, fill=255)
+        d.text((0, 39), time_str, font=self.font_med, fill=255)
+        label = step_label or f"±{step}s"
+        d.text((self.W - int(d.textlength(label, font=self.font_small)), 40), label,
+               font=self.font_small, fill=255)
         
         # Indicadores de control
-        d.text((5, 50), "◀ -0.1s    +0.1s ▶", font=self.font_small, fill=255)
+        d.text((5, 53), "◀ -          + ▶", font=self.font_small, fill=255)
         
         self._safe_display(img)
     
+    def _draw_waveform(self, d, waveform, top, height):
+        """Dibuja columnas min/max; las columnas NaN (fuera del archivo) quedan vacías"""
+        mins, maxs = waveform
+        half = (height - 1) / 2
+        center_y = top + half
+        
+        for x in range(min(self.W, len(mins))):
+            lo, hi = mins[x], maxs[x]
+            if lo != lo or hi != hi:  # NaN
+                continue
+            y_top = int(round(center_y - hi * half))
+            y_bot = int(round(center_y - lo * half))
+            d.line((x, y_top, x, y_bot), fill=255)
+    
     def show_processing(self, message="Processing..."):
         """Muestra mensaje de procesamiento (para time-stretch)"""
         img = Image.new("1", (self.W, self.H))
@@ -0,0 +1,120 @@
+"""
+Onset Index - Transitorios del audio para ajustar A/B con un solo toque
+
+Detección por spectral flux: STFT de la mezcla mono, compresión logarítmica
+de la magnitud y suma de los incrementos positivos entre frames. Los picos
+del flux que superan una media móvil son onsets. Todo vectorizado con NumPy,
+por bloques de frames para acotar la memoria en archivos largos.
+
+El resultado (tiempos ordenados) se guarda en analysis_cache y la búsqueda
+del onset más cercano es una búsqueda binaria.
+"""
+
+import numpy as np
+
+import analysis_cache
+
+VERSION = 2  # 2: tiempos en el centro del frame
+FRAME_SIZE = 1024
+HOP = 512
+CHUNK_FRAMES = 1024   # Frames de STFT por bloque (memoria acotada)
+PEAK_RADIUS = 3       # Frames a cada lado para máximo local (~35ms)
+MEAN_RADIUS = 16      # Frames a cada lado para el umbral adaptativo
+THRESHOLD = 0.05      # Sobre la media local (flux normalizado)
+
+
+def spectral_flux(audio_data, samplerate, frame_size=FRAME_SIZE, hop=HOP):
+    """Flux espectral por frame (un valor cada hop samples)"""
+    mono = audio_data if audio_data.ndim == 1 else audio_data.mean(axis=1)
+    mono = np.ascontiguousarray(mono, dtype=np.float32)
+    if len(mono) < frame_size:
+        return np.zeros(0, dtype=np.float32)
+
+    num_frames = 1 + (len(mono) - frame_size) // hop
+    window = np.hanning(frame_size).astype(np.float32)
+    flux = np.empty(num_frames, dtype=np.float32)
+    stride = mono.strides[0]
+    prev = None
+
+    for start in range(0, num_frames, CHUNK_FRAMES):
+        stop = min(num_frames, start + CHUNK_FRAMES)
+        frames = np.lib.stride_tricks.as_strided(
+            mono[start * hop:], shape=(stop - start, frame_size),
+            strides=(hop * stride, stride), writeable=False)
+        mag = np.log1p(100.0 * np.abs(np.fft.rfft(frames * window, axis=1)))
+        diff = np.diff(mag, axis=0, prepend=mag[:1] if prev is None else prev)
+        flux[start:stop] = np.maximum(diff, 0.0).sum(axis=1)
+        prev = mag[-1:]
+
+    return flux
+
+
+def frame_times(indices, samplerate, hop=HOP, frame_size=FRAME_SIZE):
+    """Tiempo (s) de cada frame del flux: el centro de su ventana, no el inicio"""
+    return (np.asarray(indices) * hop + frame_size / 2) / samplerate
+
+
+def pick_peaks(flux, peak_radius=PEAK_RADIUS, mean_radius=MEAN_RADIUS, threshold=THRESHOLD):
+    """Índices de los máximos locales del flux sobre la media móvil"""
+    if len(flux) == 0 or flux.max() <= 0:
+        return np.zeros(0, dtype=np.int64)
+    flux = flux / flux.max()
+
+    padded = np.pad(flux, peak_radius, mode='edge')
+    local_max = np.lib.stride_tricks.sliding_window_view(padded, 2 * peak_radius + 1).max(axis=1)
+
+    cumsum = np.concatenate(([0.0], np.cumsum(flux, dtype=np.float64)))
+    idx = np.arange(len(flux))
+    lo = np.maximum(idx - mean_radius, 0)
+    hi = np.minimum(idx + mean_radius + 1, len(flux))
+    local_mean = (cumsum[hi] - cumsum[lo]) / (hi - lo)
+
+    return np.flatnonzero((flux >= local_max) & (flux > local_mean + threshold))
+
+
+class OnsetIndex:
+    """
+    Tiempos de onset ordenados con búsqueda del más cercano
+    """
+
+    def __init__(self, times):
+        self.times = np.asarray(times, dtype=np.float64)
+
+    @classmethod
+    def build(cls, audio_data, samplerate, flux=None):
+        if flux is None:
+            flux = spectral_flux(audio_data, samplerate)
+        return cls(frame_times(pick_peaks(flux), samplerate))
+
+    @classmethod
+    def for_file(cls, filepath, audio_data, samplerate, get_flux=None):
+        """
+        Desde la cache de análisis si existe; si no, calcular y guardar
+        get_flux: callable() que da el flux ya calculado (compartido con beat_grid)
+        """
+        cached = analysis_cache.load(filepath, 'onsets', VERSION)
+        if cached is not None:
+            return cls(cached['times'])
+        index = cls.build(audio_data, samplerate, flux=get_flux() if get_flux else None)
+        analysis_cache.save(filepath, 'onsets', VERSION, times=index.times)
+        return index
+
+    def __len__(self):
+        return len(self.times)
+
+    def nearest(self, t, window, exclude=None):
+        """
+        Onset más cercano a t dentro de ±window, o None
+        exclude: tiempo a ignorar (el valor actual, para no quedarse pegado)
+        """
+        times = self.times
+        i = int(np.searchsorted(times, t))
+        best = None
+        for j in range(i - 2, i + 2):
+            if 0 <= j < len(times):
+                candidate = times[j]
+                if exclude is not None and abs(candidate - exclude) < 1e-3:
+                    continue
+                if abs(candidate - t) <= window and (best is None or abs(candidate - t) < abs(best - t)):
+                    best = candidate
+        return None if best is None else float(best)
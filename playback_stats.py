@@ -0,0 +1,166 @@
+"""
+Playback Stats - Telemetría del engine de reproducción
+
+- Underflows/overflows reportados por PortAudio en el callback
+- Histogramas de duración del callback y jitter entre callbacks
+- Time-to-first-audio tras play, seek y cambio de tempo
+
+Los métodos on_* se llaman desde el callback de audio: solo actualizan
+contadores y buckets preasignados (sin locks ni listas que crezcan).
+"""
+
+import bisect
+import threading
+import time
+
+# Bordes de los buckets en ms (el último bucket es "más que el último borde")
+DEFAULT_EDGES_MS = [0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000]
+
+
+class Histogram:
+    """
+    Histograma de buckets fijos en ms
+    """
+
+    def __init__(self, edges_ms=DEFAULT_EDGES_MS):
+        self.edges = list(edges_ms)
+        self.counts = [0] * (len(self.edges) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, value_ms):
+        self.counts[bisect.bisect_left(self.edges, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.last = value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def percentile(self, p):
+        """Percentil aproximado (borde superior del bucket, acotado por el máximo)"""
+        if not self.count:
+            return 0.0
+        target = p / 100.0 * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return min(self.edges[i], self.max) if i < len(self.edges) else self.max
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count, 3) if self.count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p99_ms': self.percentile(99),
+            'max_ms': round(self.max, 3),
+            'last_ms': round(self.last, 3),
+            'buckets': dict(zip([f"<={e}" for e in self.edges] + [f">{self.edges[-1]}"],
+                                self.counts)),
+        }
+
+
+class PlaybackStats:
+    """
+    Contadores y tiempos del playback, consultables desde cualquier thread
+    """
+
+    REQUEST_KINDS = ('play', 'seek', 'tempo')
+
+    def __init__(self):
+        self.underflows = 0
+        self.overflows = 0
+        self.callbacks = 0
+
+        self.callback_duration = Histogram()
+        self.callback_jitter = Histogram()
+        self.ttfa = {kind: Histogram() for kind in self.REQUEST_KINDS}
+
+        self._last_callback = None
+        self._pending_request = None  # (tipo, timestamp) hasta que suene el primer bloque
+
+        self._log_thread = None
+        self._log_stop = threading.Event()
+
+    # ========== DESDE EL CONTROL ==========
+
+    def mark_request(self, kind):
+        """Una acción del usuario que debe producir audio: empieza el cronómetro"""
+        self._pending_request = (kind, time.perf_counter())
+
+    def reset_callback_clock(self):
+        """Llamar al (re)abrir un stream: el hueco previo no cuenta como jitter"""
+        self._last_callback = None
+
+    # ========== DESDE EL CALLBACK DE AUDIO ==========
+
+    def on_callback(self, start, end, frames, samplerate, underflow=False, overflow=False):
+        """
+        start/end: perf_counter al entrar y salir del callback
+        """
+        self.callbacks += 1
+        if underflow:
+            self.underflows += 1
+        if overflow:
+            self.overflows += 1
+
+        self.callback_duration.add((end - start) * 1000.0)
+
+        if self._last_callback is not None:
+            expected = frames / samplerate
+            interval = start - self._last_callback
+            self.callback_jitter.add(abs(interval - expected) * 1000.0)
+        self._last_callback = start
+
+    def on_first_audio(self):
+        """El primer bloque con audio tras una petición ha salido hacia la tarjeta"""
+        pending = self._pending_request
+        if pending is None:
+            return
+        self._pending_request = None
+        kind, requested_at = pending
+        self.ttfa[kind].add((time.perf_counter() - requested_at) * 1000.0)
+
+    # ========== CONSULTA ==========
+
+    def get_stats(self):
+        """Snapshot de toda la telemetría como dict"""
+        return {
+            'callbacks': self.callbacks,
+            'underflows': self.underflows,
+            'overflows': self.overflows,
+            'callback_duration': self.callback_duration.summary(),
+            'callback_jitter': self.callback_jitter.summary(),
+            'ttfa': {kind: h.summary() for kind, h in self.ttfa.items()},
+        }
+
+    def log_line(self):
+        """Resumen de una línea para el log periódico"""
+        ttfa = " ".join(f"{kind}={h.last:.0f}ms" for kind, h in self.ttfa.items() if h.count)
+        return (f"[AUDIO] cb={self.callbacks} xrun={self.underflows} "
+                f"cb_p99={self.callback_duration.percentile(99)}ms "
+                f"jitter_p99={self.callback_jitter.percentile(99)}ms "
+                f"ttfa: {ttfa or '-'}")
+
+    def start_logging(self, interval=30.0):
+        """Imprime log_line() cada interval segundos si hubo actividad"""
+        if self._log_thread is not None:
+            return
+
+        def worker():
+            last_callbacks = -1
+            last_ttfa = -1
+            while not self._log_stop.wait(interval):
+                ttfa_count = sum(h.count for h in self.ttfa.values())
+                if self.callbacks != last_callbacks or ttfa_count != last_ttfa:
+                    print(self.log_line())
+                    last_callbacks, last_ttfa = self.callbacks, ttfa_count
+
+        self._log_thread = threading.Thread(target=worker, daemon=True)
+        self._log_thread.start()
+
+    def stop_logging(self):
+        self._log_stop.set()
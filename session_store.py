@@ -0,0 +1,60 @@
+"""
+Session Store - Estado de la sesión para retomar donde se dejó
+
+Un JSON pequeño (archivo, carpeta del browser, loop A-B, tempo, pitch y
+unidad de ajuste) que se reescribe cuando algo cambia: tmp + fsync +
+os.replace, así que un corte de luz deja la versión anterior o la nueva,
+nunca un archivo a medias. Si aun así no se puede leer, se arranca en limpio.
+"""
+
+import json
+import os
+
+SESSION_PATH = "cache/session.json"
+VERSION = 1
+
+
+def write_json(path, data):
+    """Escribe `data` como JSON de forma atómica (tmp + fsync + os.replace)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class SessionStore:
+    """
+    Lectura/escritura atómica del estado de la sesión (dict plano)
+    """
+
+    def __init__(self, path=SESSION_PATH):
+        self.path = path
+        self._last = None  # Último estado escrito (no reescribir si no cambia)
+
+    def load(self):
+        """Retorna el dict guardado o None"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠ Sesión ilegible, se ignora: {e}")
+            return None
+        if not isinstance(data, dict) or data.get('version') != VERSION:
+            return None
+        self._last = data.get('state')
+        return self._last
+
+    def save(self, state):
+        """Escribe el estado si cambió desde la última vez"""
+        if state == self._last:
+            return
+        try:
+            write_json(self.path, {'version': VERSION, 'state': state})
+            self._last = state
+        except OSError as e:
+            print(f"⚠ No se pudo guardar la sesión: {e}")
@@ -0,0 +1,176 @@
+"""
+Stall Watchdog - Detecta threads colgados y captura sus stacks en el momento
+
+Los threads principales (UI, playback, input) llaman beat(nombre) en cada
+vuelta de su loop e idle(nombre) antes de bloquear esperando trabajo. Si un
+thread ocupado no late en stall_ms, se escriben los stacks de todos los threads
+vigilados en un log rotativo, una vez por episodio.
+
+Opcionalmente, SamplingProfiler muestrea los stacks a intervalos fijos y
+escribe "collapsed stacks" (formato de flamegraph.pl / speedscope).
+
+beat()/idle() son funciones de módulo: sin watchdog activo no hacen nada.
+"""
+
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+import time
+import traceback
+
+_active = None  # Watchdog en marcha (o None)
+
+
+def beat(name):
+    """El thread `name` avanzó (llamar en cada vuelta de su loop)"""
+    w = _active
+    if w is not None:
+        w.beat(name)
+
+
+def idle(name):
+    """El thread `name` va a bloquear esperando trabajo: no vigilar"""
+    w = _active
+    if w is not None:
+        w.idle(name)
+
+
+def start(stall_ms=3000, log_path="logs/stalls.log"):
+    """Crea y arranca el watchdog global"""
+    global _active
+    if _active is None:
+        _active = Watchdog(stall_ms=stall_ms, log_path=log_path)
+    return _active
+
+
+def stop():
+    global _active
+    w, _active = _active, None
+    if w is not None:
+        w.close()
+
+
+def _format_stack(frame):
+    return "".join(traceback.format_stack(frame))
+
+
+class Watchdog:
+    """
+    Vigila el progreso de threads registrados por nombre
+    """
+
+    def __init__(self, stall_ms=3000, log_path="logs/stalls.log",
+                 max_bytes=256 * 1024, backups=3):
+        self.stall_s = stall_ms / 1000.0
+        self._threads = {}  # nombre -> [ident, último beat, ocupado, ya reportado]
+        self.stall_count = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+        self.log = logging.getLogger("practice_player.stalls")
+        self.log.propagate = False
+        if not self.log.handlers:
+            handler = logging.handlers.RotatingFileHandler(
+                log_path, maxBytes=max_bytes, backupCount=backups)
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self.log.addHandler(handler)
+            self.log.setLevel(logging.INFO)
+        self.log_path = log_path
+
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._monitor, daemon=True)
+        self._thread.start()
+
+    def beat(self, name):
+        entry = self._threads.get(name)
+        now = time.monotonic()
+        if entry is None:
+            self._threads[name] = [threading.get_ident(), now, True, False]
+            return
+        entry[0] = threading.get_ident()
+        entry[1] = now
+        entry[2] = True
+        if entry[3]:
+            entry[3] = False
+            self.log.info(f"[{name}] recuperado")
+
+    def idle(self, name):
+        entry = self._threads.get(name)
+        if entry is not None:
+            entry[2] = False
+
+    def _monitor(self):
+        interval = max(0.05, self.stall_s / 4)
+        while not self._stop_event.wait(interval):
+            now = time.monotonic()
+            for name, entry in list(self._threads.items()):
+                ident, last, busy, reported = entry
+                if busy and not reported and now - last > self.stall_s:
+                    entry[3] = True
+                    self.stall_count += 1
+                    self._report(name, now - last)
+
+    def _report(self, name, stalled_for):
+        """Escribe los stacks de todos los threads vigilados"""
+        frames = sys._current_frames()
+        lines = [f"⚠ STALL [{name}] sin progreso hace {stalled_for * 1000:.0f}ms"]
+        # Copia: otros threads registran nombres (beat) mientras tanto
+        for other, (ident, last, busy, _) in list(self._threads.items()):
+            frame = frames.get(ident)
+            state = "ocupado" if busy else "idle"
+            lines.append(f"--- {other} ({state}, último beat hace "
+                         f"{(time.monotonic() - last) * 1000:.0f}ms) ---")
+            lines.append(_format_stack(frame) if frame else "(thread terminado)\n")
+        self.log.info("\n".join(lines))
+        print(f"⚠ STALL [{name}] {stalled_for * 1000:.0f}ms - stacks en {self.log_path}")
+
+    def close(self):
+        self._stop_event.set()
+
+
+class SamplingProfiler:
+    """
+    Profiler por muestreo: cada `interval` segundos toma los stacks de todos
+    los threads y acumula cuántas veces aparece cada stack
+    """
+
+    def __init__(self, output_path="logs/profile.folded", interval=0.01):
+        self.output_path = output_path
+        self.interval = interval
+        self.samples = {}  # stack colapsado -> cuenta
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._sampler, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        print(f"✓ Profiler de muestreo activo ({self.interval * 1000:.0f}ms) → {self.output_path}")
+        return self
+
+    def _sampler(self):
+        own = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                key = ";".join(reversed(stack))
+                self.samples[key] = self.samples.get(key, 0) + 1
+
+    def stop(self):
+        """Detiene el muestreo y escribe el fichero de collapsed stacks"""
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.output_path)), exist_ok=True)
+        with open(self.output_path, "w") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+        print(f"✓ Perfil guardado: {self.output_path} ({sum(self.samples.values())} muestras)")
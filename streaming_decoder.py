@@ -0,0 +1,200 @@
+"""
+Streaming Decoder - Decodificación incremental de WAV/FLAC/OGG/MP3
+
+Un FLAC o MP3 largo tarda segundos en decodificarse entero; con sf.read()
+la carga bloqueaba hasta el final. Aquí se decodifica de forma síncrona solo
+el primer tramo (lo justo para empezar a sonar) y el resto lo rellena un
+thread en un array preasignado. El engine lee hasta `available()` frames,
+así que la reproducción arranca enseguida y va por detrás del decoder.
+
+Lo que necesita el archivo completo (análisis, renders de tempo, guardar
+loop) espera a `wait()` o se lanza desde on_done.
+
+Si la salida tiene otro sample rate nativo, cada tramo decodificado pasa
+por el Resampler antes de publicarse: `audio` ya está al rate de la salida
+y el callback no convierte nada.
+
+Opcional: el PCM decodificado de los formatos comprimidos (o convertido de
+rate) se guarda en analysis_cache (.npy) y al reabrir el archivo se mapea
+en memoria sin decodificar nada.
+"""
+
+import threading
+
+import numpy as np
+import soundfile as sf
+
+import analysis_cache
+from resampler import Resampler
+
+FIRST_CHUNK_SECONDS = 1.5  # Decodificado en la carga, antes de poder dar play
+BLOCK_FRAMES = 65536       # Frames por lectura en el thread
+PCM_CACHE_DIR = "cache/pcm"
+PCM_VERSION = 1
+
+
+class ForwardSoundFile(sf.SoundFile):
+    """
+    SoundFile leído solo hacia delante (la posición la lleva el decoder)
+
+    Si el archivo es seekable, soundfile hace seek(tell) tras cada read, y en
+    MP3 libsndfile no vuelve al sample exacto: huecos en cada bloque. Como
+    stream no seekable, read() solo lee en secuencia.
+    """
+
+    def seekable(self):
+        return False
+
+
+class StreamingDecoder:
+    """
+    Audio de un archivo que se llena en background
+
+    audio: array float32 (frames,) o (frames, canales), de tamaño final
+    decoded: frames de audio ya válidos desde el inicio (solo crece)
+    """
+
+    def __init__(self, filepath, pcm_cache=False, on_done=None, samplerate=None):
+        """
+        pcm_cache: guardar/reusar el PCM decodificado (comprimidos o convertidos)
+        on_done: callback(decoder) al terminar (thread del decoder)
+        samplerate: rate de salida deseado (None = el del archivo)
+        """
+        self.filepath = filepath
+        self.on_done = on_done
+        self._done = threading.Event()
+        self._file = None
+
+        self._info = sf.info(filepath)
+        self.file_samplerate = self._info.samplerate
+        self.samplerate = samplerate or self.file_samplerate
+        self.format = self._info.format
+        self._resampler = None
+        if self.samplerate != self.file_samplerate:
+            self._resampler = Resampler(self.file_samplerate, self.samplerate)
+        self._pcm_cache = pcm_cache and (self.format != 'WAV' or self._resampler is not None)
+        self._cache_kind = f"pcm{self.samplerate}"
+
+        cached = None
+        if self._pcm_cache:
+            cached = analysis_cache.load_array(filepath, self._cache_kind, PCM_VERSION,
+                                               PCM_CACHE_DIR)
+        if cached is not None:
+            self.audio = cached
+            self.decoded = len(cached)
+            self.from_cache = True
+            return
+
+        self.from_cache = False
+        self._file = ForwardSoundFile(filepath)
+        channels = self._file.channels
+        # En MP3 los frames son una estimación: se corrige al terminar
+        frames = max(0, self._file.frames)
+        shape = (frames,) if channels == 1 else (frames, channels)
+        self._input = np.zeros(shape, dtype=np.float32)  # Al rate del archivo
+        self._read = 0  # Frames del archivo ya leídos
+        self.decoded = 0
+        if self._resampler is None:
+            self.audio = self._input
+        else:
+            out_frames = self._resampler.output_length(frames)
+            self.audio = np.zeros((out_frames,) + shape[1:], dtype=np.float32)
+
+        first = int(self.file_samplerate * FIRST_CHUNK_SECONDS)
+        self._read_block(first)
+
+    def start(self):
+        """Lanza el resto de la decodificación (on_done puede llamarse ya aquí)"""
+        if self._file is None:
+            self._finish()
+            return
+        threading.Thread(target=self._run, name='decoder', daemon=True).start()
+
+    def available(self):
+        """Frames decodificados (lo llama el productor del engine)"""
+        return self.decoded
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Bloquea hasta tener el archivo completo; True si terminó"""
+        return self._done.wait(timeout)
+
+    # ========== THREAD DEL DECODER ==========
+
+    def _read_block(self, frames):
+        """Decodifica hasta `frames` frames más; retorna cuántos leyó"""
+        start = self._read
+        stop = min(len(self._input), start + frames)
+        if stop <= start:
+            return 0
+        n = len(self._file.read(stop - start, dtype='float32', out=self._input[start:stop]))
+        self._read = start + n
+        self._publish(final=False)
+        return n
+
+    def _publish(self, final):
+        """Avanza `decoded` (convirtiendo de rate lo que ya se pueda)"""
+        if self._resampler is None:
+            self.decoded = self._read
+            return
+        ready = len(self.audio) if final else min(len(self.audio), self._resampler.ready(self._read))
+        if ready > self.decoded:
+            self._resampler.process(self._input, self.decoded, ready, self.audio)
+            self.decoded = ready  # Publicar después de escribir
+
+    def _run(self):
+        try:
+            while self._read_block(BLOCK_FRAMES):
+                pass
+            if self._read_tail():
+                self._publish(final=True)
+            self._file.close()
+            rate = f", {self.file_samplerate}->{self.samplerate}Hz" if self._resampler else ""
+            print(f"✓ Decodificado: {self.decoded / self.samplerate:.1f}s ({self.format}{rate})")
+            if self._pcm_cache:
+                analysis_cache.save_array(self.filepath, self._cache_kind, PCM_VERSION,
+                                          self.audio, PCM_CACHE_DIR)
+        except Exception as e:
+            print(f"✗ Error decodificando {self.filepath}: {e}")
+            self.audio = self.audio[:self.decoded]
+        self._input = None  # Con conversión de rate, el original ya no hace falta
+        self._finish()
+
+    def _read_tail(self):
+        """
+        Ajusta los arrays si la estimación de frames (MP3) no era exacta
+        Retorna False si hubo que reconstruir `audio` (ya completo)
+        """
+        if self._read == len(self._input):
+            rest = []
+            while True:
+                block = self._file.read(BLOCK_FRAMES, dtype='float32',
+                                        always_2d=self._input.ndim > 1)
+                if not len(block):
+                    break
+                rest.append(block)
+            if not rest:
+                return True
+            self._input = np.concatenate([self._input] + rest)
+        else:
+            self._input = self._input[:self._read].copy()
+
+        self._read = len(self._input)
+        if self._resampler is None:
+            self.audio = self._input
+        else:
+            self.audio = self._resampler.resample(self._input)
+        self.decoded = len(self.audio)
+        return False
+
+    def _finish(self):
+        try:
+            if self.on_done:
+                self.on_done(self)
+        except Exception as e:
+            print(f"Error al terminar la decodificación: {e}")
+        finally:
+            self._done.set()
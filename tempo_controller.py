@@ -1,28 +1,52 @@
 """
 Tempo Controller - Time-stretching con pyrubberband (versión asíncrona)
+
+Tempo y transposición (pitch, en semitonos con fracción para los cents) van
+en la misma pasada de Rubber Band (--tempo y --pitch; al 100% solo
+pitch_shift), cacheadas por (fuente, tempo, pitch): la fuente identifica
+archivo y región.
 """
 
-import numpy as np
+import importlib.util
 
-try:
-    import pyrubberband as pyrb
-    RUBBERBAND_AVAILABLE = True
-except ImportError:
-    RUBBERBAND_AVAILABLE = False
+# Solo comprobar que existe: el import real (pesado) se hace al primer uso
+# o en warm_up() desde el arranque en background
+RUBBERBAND_AVAILABLE = importlib.util.find_spec("pyrubberband") is not None
+if not RUBBERBAND_AVAILABLE:
     print("⚠ pyrubberband no disponible - tempo change deshabilitado")
 
+pyrb = None
+
+
+def _load_rubberband():
+    """Importa pyrubberband una sola vez"""
+    global pyrb
+    if pyrb is None:
+        import pyrubberband
+        pyrb = pyrubberband
+    return pyrb
+
 class TempoController:
     """
     Controlador de tempo con cache y procesamiento asíncrono
     """
     
     def __init__(self):
-        self.cache = {}  # {tempo_percent: processed_audio}
+        self.cache = {}  # {(source, tempo_percent, pitch): processed_audio}
         self.cache_limit = 10  # Máximo de versiones en cache
+    
+    def warm_up(self):
+        """Carga el engine de antemano (llamar en background durante el arranque)"""
+        if RUBBERBAND_AVAILABLE:
+            _load_rubberband()
         
-    def change_tempo(self, audio_data, samplerate, tempo_percent, on_progress=None):
+    def is_cached(self, tempo_percent, pitch=0.0, source=None):
+        return (source, tempo_percent, pitch) in self.cache
+    
+    def change_tempo(self, audio_data, samplerate, tempo_percent, on_progress=None,
+                     pitch=0.0, source=None, quick=None):
         """
-        Cambia el tempo del audio sin alterar el pitch
+        Cambia el tempo del audio sin alterar el pitch (o transpone a la vez)
         
         IMPORTANTE: Este proceso NO es en tiempo real - puede tardar varios segundos
         
@@ -31,6 +55,9 @@ class TempoController:
             samplerate: sample rate del audio
             tempo_percent: porcentaje de tempo (100 = normal, 50 = mitad, 200 = doble)
             on_progress: callback opcional(message) para reportar progreso
+            pitch: transposición en semitonos (0.5 = +50 cents)
+            source: identifica el audio en la cache, p.ej. (archivo, región)
+            quick: sin efecto (compatibilidad con el controller de soundstretch)
         
         Returns:
             numpy array con audio procesado
@@ -41,18 +68,19 @@ class TempoController:
             print("⚠ Rubber Band no disponible, retornando audio original")
             return audio_data
         
-        # Si es 100%, no hacer nada
-        if tempo_percent == 100:
+        # Si es 100% sin transponer, no hacer nada
+        if tempo_percent == 100 and not pitch:
             if on_progress:
                 on_progress("Tempo 100% (sin cambios)")
             return audio_data
         
         # Revisar cache
-        if tempo_percent in self.cache:
+        key = (source, tempo_percent, pitch)
+        if key in self.cache:
             if on_progress:
                 on_progress(f"✓ Usando cache ({tempo_percent}%)")
-            print(f"✓ Usando audio cacheado ({tempo_percent}%)")
-            return self.cache[tempo_percent]
+            print(f"✓ Usando audio cacheado ({tempo_percent}%, {pitch:+.2f} st)")
+            return self.cache[key]
         
         # Calcular time_stretch_ratio
         # ratio < 1 = más lento (más tiempo)
@@ -67,21 +95,29 @@ class TempoController:
         if on_progress:
             on_progress(f"Procesando\n{estimated_time}-{estimated_time+3}seg")
         
-        print(f"Procesando tempo: {tempo_percent}% (ratio={time_ratio:.2f})...")
+        print(f"Procesando tempo: {tempo_percent}% (ratio={time_ratio:.2f}, pitch={pitch:+.2f} st)...")
         print(f"⚠ Esto puede tardar {estimated_time}-{estimated_time+3} segundos...")
         
         try:
             # pyrubberband.time_stretch(audio, samplerate, rate)
             # rate > 1 = más lento
             # rate < 1 = más rápido
-            processed = pyrb.time_stretch(audio_data, samplerate, time_ratio)
+            # Con --pitch el mismo proceso también transpone (una sola pasada)
+            rb = _load_rubberband()
+            if time_ratio == 1.0:
+                # time_stretch con rate 1.0 devuelve la entrada sin llamar a
+                # rubberband (y el --pitch se perdería): solo transponer
+                processed = rb.pitch_shift(audio_data, samplerate, pitch)
+            else:
+                rbargs = {'--pitch': pitch} if pitch else None
+                processed = rb.time_stretch(audio_data, samplerate, time_ratio, rbargs=rbargs)
             
             # Guardar en cache (FIFO si está lleno)
             if len(self.cache) >= self.cache_limit:
                 oldest_key = list(self.cache.keys())[0]
                 del self.cache[oldest_key]
             
-            self.cache[tempo_percent] = processed
+            self.cache[key] = processed
             
             duration_in = len(audio_data) / samplerate
             duration_out = len(processed) / samplerate
@@ -106,7 +142,7 @@ class TempoController:
     def get_cache_info(self):
         """Retorna información del cache"""
         return {
-            'cached_tempos': list(self.cache.keys()),
+            'cached_tempos': [tempo for _, tempo, _ in self.cache],
             'count': len(self.cache),
             'limit': self.cache_limit
         }
@@ -1,16 +1,17 @@
 """
 Tempo Controller - Time-stretching con SoundStretch (SoundTouch Library)
 
-Este módulo maneja el cambio de tempo sin alterar el pitch.
+Este módulo maneja el cambio de tempo sin alterar el pitch, y la
+transposición (-pitch) en la misma pasada cuando se pide.
 Usa soundstretch (SoundTouch) que es más eficiente que pyrubberband.
 
 IMPORTANTE: No es tiempo real - requiere procesamiento previo.
 """
 
 import subprocess
+import shutil
 import tempfile
 import os
-import numpy as np
 import soundfile as sf
 
 class TempoController:
@@ -19,12 +20,24 @@ class TempoController:
     """
     
     def __init__(self):
-        self.cache = {}  # {tempo_percent: processed_audio_data}
+        self.cache = {}  # {(source, tempo_percent, pitch): processed_audio_data}
         self.cache_limit = 10  # Máximo de versiones en cache
-        self.soundstretch_available = self._check_soundstretch()
+        self._soundstretch_available = None  # Se comprueba al primer uso
+    
+    @property
+    def soundstretch_available(self):
+        if self._soundstretch_available is None:
+            self._soundstretch_available = self._check_soundstretch()
+        return self._soundstretch_available
+    
+    def warm_up(self):
+        """Comprueba soundstretch de antemano (llamar en background durante el arranque)"""
+        return self.soundstretch_available
         
     def _check_soundstretch(self):
         """Verifica si soundstretch está instalado"""
+        if shutil.which('soundstretch') is None:
+            return False
         try:
             result = subprocess.run(
                 ['soundstretch', '--help'], 
@@ -35,15 +48,22 @@ class TempoController:
         except (FileNotFoundError, subprocess.TimeoutExpired):
             return False
     
-    def change_tempo(self, audio_data, samplerate, tempo_percent, on_progress=None):
+    def is_cached(self, tempo_percent, pitch=0.0, source=None):
+        return (source, tempo_percent, pitch) in self.cache
+    
+    def change_tempo(self, audio_data, samplerate, tempo_percent, on_progress=None,
+                     pitch=0.0, source=None, quick=None):
         """
-        Cambia el tempo del audio sin alterar el pitch
+        Cambia el tempo del audio sin alterar el pitch (o transpone a la vez)
         
         Args:
             audio_data: numpy array del audio
             samplerate: sample rate del audio
             tempo_percent: porcentaje de tempo (100 = normal, 50 = mitad, 200 = doble)
             on_progress: callback opcional(message) para reportar progreso
+            pitch: transposición en semitonos (0.5 = +50 cents)
+            source: identifica el audio en la cache, p.ej. (archivo, región)
+            quick: -quick de soundstretch (None = solo en tempos extremos)
         
         Returns:
             numpy array con audio procesado
@@ -55,18 +75,19 @@ class TempoController:
             print("Instalar con: sudo apt-get install soundstretch")
             return audio_data
         
-        # Si es 100%, no hacer nada
-        if tempo_percent == 100:
+        # Si es 100% sin transponer, no hacer nada
+        if tempo_percent == 100 and not pitch:
             if on_progress:
                 on_progress("Tempo 100% (sin cambios)")
             return audio_data
         
         # Revisar cache
-        if tempo_percent in self.cache:
+        key = (source, tempo_percent, pitch)
+        if key in self.cache:
             if on_progress:
                 on_progress(f"✓ Usando cache ({tempo_percent}%)")
-            print(f"✓ Usando audio cacheado ({tempo_percent}%)")
-            return self.cache[tempo_percent]
+            print(f"✓ Usando audio cacheado ({tempo_percent}%, {pitch:+.2f} st)")
+            return self.cache[key]
         
         # Calcular cambio de tempo para soundstretch
         # soundstretch usa: -tempo=X donde X es el cambio porcentual
@@ -77,12 +98,9 @@ class TempoController:
         if on_progress:
             on_progress(f"Processing {tempo_percent}%...")
         
-        print(f"Procesando tempo: {tempo_percent}% (cambio={tempo_change:+d}%)...")
-
-        if on_progress:
-            on_progress(f"Processing {tempo_percent}%...")
-        return processed
-                
+        print(f"Procesando tempo: {tempo_percent}% (cambio={tempo_change:+d}%, "
+              f"pitch={pitch:+.2f} st)...")
+        
         # Crear archivos temporales
         with tempfile.TemporaryDirectory() as tmpdir:
             input_wav = os.path.join(tmpdir, "input.wav")
@@ -101,9 +119,15 @@ class TempoController:
                     output_wav,
                     f'-tempo={tempo_change}'
                 ]
+                # -pitch=X : transposición en semitonos (admite decimales)
+                if pitch:
+                    cmd.append(f'-pitch={pitch:.2f}')
                 
-                # Para tempos extremos, usar procesamiento rápido
-                if abs(tempo_change) > 20:
+                # Para tempos extremos, usar procesamiento rápido (salvo que se
+                # pida calidad: render de fondo con la preview ya sonando)
+                if quick is None:
+                    quick = abs(tempo_change) > 20
+                if quick:
                     cmd.append('-quick')
                 
                 if on_progress:
@@ -131,7 +155,7 @@ class TempoController:
                     oldest_key = list(self.cache.keys())[0]
                     del self.cache[oldest_key]
                 
-                self.cache[tempo_percent] = processed
+                self.cache[key] = processed
                 
                 duration_in = len(audio_data) / samplerate
                 duration_out = len(processed) / samplerate
@@ -161,7 +185,7 @@ class TempoController:
     def get_cache_info(self):
         """Retorna información del cache"""
         return {
-            'cached_tempos': list(self.cache.keys()),
+            'cached_tempos': [tempo for _, tempo, _ in self.cache],
             'count': len(self.cache),
             'limit': self.cache_limit
         }
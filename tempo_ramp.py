@@ -0,0 +1,58 @@
+"""
+Tempo Ramp - Escalera de tempos para practicar un loop subiendo la velocidad
+
+El método de siempre: el loop a 70%, luego 75%, 80%... hasta 100%, unas
+vueltas por escalón. TempoRamp solo describe la escalera y en qué escalón
+va; AudioPlayer renderiza los escalones por delante en background y el
+engine cambia de render exactamente en la costura del loop
+(PlaybackEngine.queue_source), sin hueco ni pantalla de "Processing".
+"""
+
+import threading
+
+
+class TempoRamp:
+    """
+    Escalones de tempo de start a end (incluido) de step en step
+    """
+
+    def __init__(self, start, end, step, loops_per_step, loop):
+        """
+        loops_per_step: vueltas del loop en cada escalón
+        loop: (A, B) en segundos; si el loop cambia, la rampa se cancela
+        """
+        step = abs(int(step))
+        if step == 0:
+            raise ValueError("El paso de la rampa no puede ser 0")
+        direction = 1 if end >= start else -1
+        self.tempos = list(range(start, end, direction * step)) + [end]
+        self.loops_per_step = max(1, int(loops_per_step))
+        self.loop = loop
+        self.index = 0
+        self.seam_wraps = 0  # loop_wraps del engine al entrar el escalón actual
+        self.cancelled = False
+        self._advanced = threading.Event()
+
+    @property
+    def tempo(self):
+        return self.tempos[self.index]
+
+    @property
+    def finished(self):
+        return self.index == len(self.tempos) - 1
+
+    def advance(self, index, wraps):
+        """El engine entró en el escalón `index` con loop_wraps == wraps"""
+        self.index = index
+        self.seam_wraps = wraps
+        self._advanced.set()
+
+    def wait_advance(self):
+        """Espera al siguiente cambio de escalón; False si se canceló"""
+        self._advanced.wait()
+        self._advanced.clear()
+        return not self.cancelled
+
+    def cancel(self):
+        self.cancelled = True
+        self._advanced.set()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Tests del PlaybackEngine: el test hace de callback y pide los bloques a mano
+
+La fuente es una rampa (frame i vale i / 2**16, exacto en float32), así que
+cada frame entregado dice de qué frame de la fuente viene.
+
+    python -m pytest -q test_audio_engine.py
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from audio_engine import (ACCENT_HZ, CLICK_HZ, FADE_FRAMES, XFADE_FRAMES, FrameRing,
+                          PlaybackEngine, make_click)
+from time_map import TimeMap
+
+SR = 44100
+BLOCK = 512
+SCALE = 2.0 ** -16
+
+
+class ManualOutput:
+    """Salida sin thread: render() lo llama el test"""
+
+    blocksize = BLOCK
+    channels = 2
+
+    def set_source(self, source):
+        pass
+
+
+@pytest.fixture
+def engine():
+    e = PlaybackEngine(ManualOutput())
+    yield e
+    e.close()
+
+
+def ramp(seconds):
+    index = np.arange(int(seconds * SR), dtype=np.float32) * np.float32(SCALE)
+    return np.repeat(index[:, None], 2, axis=1)
+
+
+def frames_of(out):
+    return np.round(out[:, 0] / SCALE).astype(np.int64)
+
+
+def pull(engine, blocks):
+    """
+    Pide `blocks` bloques como el callback; antes de cada uno espera a que el
+    productor llene el ring (como en tiempo real, donde siempre va por delante)
+    """
+    out = np.zeros((blocks * BLOCK, 2), dtype=np.float32)
+    for b in range(blocks):
+        deadline = time.perf_counter() + 1.0
+        while (engine.ring.free() and not engine._at_end
+               and time.perf_counter() < deadline):
+            time.sleep(0.0005)
+        engine.render(out[b * BLOCK:(b + 1) * BLOCK], BLOCK)
+        engine._wake.set()  # No esperar a que el productor se despierte solo
+    return out
+
+
+
+def test_play_delivers_consecutive_frames(engine):
+    engine.set_source(ramp(5), SR)
+    engine.play()
+    out = pull(engine, 40)
+    np.testing.assert_array_equal(frames_of(out)[FADE_FRAMES:],
+                                  np.arange(FADE_FRAMES, len(out)))
+    assert engine.position == pytest.approx(len(out) / SR)
+    assert engine.starved_blocks == 0
+
+
+def test_loop_wraps_on_exact_frames(engine):
+    """Play fuera del loop salta a A; cada vuelta B-1 -> A sin frames de más"""
+    start, end = SR, SR + SR // 2
+    engine.set_source(ramp(5), SR)
+    engine.set_loop(start / SR, end / SR)
+    engine.play()
+    blocks = int(2.5 * (end - start)) // BLOCK
+    out = frames_of(pull(engine, blocks))
+    expected = start + np.arange(len(out)) % (end - start)
+    np.testing.assert_array_equal(out[FADE_FRAMES:], expected[FADE_FRAMES:])
+    assert engine.loop_wraps == 2
+
+
+class FlushingRing(FrameRing):
+    """Ring en el que el productor hace un flush justo tras la primera lectura de la generación"""
+
+    reads = 0
+
+    @property
+    def generation(self):
+        self.reads += 1
+        return 0 if self.reads == 1 else 1
+
+    @generation.setter
+    def generation(self, value):
+        pass
+
+
+def test_flush_during_callback_keeps_the_new_slots(engine):
+    """Un slot escrito con la generación nueva mientras corre el callback se reproduce"""
+    ring = FlushingRing(engine.ring.num_slots, BLOCK, 2)
+    engine.ring = ring
+    ring.frames[0] = ramp(1)[SR // 2:SR // 2 + BLOCK]
+    ring.lengths[0] = BLOCK
+    ring.positions[0] = 0.5
+    ring.steps[0] = 1 / SR
+    ring.gens[0] = 1
+    ring.write_idx = 1
+    engine._gain = FADE_FRAMES  # Ya sonando
+
+    out = np.zeros((BLOCK, 2), dtype=np.float32)
+    assert engine.render(out, BLOCK) == BLOCK
+    np.testing.assert_array_equal(frames_of(out), SR // 2 + np.arange(BLOCK))
+    assert engine.position == pytest.approx(0.5 + BLOCK / SR)
+
+
+def wait_generation(engine, generation):
+    deadline = time.perf_counter() + 1.0
+    while engine.ring.generation == generation and time.perf_counter() < deadline:
+        time.sleep(0.0005)
+
+
+def test_seek_while_playing(engine):
+    engine.set_source(ramp(5), SR)
+    engine.play()
+    pull(engine, 10)
+    generation = engine.ring.generation
+    engine.seek(3.0)
+    assert engine.position == 3.0  # Publicada al momento para la UI
+    wait_generation(engine, generation)
+
+    tail = frames_of(pull(engine, 10))[-4 * BLOCK:]
+    np.testing.assert_array_equal(np.diff(tail), 1)
+    assert 3 * SR < tail[0] < 3 * SR + 10 * BLOCK
+    assert engine.position == pytest.approx((tail[-1] + 1) / SR)
+
+
+def test_pause_resumes_on_the_same_frame(engine):
+    engine.set_source(ramp(5), SR)
+    engine.play()
+    last = frames_of(pull(engine, 10))[-1]
+
+    engine.pause()
+    paused = pull(engine, 4)
+    position = engine.position
+    # Fade-out de los frames siguientes y luego silencio
+    assert np.all(paused[FADE_FRAMES:] == 0)
+    assert position == pytest.approx((last + 1 + FADE_FRAMES) / SR)
+    pull(engine, 4)
+    assert engine.position == position
+    assert engine.starved_blocks == 0
+
+    engine.resume()
+    resumed = frames_of(pull(engine, 4))
+    first = last + 1 + FADE_FRAMES
+    np.testing.assert_array_equal(resumed[FADE_FRAMES:],
+                                  first + np.arange(FADE_FRAMES, len(resumed)))
+
+
+def test_swap_keeps_the_musical_position(engine):
+    """
+    Render al 80% con su TimeMap: tras el crossfade sigue en el mismo punto
+    del original, ahora a 0.8 frames del original por frame
+    """
+    original = ramp(5)
+    render = (np.arange(len(original) * 5 // 4, dtype=np.float32) * np.float32(0.8 * SCALE))
+    render = np.repeat(render[:, None], 2, axis=1)
+    engine.set_source(original, SR)
+    engine.play()
+    pull(engine, 10)
+    engine.swap_source(render, SR, TimeMap.linear(len(original), len(render)))
+    values = pull(engine, 20)[:, 0] / SCALE
+
+    step = np.diff(values)
+    swap = int(np.flatnonzero(np.abs(step - 1) > 1e-3)[0])  # Empieza el crossfade
+    assert swap <= engine.ring.num_slots * BLOCK  # Lo que ya iba por delante en el ring
+    after = np.arange(swap + XFADE_FRAMES + 1, len(values))
+    np.testing.assert_allclose(np.diff(values[after]), 0.8, atol=1e-3)
+    # Recta del render nuevo llevada atrás hasta el punto del cambio
+    np.testing.assert_allclose(values[after] - 0.8 * (after - swap - 1), values[swap], atol=1.0)
+    assert engine.position * SR == pytest.approx(values[-1] + 0.8, abs=1.0)
+
+
+@pytest.mark.parametrize("rate", [1.5, 0.75])
+def test_varispeed_interpolates_between_frames(engine, rate):
+    engine.set_source(ramp(5), SR, rate=rate)
+    engine.play()
+    values = pull(engine, 20)[FADE_FRAMES:, 0] / SCALE
+    np.testing.assert_allclose(np.diff(values), rate, atol=1e-3)
+    assert values[0] == pytest.approx(FADE_FRAMES * rate, abs=1e-3)
+
+
+def test_varispeed_loop_keeps_the_fraction_past_the_end(engine):
+    """A 1.5x con un loop que no es múltiplo del paso: la vuelta no pierde la fracción"""
+    start, end = SR, 2 * SR + 1
+    engine.set_source(ramp(5), SR, rate=1.5)
+    engine.set_loop(start / SR, end / SR)
+    engine.play()
+    values = pull(engine, 200)[FADE_FRAMES:, 0] / SCALE
+    wraps = np.flatnonzero(np.diff(values) < 0) + 1
+    assert len(wraps) >= 2
+    assert np.all(values < end)
+    overs = []
+    for w in wraps:
+        over = values[w - 1] + 1.5 - end
+        overs.append(over)
+        assert values[w] == pytest.approx(start + over, abs=1e-3)
+    assert max(overs) > 0.1  # Alguna vuelta con fracción de verdad
+
+
+def test_queued_source_enters_exactly_at_the_seam():
+    """La fuente en cola entra en la vuelta pedida: A..B-1 del anterior y A del nuevo"""
+    seams = []
+    engine = PlaybackEngine(ManualOutput(), on_seam=seams.append)
+    try:
+        start, end = SR, SR + SR // 2
+        other = ramp(5) + np.float32(2 ** 20 * SCALE)  # Frame i vale i + 2**20
+        engine.set_source(ramp(5), SR)
+        engine.set_loop(start / SR, end / SR)
+        engine.queue_source(other, at_wrap=2, tag='next')
+        engine.play()
+        length = end - start
+        out = frames_of(pull(engine, int(3.5 * length) // BLOCK))
+    finally:
+        engine.close()
+
+    k = np.arange(len(out))
+    expected = start + k % length + np.where(k >= 2 * length, 2 ** 20, 0)
+    np.testing.assert_array_equal(out[FADE_FRAMES:], expected[FADE_FRAMES:])
+    assert seams == ['next']
+    assert engine.loop_wraps == 3
+
+
+def assert_click(out, frame, freq):
+    click = make_click(SR, freq, 2, 0.5)
+    np.testing.assert_allclose(out[frame:frame + len(click)], click, atol=1e-6)
+    assert np.all(out[frame - 100:frame] == 0)
+
+
+def test_metronome_clicks_on_beat_frames(engine):
+    engine.set_source(np.zeros((4 * SR, 2), dtype=np.float32), SR)
+    beats = np.arange(0.5, 3.5, 0.5)
+    engine.set_metronome(beats, click=True)
+    engine.play()
+    out = pull(engine, int(3.6 * SR) // BLOCK)
+    for i, t in enumerate(beats):
+        assert_click(out, int(t * SR), ACCENT_HZ if i % 4 == 0 else CLICK_HZ)
+
+
+def test_count_in_lands_on_the_first_loop_beat(engine):
+    """
+    A (1.25s) no cae en pulso: la cuenta dura 4 pulsos menos lo que hay de A
+    al primer pulso del loop, así que los clicks siguen a un periodo exacto
+    """
+    period = SR // 2
+    engine.set_source(np.zeros((5 * SR, 2), dtype=np.float32), SR)
+    engine.set_metronome(np.arange(0, 5, 0.5), click=True, count_in_beats=4)
+    engine.set_loop(1.25, 3.25)
+    engine.play()
+    out = pull(engine, int(2.8 * SR) // BLOCK)
+
+    first = FADE_FRAMES  # La cuenta arranca tras el fade-in
+    assert_click(out, first, ACCENT_HZ)
+    for k in (1, 2, 3):
+        assert_click(out, first + k * period, CLICK_HZ)
+    assert_click(out, first + 4 * period, ACCENT_HZ)  # Primer pulso del loop (1.5s)
+    assert_click(out, first + 5 * period, CLICK_HZ)
+    assert engine.starved_blocks == 0
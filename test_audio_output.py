@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests de las salidas de audio sin tarjeta: SoundDeviceOutput sobre un
+sounddevice falso en el que el "dispositivo" puede matar el stream
+
+    python -m pytest -q test_audio_output.py
+"""
+
+import sys
+import time
+import types
+
+import pytest
+
+from audio_output import NullOutput, SoundDeviceOutput
+
+
+class FakeStream:
+    def __init__(self, sd, **kwargs):
+        if sd.broken:
+            raise sd.PortAudioError("Device unavailable")
+        self.latency = 0.01
+        self.active = False
+        self.finished_callback = kwargs['finished_callback']
+        sd.streams.append(self)
+
+    def start(self):
+        self.active = True
+
+    def abort(self):
+        if self.active:
+            self.active = False
+            self.finished_callback()  # PortAudio también avisa al cerrar a propósito
+
+    def close(self):
+        pass
+
+    def die(self):
+        """Error del dispositivo: PortAudio para el stream por su cuenta"""
+        self.active = False
+        self.finished_callback()
+
+
+@pytest.fixture
+def device(monkeypatch):
+    sd = types.ModuleType("sounddevice")
+    sd.PortAudioError = type("PortAudioError", (Exception,), {})
+    sd.default = types.SimpleNamespace(device=None)
+    sd.query_devices = lambda device, kind: {'default_samplerate': 48000.0}
+    sd.OutputStream = lambda **kwargs: FakeStream(sd, **kwargs)
+    sd.broken = False
+    sd.streams = []
+    monkeypatch.setitem(sys.modules, "sounddevice", sd)
+    monkeypatch.setattr(SoundDeviceOutput, "OPEN_RETRIES", 1)
+    return sd
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_stream_death_reopens(device):
+    output = SoundDeviceOutput()
+    assert output.samplerate == 48000
+
+    device.streams[-1].die()
+    assert wait_for(lambda: output.reopen_count == 1)
+    assert len(device.streams) == 2 and device.streams[-1].active
+    output.close()
+
+
+def test_failed_recovery_retried_on_prepare(device):
+    """Si el thread de recuperación no puede reabrir, prepare() (play) lo reintenta"""
+    output = SoundDeviceOutput()
+    device.broken = True
+    device.streams[-1].die()
+    assert wait_for(lambda: output._stream is None)
+    assert output.reopen_count == 0
+
+    device.broken = False
+    output.prepare(48000)
+    assert output.reopen_count == 1 and device.streams[-1].active
+    output.close()
+
+
+def test_samplerate_change_is_not_a_reopen(device):
+    output = SoundDeviceOutput()
+    output.prepare(44100)
+    time.sleep(0.05)  # Un thread de recuperación equivocado tendría tiempo de abrir
+    assert output.samplerate == 44100
+    assert output.reopen_count == 0 and len(device.streams) == 2
+    output.close()
+    assert not device.streams[-1].active
+
+
+def test_null_output_pulls_blocks():
+    class Source:
+        def render(self, outdata, frames):
+            outdata[:frames] = 1.0
+            return frames
+
+    output = NullOutput(realtime=False)
+    output.set_source(Source())
+    assert wait_for(lambda: output.frames_played >= 10 * output.blocksize)
+    output.close()
+
+
+def test_player_play_reopens_dead_stream(device, tmp_path, monkeypatch):
+    """Stream muerto y recuperación fallida: el siguiente play lo reabre"""
+    import soundfile as sf
+    from audio_player import AudioPlayer
+
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "song.wav"
+    sf.write(path, [[0.0, 0.0]] * 48000, 48000)
+
+    output = SoundDeviceOutput()
+    player = AudioPlayer(output=output, stats_log_interval=999)
+    assert player.load_file(str(path))
+
+    device.broken = True
+    device.streams[-1].die()
+    assert wait_for(lambda: output._stream is None)
+
+    device.broken = False
+    player.play()
+    assert output.reopen_count == 1 and device.streams[-1].active
+    player.close()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests del AudioPlayer sin hardware (salida NullOutput, archivos sintéticos)
+
+    python -m pytest -q test_audio_player.py
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from audio_output import NullOutput
+from audio_player import AudioPlayer
+from beat_grid import BeatGrid
+from main import PracticePlayer
+from onset_index import OnsetIndex
+from time_map import TimeMap
+
+SR = 44100
+
+
+def load_player(tmp_path, monkeypatch):
+    """Player con un WAV de 20s de ruido suave ya decodificado"""
+    monkeypatch.chdir(tmp_path)  # cache/ del análisis dentro del tmp
+    path = tmp_path / "song.wav"
+    audio = (np.random.default_rng(0).standard_normal((20 * SR, 2)) * 0.01).astype(np.float32)
+    sf.write(path, audio, SR)
+
+    p = AudioPlayer(output=NullOutput(realtime=False), stats_log_interval=999)
+    assert p.load_file(str(path))
+    p._decoder.wait()
+    return p
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def player(tmp_path, monkeypatch):
+    p = load_player(tmp_path, monkeypatch)
+    wait_for(lambda: p.onset_index is not None)  # Análisis en background terminado
+    yield p
+    p.close()
+
+
+def test_adjust_clamp_with_region_render(player):
+    """Con un render de región cargado, A se ajusta en segundos del original"""
+    player.snap_to_onsets = False
+    player.point_a, player.point_b = 12.0, 14.0
+    # Región 11.5-14.5s al 80%: 3.75s de render
+    region = (int(11.5 * SR), int(14.5 * SR))
+    player._set_processed(np.zeros((int(3.75 * SR), 2), dtype=np.float32), 80, 0.0, region)
+
+    player.start_adjusting_a()
+    player.adjust_fine(0.1)
+    assert player.point_a == pytest.approx(12.1)
+
+
+def test_adjust_clamp_with_full_render(player):
+    """Un render más largo que el original (tempo < 100) no amplía el límite"""
+    player.snap_to_onsets = False
+    player.point_a, player.point_b = 2.0, 19.9
+    player._set_processed(np.zeros((25 * SR, 2), dtype=np.float32), 80)
+
+    player.start_adjusting_b()
+    player.adjust_fine(1.0)
+    assert player.point_b == pytest.approx(player.duration)
+
+
+def test_time_map_never_built_on_the_control_thread(player, monkeypatch):
+    """Render sin mapa: el engine recibe el lineal ya y el de onsets en background"""
+    built_on = []
+    from_onsets = TimeMap.from_onsets.__func__
+
+    def spy(cls, *args, **kwargs):
+        built_on.append(threading.current_thread())
+        return from_onsets(cls, *args, **kwargs)
+
+    monkeypatch.setattr(TimeMap, "from_onsets", classmethod(spy))
+    player.onset_index = OnsetIndex([1.0, 2.0, 3.0])
+    render = np.zeros((25 * SR, 2), dtype=np.float32)
+    player._set_processed(render, 80)
+
+    sent = []
+    set_source = player.engine.set_source
+    monkeypatch.setattr(player.engine, "set_source",
+                        lambda audio, sr, time_map, **kw: (sent.append(time_map),
+                                                           set_source(audio, sr, time_map, **kw)))
+    player._send_source()
+    assert threading.main_thread() not in built_on
+    assert len(sent[0].original) == 2  # Lineal mientras tanto
+
+    deadline = time.perf_counter() + 2
+    while player._time_maps.get(id(render)) is None and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    assert built_on and threading.main_thread() not in built_on
+    time.sleep(0.05)
+    assert player.engine._map is player._time_maps[id(render)][1]
+
+    # Ya calculado: el siguiente envío lo usa sin recalcular
+    player._send_source()
+    assert len(built_on) == 1
+
+
+def test_adjust_right_after_restoring_beats(tmp_path, monkeypatch):
+    """
+    Sesión guardada en beats y restaurada antes de que haya rejilla: el ajuste
+    sigue en segundos (sin perder taps) y pasa a beats al terminar el análisis
+    """
+    release = threading.Event()
+    monkeypatch.setattr(BeatGrid, "for_file",
+                        classmethod(lambda cls, *args, **kwargs: release.wait(5) and cls(120, 0.0)))
+    p = load_player(tmp_path, monkeypatch)
+    try:
+        p.snap_to_onsets = False
+        p.restore_state(point_a=2.0, point_b=6.0, adjust_unit='beats')
+        app = SimpleNamespace(player=p, _update_ui=lambda: None)
+        p.start_adjusting_a()
+
+        assert p.adjust_unit == 'seconds'
+        PracticePlayer._apply_adjust(app, p.adjust_amount(0.1))
+        assert p.point_a == pytest.approx(2.1)
+
+        release.set()
+        wait_for(lambda: p.beat_grid is not None)
+        assert p.adjust_unit == 'beats'
+        PracticePlayer._apply_adjust(app, p.adjust_amount(0.1))
+        assert p.point_a == pytest.approx(2.5)  # Siguiente pulso a 120 BPM
+    finally:
+        release.set()
+        p.close()
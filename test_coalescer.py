@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests del Coalescer con un call_later manual (sin threads)
+
+    python -m pytest -q test_coalescer.py
+"""
+
+import pytest
+
+import coalescer
+from coalescer import Coalescer
+
+
+class Clock:
+    """time.monotonic y call_later bajo control del test"""
+
+    def __init__(self):
+        self.now = 100.0
+        self.timers = []  # [(cuándo, fn)]
+
+    def monotonic(self):
+        return self.now
+
+    def call_later(self, delay, fn):
+        self.timers.append((self.now + delay, fn))
+
+    def advance(self, seconds):
+        self.now += seconds
+        while True:
+            due = [timer for timer in self.timers if timer[0] <= self.now]
+            if not due:
+                return
+            timer = min(due, key=lambda timer: timer[0])
+            self.timers.remove(timer)
+            timer[1]()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(coalescer.time, "monotonic", clock.monotonic)
+    return clock
+
+
+@pytest.fixture
+def applied(clock):
+    applied = []
+    c = Coalescer(applied.append, clock.call_later, settle_time=0.4)
+    c.applied = applied
+    return c
+
+
+def test_first_delta_applies_at_once(applied):
+    applied.push(5)
+    assert applied.applied == [5]
+    assert applied.pending == 0
+
+
+def test_hold_applies_the_total_once_settled(applied, clock):
+    applied.push(5)
+    for _ in range(6):
+        clock.advance(0.1)
+        applied.push(5)
+    assert applied.applied == [5]
+    assert applied.pending == 30
+
+    clock.advance(0.3)  # Aún no han pasado 0.4s desde el último
+    assert applied.applied == [5]
+    clock.advance(0.2)
+    assert applied.applied == [5, 30]
+    assert applied.pending == 0
+    assert not clock.timers
+
+    # Inactivo otra vez: el siguiente tap se aplica al momento
+    applied.push(-5)
+    assert applied.applied == [5, 30, -5]
+
+
+def test_flush_and_cancel(applied, clock):
+    applied.push(1)
+    applied.push(2)
+    applied.push(3)
+    applied.flush()
+    assert applied.applied == [1, 5]
+
+    applied.push(1)
+    applied.push(2)
+    applied.cancel()
+    clock.advance(1.0)
+    assert applied.applied == [1, 5, 1]
+    assert applied.pending == 0
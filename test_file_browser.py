@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests del FileBrowser y de que el arranque no arrastra imports pesados
+
+    python -m pytest -q test_file_browser.py
+"""
+
+import os
+import subprocess
+import sys
+
+from file_browser import FileBrowser, is_supported
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_main_import_is_light():
+    """main (y el browser) se importan sin numpy/soundfile: arranque por etapas"""
+    code = ("import sys, main; "
+            "print(','.join(m for m in ('numpy', 'soundfile') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=HERE,
+                         capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+def test_is_supported():
+    assert is_supported("solo.FLAC")
+    assert is_supported("take.mp3")
+    assert not is_supported("solo.flac.loops.json")
+    assert not is_supported("notes.txt")
+
+
+def test_scan_and_go_to(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.wav").write_bytes(b"")
+    (tmp_path / "sub" / "a.mp3").write_bytes(b"")
+    (tmp_path / "sub" / "a.mp3.loops.json").write_text("{}")
+
+    browser = FileBrowser(audio_dir=str(tmp_path))
+    assert browser.items == [('dir', 'sub')]
+
+    assert browser.go_to(str(tmp_path / "sub"), "b.wav")
+    assert browser.get_current_item_name() == "b.wav"
+    assert sorted(name for kind, name in browser.items if kind == 'wav') == ["a.mp3", "b.wav"]
+
+    # Fuera de audio_dir no se navega
+    assert not browser.go_to(str(tmp_path.parent))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests de los gestos del InputDispatcher (tap, hold, long hold, repeat)
+
+    python -m pytest -q test_input_dispatcher.py
+"""
+
+import time
+
+import pytest
+
+from input_dispatcher import InputDispatcher, PRESS_HOLD, REPEAT, TAP_HOLD
+
+HOLD = 0.05
+LONG_HOLD = 0.15
+
+
+@pytest.fixture
+def dispatcher():
+    events = []
+    d = InputDispatcher(on_event=lambda event, *args: events.append((event,) + args))
+    d.events = events
+    d.add_button('plain', TAP_HOLD, 'tap', 'hold', HOLD)
+    d.add_button('save', TAP_HOLD, 'next', 'save', HOLD, 'export', LONG_HOLD)
+    d.add_button('stop', PRESS_HOLD, 'stop', 'back', HOLD)
+    d.add_button('tempo', REPEAT, 'tempo', None, HOLD)
+    yield d
+    d.close()
+
+
+def press(d, name, seconds):
+    d.post(name, 'press')
+    time.sleep(seconds)
+    d.post(name, 'release')
+    time.sleep(0.02)
+
+
+def names(d):
+    return [event[0] for event in d.events]
+
+
+def test_tap_and_hold(dispatcher):
+    press(dispatcher, 'plain', 0.0)
+    press(dispatcher, 'plain', HOLD * 2)
+    assert names(dispatcher) == ['tap', 'hold']
+
+
+def test_hold_fires_while_pressed(dispatcher):
+    dispatcher.post('plain', 'press')
+    time.sleep(HOLD * 2)
+    assert names(dispatcher) == ['hold']
+    dispatcher.post('plain', 'release')
+
+
+def test_long_hold_gestures(dispatcher):
+    """Con long hold: hold al soltar antes de long_hold_time, y solo uno de los dos"""
+    press(dispatcher, 'save', 0.0)
+    press(dispatcher, 'save', (HOLD + LONG_HOLD) / 2)
+    press(dispatcher, 'save', LONG_HOLD * 2)
+    assert names(dispatcher) == ['next', 'save', 'export']
+
+
+def test_press_hold_and_repeat(dispatcher):
+    press(dispatcher, 'stop', HOLD * 2)
+    assert names(dispatcher) == ['stop', 'back']
+
+    dispatcher.events.clear()
+    press(dispatcher, 'tempo', HOLD + 0.2)
+    assert dispatcher.events[0] == ('tempo', 0.1)
+    assert len(dispatcher.events) >= 2
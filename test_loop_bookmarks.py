@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests de LoopBookmarks (JSON al lado del audio)
+
+    python -m pytest -q test_loop_bookmarks.py
+"""
+
+import json
+import os
+
+import pytest
+
+from loop_bookmarks import SUFFIX, LoopBookmarks
+
+
+@pytest.fixture
+def song(tmp_path):
+    return str(tmp_path / "solo.flac")
+
+
+def test_add_names_and_persists(song):
+    bookmarks = LoopBookmarks(song)
+    assert len(bookmarks) == 0
+    assert bookmarks.add(1.0, 2.5, 80) == 0
+    bookmarks.add(4.0, 6.0, 90, name="Puente")
+    bookmarks.add(7.0, 8.0, 100)
+    assert [loop['name'] for loop in bookmarks] == ["Loop 1", "Puente", "Loop 3"]
+    assert os.path.exists(song + SUFFIX)
+
+    reloaded = LoopBookmarks(song)
+    assert list(reloaded) == list(bookmarks)
+
+    # Un nombre automático nunca repite uno existente
+    reloaded.remove(0)
+    reloaded.add(9.0, 10.0, 100)
+    assert [loop['name'] for loop in reloaded] == ["Puente", "Loop 3", "Loop 4"]
+
+
+def test_update_and_remove_last_deletes_file(song):
+    bookmarks = LoopBookmarks(song)
+    bookmarks.add(1.0, 2.0, 100)
+    bookmarks.update(0, tempo=75, name="Intro")
+    assert LoopBookmarks(song)[0] == {'name': "Intro", 'a': 1.0, 'b': 2.0, 'tempo': 75}
+
+    bookmarks.remove(0)
+    assert not os.path.exists(song + SUFFIX)
+    assert len(LoopBookmarks(song)) == 0
+
+
+def test_invalid_entries_are_skipped(song):
+    with open(song + SUFFIX, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'loops': [
+            {'a': 1.0, 'b': 2.0},              # Sin nombre ni tempo: por defecto
+            {'a': 3.0},                         # Sin B
+            {'a': 5.0, 'b': 4.0, 'tempo': 90},  # B antes de A
+            {'a': "x", 'b': 2.0},
+            {'name': "Coda", 'a': 6.0, 'b': 7.5, 'tempo': "85"},
+        ]}, f)
+    bookmarks = LoopBookmarks(song)
+    assert list(bookmarks) == [
+        {'name': "Loop 1", 'a': 1.0, 'b': 2.0, 'tempo': 100},
+        {'name': "Coda", 'a': 6.0, 'b': 7.5, 'tempo': 85},
+    ]
+
+
+@pytest.mark.parametrize("content", ["{no es json", '{"version": 99, "loops": []}', "[]"])
+def test_unreadable_file_is_ignored(song, content):
+    with open(song + SUFFIX, 'w', encoding='utf-8') as f:
+        f.write(content)
+    assert len(LoopBookmarks(song)) == 0
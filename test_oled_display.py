@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests de las pantallas del OLED sobre FramebufferDevice (sin I2C)
+
+    python -m pytest -q test_oled_display.py
+"""
+
+import pytest
+from PIL import Image, ImageDraw
+
+from oled_display import FramebufferDevice, OledDisplay
+
+
+@pytest.fixture
+def drawn(monkeypatch):
+    """Textos dibujados: [(x, y, texto)]"""
+    texts = []
+    text = ImageDraw.ImageDraw.text
+
+    def spy(self, xy, message, *args, **kwargs):
+        texts.append((xy[0], xy[1], message))
+        return text(self, xy, message, *args, **kwargs)
+
+    monkeypatch.setattr(ImageDraw.ImageDraw, "text", spy)
+    return texts
+
+
+@pytest.mark.parametrize("state, bpm", [("PAUSED", 96.2), ("STOPPED", 180.0)])
+def test_player_shows_bpm_next_to_state(drawn, state, bpm):
+    display = OledDisplay(device=FramebufferDevice())
+    drawn.clear()
+    display.show_player(state, 8.1, 204.5, point_a=80.0, point_b=165.0, tempo=80, bpm=bpm)
+    bpm_str = f"♩{bpm:.0f}"
+    entries = {message: (x, y) for x, y, message in drawn}
+    state_x, state_y = entries[("⏸ " if state == "PAUSED" else "⏹ ") + state]
+    x, y = entries[bpm_str]
+    tempo_x, _ = entries["80%"]
+    # En la línea del estado, a su derecha y sin pisar el tempo
+    assert y < 16 and state_y < 16
+    assert state_x < x
+    width = ImageDraw.Draw(Image.new("1", (display.W, display.H))).textlength(
+        bpm_str, font=display.font_small)
+    assert x + width < tempo_x
+
+
+def test_player_without_bpm(drawn):
+    display = OledDisplay(device=FramebufferDevice())
+    drawn.clear()
+    display.show_player("PLAYING", 0.0, 10.0)
+    messages = [message for _, _, message in drawn]
+    assert "▶ PLAYING" in messages
+    assert not any(message.startswith("♩") for message in messages)
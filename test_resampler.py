@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests del Resampler: por tramos (como en streaming_decoder) == de una pasada
+
+    python -m pytest -q test_resampler.py
+"""
+
+import numpy as np
+import pytest
+
+from resampler import Resampler
+
+
+def noise(frames, channels=2):
+    return (np.random.default_rng(3).standard_normal((frames, channels)) * 0.3).astype(np.float32)
+
+
+@pytest.mark.parametrize("src, dst", [(44100, 48000), (48000, 44100), (22050, 44100)])
+def test_chunked_matches_full_pass(src, dst):
+    """Tramos de tamaño ready() mientras llega la entrada: mismo resultado"""
+    x = noise(3 * src + 123)
+    r = Resampler(src, dst)
+    expected = r.resample(x)
+    assert len(expected) == r.output_length(len(x))
+
+    out = np.zeros_like(expected)
+    partial = np.zeros_like(x)
+    done = 0
+    for received in list(range(4096, len(x), 4096)) + [len(x)]:
+        partial[:received] = x[:received]
+        stop = r.ready(received) if received < len(x) else len(out)
+        r.process(partial, done, stop, out)
+        done = max(done, stop)
+    np.testing.assert_allclose(out, expected, atol=1e-6)
+
+
+def test_ready_only_needs_received_frames():
+    """Las salidas ready(n) no cambian con lo que llegue después de n"""
+    x = noise(20000)
+    r = Resampler(44100, 48000)
+    n = 8000
+    ready = r.ready(n)
+    assert 0 < ready < r.output_length(n)
+
+    garbage = x.copy()
+    garbage[n:] = 1.0
+    a = np.zeros((r.output_length(len(x)), 2), dtype=np.float32)
+    b = np.zeros_like(a)
+    r.process(x, 0, ready, a)
+    r.process(garbage, 0, ready, b)
+    np.testing.assert_array_equal(a, b)
+
+
+def test_tone_keeps_frequency_and_level():
+    src, dst = 44100, 48000
+    t = np.arange(src) / src
+    out = Resampler(src, dst).resample(np.sin(2 * np.pi * 1000 * t).astype(np.float32))
+    expected = np.sin(2 * np.pi * 1000 * np.arange(len(out)) / dst)
+    middle = slice(1000, len(out) - 1000)  # Sin los bordes del filtro
+    np.testing.assert_allclose(out[middle], expected[middle], atol=2e-3)
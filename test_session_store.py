@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests del SessionStore (escritura atómica, versión, archivo corrupto)
+
+    python -m pytest -q test_session_store.py
+"""
+
+import json
+import os
+
+import pytest
+
+from session_store import SessionStore
+
+STATE = {'file': "/music/solo.flac", 'a': 12.5, 'b': 20.0, 'tempo': 80}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache" / "session.json")
+
+
+def test_save_and_load(path):
+    SessionStore(path).save(STATE)
+    assert SessionStore(path).load() == STATE
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_unchanged_state_is_not_rewritten(path):
+    store = SessionStore(path)
+    store.save(STATE)
+    mtime = os.stat(path).st_mtime_ns
+    os.utime(path, ns=(mtime - 10**9, mtime - 10**9))
+    store.save(dict(STATE))
+    assert os.stat(path).st_mtime_ns == mtime - 10**9
+
+    store.save(dict(STATE, tempo=85))
+    assert SessionStore(path).load()['tempo'] == 85
+
+
+def test_loaded_state_is_not_rewritten(path):
+    SessionStore(path).save(STATE)
+    store = SessionStore(path)
+    store.load()
+    os.remove(path)
+    store.save(dict(STATE))
+    assert not os.path.exists(path)
+
+
+@pytest.mark.parametrize("content", ["", '{"version": 1, "state"',
+                                     json.dumps({'version': 2, 'state': STATE})])
+def test_corrupt_or_other_version_starts_clean(path, content):
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    assert SessionStore(path).load() is None
+
+
+def test_missing_file(path):
+    assert SessionStore(path).load() is None
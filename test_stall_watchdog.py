@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests del watchdog de threads colgados
+
+    python -m pytest -q test_stall_watchdog.py
+"""
+
+import threading
+import time
+
+import pytest
+
+import stall_watchdog
+from stall_watchdog import Watchdog
+
+
+@pytest.fixture
+def watchdog(tmp_path):
+    w = Watchdog(stall_ms=100, log_path=str(tmp_path / "stalls.log"))
+    yield w
+    w.close()
+    for handler in list(w.log.handlers):  # El logger es global: otro tmp en cada test
+        w.log.removeHandler(handler)
+        handler.close()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_stall_reported_once_and_recovered(watchdog, tmp_path):
+    release = threading.Event()
+
+    def stuck():
+        watchdog.beat('worker')
+        release.wait(1.0)  # "Ocupado" sin latir
+        watchdog.beat('worker')
+        watchdog.idle('worker')
+
+    thread = threading.Thread(target=stuck)
+    thread.start()
+    assert wait_for(lambda: watchdog.stall_count == 1)
+    time.sleep(0.3)
+    assert watchdog.stall_count == 1  # Una vez por episodio
+    release.set()
+    thread.join()
+
+    log = (tmp_path / "stalls.log").read_text()
+    assert "STALL [worker]" in log and "in stuck" in log
+    assert "[worker] recuperado" in log
+
+
+def test_idle_thread_is_not_a_stall(watchdog):
+    watchdog.beat('input')
+    watchdog.idle('input')
+    time.sleep(0.3)
+    assert watchdog.stall_count == 0
+
+
+def test_report_while_threads_register(watchdog, monkeypatch):
+    """Un thread que se registra durante el informe no rompe el watchdog"""
+    format_stack = stall_watchdog._format_stack
+
+    def register_and_format(frame):
+        watchdog.beat(f"new-{len(watchdog._threads)}")
+        return format_stack(frame)
+
+    monkeypatch.setattr(stall_watchdog, "_format_stack", register_and_format)
+    watchdog.beat('ui')
+    watchdog._report('ui', 1.0)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests del TempoController de Rubber Band (transposición también al 100%)
+
+    python -m pytest -q test_tempo_controller.py
+"""
+
+import shutil
+import types
+
+import numpy as np
+import pytest
+
+import tempo_controller
+from tempo_controller import TempoController
+
+SR = 44100
+
+
+def sine(freq=440.0, seconds=2.0):
+    t = np.arange(int(SR * seconds)) / SR
+    tone = (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+    return np.stack([tone, tone], axis=1)
+
+
+def dominant_frequency(audio):
+    mono = audio.mean(axis=1) if audio.ndim > 1 else audio
+    spectrum = np.abs(np.fft.rfft(mono * np.hanning(len(mono))))
+    return np.fft.rfftfreq(len(mono), 1 / SR)[np.argmax(spectrum)]
+
+
+def fake_pyrubberband():
+    """
+    Misma API que pyrubberband 0.4: time_stretch devuelve la entrada con rate
+    1.0 sin mirar rbargs; pitch_shift transpone (aquí remuestreando, que basta
+    para la frecuencia dominante)
+    """
+    calls = []
+
+    def time_stretch(y, sr, rate, rbargs=None):
+        calls.append(('time_stretch', rate, rbargs))
+        if rate == 1.0:
+            return y
+        return y[::2]
+
+    def pitch_shift(y, sr, n_steps, rbargs=None):
+        calls.append(('pitch_shift', n_steps, rbargs))
+        if n_steps == 0:
+            return y
+        idx = np.arange(0, len(y) - 1, 2 ** (n_steps / 12))
+        return np.stack([np.interp(idx, np.arange(len(y)), y[:, c])
+                         for c in range(y.shape[1])], axis=1).astype(np.float32)
+
+    return types.SimpleNamespace(time_stretch=time_stretch, pitch_shift=pitch_shift,
+                                 calls=calls)
+
+
+@pytest.fixture
+def fake_rb(monkeypatch):
+    rb = fake_pyrubberband()
+    monkeypatch.setattr(tempo_controller, "RUBBERBAND_AVAILABLE", True)
+    monkeypatch.setattr(tempo_controller, "pyrb", rb)
+    return rb
+
+
+def test_pitch_at_normal_speed_is_not_lost(fake_rb):
+    controller = TempoController()
+    shifted = controller.change_tempo(sine(), SR, 100, pitch=2.0, source='song')
+    assert fake_rb.calls == [('pitch_shift', 2.0, None)]
+    assert dominant_frequency(shifted) == pytest.approx(440 * 2 ** (2 / 12), rel=0.01)
+    assert controller.cache[('song', 100, 2.0)] is shifted
+
+
+def test_tempo_and_pitch_in_one_pass(fake_rb):
+    TempoController().change_tempo(sine(), SR, 80, pitch=-1.5)
+    assert fake_rb.calls == [('time_stretch', 0.8, {'--pitch': -1.5})]
+
+
+@pytest.mark.skipif(not tempo_controller.RUBBERBAND_AVAILABLE or not shutil.which('rubberband'),
+                    reason="sin pyrubberband/rubberband")
+def test_rubberband_transposes_at_100_percent():
+    shifted = TempoController().change_tempo(sine(), SR, 100, pitch=2.0)
+    assert len(shifted) == pytest.approx(2 * SR, rel=0.01)  # Misma duración
+    assert dominant_frequency(shifted) == pytest.approx(440 * 2 ** (2 / 12), rel=0.01)
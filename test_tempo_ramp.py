@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests de la escalera de TempoRamp y su espera entre escalones
+
+    python -m pytest -q test_tempo_ramp.py
+"""
+
+import threading
+
+import pytest
+
+from tempo_ramp import TempoRamp
+
+
+def test_steps_include_the_end():
+    assert TempoRamp(70, 100, 5, 2, (1.0, 3.0)).tempos == [70, 75, 80, 85, 90, 95, 100]
+    assert TempoRamp(70, 82, 5, 2, (1.0, 3.0)).tempos == [70, 75, 80, 82]
+    assert TempoRamp(100, 80, -10, 1, (1.0, 3.0)).tempos == [100, 90, 80]
+    assert TempoRamp(90, 90, 5, 1, (1.0, 3.0)).tempos == [90]
+
+
+def test_invalid_step_and_loops():
+    with pytest.raises(ValueError):
+        TempoRamp(70, 100, 0, 2, (1.0, 3.0))
+    assert TempoRamp(70, 100, 5, 0, (1.0, 3.0)).loops_per_step == 1
+
+
+def test_advance_wakes_the_waiter():
+    ramp = TempoRamp(70, 80, 5, 2, (1.0, 3.0))
+    assert ramp.tempo == 70 and not ramp.finished
+
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(ramp.wait_advance()))
+    waiter.start()
+    ramp.advance(1, 4)
+    waiter.join(1.0)
+    assert results == [True]
+    assert (ramp.tempo, ramp.seam_wraps) == (75, 4)
+
+    ramp.advance(2, 6)
+    assert ramp.finished
+
+
+def test_cancel_releases_the_waiter():
+    ramp = TempoRamp(70, 80, 5, 2, (1.0, 3.0))
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(ramp.wait_advance()))
+    waiter.start()
+    ramp.cancel()
+    waiter.join(1.0)
+    assert results == [False]
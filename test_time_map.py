@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests del TimeMap (lineal, desplazado y con anclas en los onsets)
+
+    python -m pytest -q test_time_map.py
+"""
+
+import numpy as np
+import pytest
+
+from test_analysis import SR, clicks
+from time_map import TimeMap
+
+
+def test_linear_and_identity():
+    m = TimeMap.linear(1000, 1250)
+    assert not m.identity
+    assert m.to_stretched(400) == pytest.approx(500)
+    assert m.to_original(500) == pytest.approx(400)
+
+    identity = TimeMap.identity_map(1000)
+    assert identity.identity
+    assert identity.to_stretched(123.5) == 123.5
+
+
+def test_shifted_for_a_region_render():
+    """Render de la región que empieza en el frame 10000 del original"""
+    m = TimeMap.linear(2000, 2500).shifted(10000)
+    assert m.to_stretched(10000) == pytest.approx(0)
+    assert m.to_stretched(11000) == pytest.approx(1250)
+    assert m.to_original(2500) == pytest.approx(12000)
+
+
+def test_from_onsets_follows_nonlinear_stretch():
+    """Un render que no estira igual en todo el archivo: las anclas lo siguen"""
+    onsets = np.array([1.0, 2.0, 3.0, 4.0])
+    # Original 5s -> render 6s, pero el primer onset llega antes de lo lineal
+    rendered = np.array([1.17, 2.4, 3.6, 4.8])
+    original = clicks(onsets, 5.0)
+    render = clicks(rendered, 6.0)
+
+    m = TimeMap.from_onsets(onsets, render, SR, len(original))
+    assert len(m.original) == len(onsets) + 2
+    for t, r in zip(onsets, rendered):
+        assert m.to_stretched(t * SR) / SR == pytest.approx(r, abs=0.012)
+        assert m.to_original(m.to_stretched(t * SR)) == pytest.approx(t * SR)
+
+
+def test_from_onsets_without_matches_is_linear():
+    render = clicks([0.3], 6.0)
+    m = TimeMap.from_onsets(np.array([4.0]), render, SR, 5 * SR)
+    assert len(m.original) == 2
+    assert m.to_stretched(5 * SR) == pytest.approx(6 * SR)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests del PeakIndex (columnas de la forma de onda con zoom)
+
+    python -m pytest -q test_waveform_peaks.py
+"""
+
+import numpy as np
+import pytest
+
+from waveform_peaks import PeakIndex
+
+SR = 44100
+
+
+@pytest.fixture
+def index():
+    """20s de ruido suave con un pico de 1.0 en t=8s"""
+    return PeakIndex(noise_with_peak(), SR)
+
+
+def noise_with_peak():
+    audio = np.random.default_rng(4).uniform(-0.1, 0.1, 20 * SR).astype(np.float32)
+    audio[8 * SR] = 1.0
+    return audio
+
+
+def test_levels_reduce_by_factor(index):
+    sizes = [block for block, _, _ in index.levels]
+    assert sizes[0] == 64
+    assert all(b == a * 4 for a, b in zip(sizes, sizes[1:]))
+    assert len(index.levels[-1][1]) == 1
+    assert index.peak == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("span", [0.05, 2.0, 15.0])
+def test_peak_lands_in_its_column_at_any_zoom(index, span):
+    """El pico sale en su columna; con zoom máximo, en las del bucket de 64 samples"""
+    num_cols = 128
+    mins, maxs = index.columns(8.0 + span / 4, span, num_cols)  # Pico a 1/4 de la ventana
+    assert not np.isnan(maxs).any()
+    assert np.all(mins <= maxs)
+    cols = np.flatnonzero(maxs > 0.5)
+    width = int(np.ceil(64 / (span * SR / num_cols))) + 1
+    assert len(cols) <= width and np.all(np.diff(cols) == 1)
+    assert cols[0] - 1 <= num_cols // 4 <= cols[-1] + 1
+    assert maxs[cols[0]] == pytest.approx(1.0)
+
+
+def test_columns_match_a_brute_force_scan(index):
+    """Con columnas alineadas a buckets: min/max exactos de cada tramo"""
+    audio = noise_with_peak()
+    num_cols, per_col = 100, 64 * 16
+    span = num_cols * per_col / SR
+    mins, maxs = index.columns(span / 2, span, num_cols)
+    chunks = audio[:num_cols * per_col].reshape(num_cols, per_col)
+    np.testing.assert_allclose(mins, chunks.min(axis=1), rtol=1e-6)
+    np.testing.assert_allclose(maxs, chunks.max(axis=1), rtol=1e-6)
+
+
+def test_columns_outside_the_file_are_nan(index):
+    mins, maxs = index.columns(0.0, 2.0, 100)
+    assert np.isnan(maxs[:50]).all() and np.isnan(mins[:50]).all()
+    assert not np.isnan(maxs[50:]).any()
+
+    mins, maxs = index.columns(20.0, 2.0, 100)
+    assert not np.isnan(maxs[:50]).any()
+    assert np.isnan(maxs[50:]).all()
+
+    assert np.isnan(index.columns(100.0, 2.0, 100)[1]).all()
+
+
+def test_empty_audio():
+    index = PeakIndex(np.zeros(0, dtype=np.float32), SR)
+    mins, maxs = index.columns(1.0, 2.0, 10)
+    assert np.isnan(mins).all() and np.isnan(maxs).all()
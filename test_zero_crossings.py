@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests del ZeroCrossingIndex (bordes del loop sin click)
+
+    python -m pytest -q test_zero_crossings.py
+"""
+
+import numpy as np
+
+from zero_crossings import ZeroCrossingIndex
+
+SR = 44100
+
+
+def sine(freq, seconds=1.0, phase=0.0):
+    t = np.arange(int(SR * seconds)) / SR
+    return np.sin(2 * np.pi * freq * t + phase).astype(np.float32)
+
+
+def test_snaps_to_nearest_rising_crossing():
+    audio = sine(100, phase=-0.1)  # Periodo de 441 frames, sin cruce en el frame 0
+    index = ZeroCrossingIndex(audio, SR)
+    rising = index.crossings
+    assert np.all(audio[rising - 1] < 0) and np.all(audio[rising] >= 0)
+    np.testing.assert_array_equal(np.diff(rising), 441)
+
+    for frame in (5000, rising[10] + 100, rising[10] + 300):
+        snapped = index.snap(frame)
+        assert snapped in rising
+        assert abs(snapped - frame) == np.abs(rising - frame).min()
+
+
+def test_stereo_prefers_the_quiet_crossing():
+    """En stereo, entre los cruces de L+R, el de menos energía en ambos canales"""
+    left = sine(100)
+    right = sine(300) * 0.9
+    audio = np.stack([left, right], axis=1)
+    index = ZeroCrossingIndex(audio, SR)
+    snapped = index.snap(SR // 2)
+    energy = np.abs(audio).sum(axis=1)
+    window = index.crossings[np.abs(index.crossings - SR // 2) <= index.window]
+    assert snapped in window
+    assert energy[snapped] <= energy[window].min() * 1.5 + 1e-6
+
+
+def test_without_crossings_uses_the_quietest_frame():
+    audio = np.full(SR, 0.5, dtype=np.float32)
+    audio[1000] = 0.01
+    index = ZeroCrossingIndex(audio, SR)
+    assert len(index.crossings) == 0
+    assert index.snap(1000 + index.window // 2) == 1000
+    # Fuera del archivo: se limita a sus bordes
+    assert 0 <= index.snap(-50) <= index.window
+    assert index.snap(10 * SR) >= SR - 1 - index.window
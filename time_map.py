@@ -0,0 +1,82 @@
+"""
+Time Map - Correspondencia exacta entre tiempo original y tiempo estirado
+
+Cada render de tempo lleva un mapa de anclas (frame original, frame del
+render). Entre anclas se interpola linealmente. Sin anclas intermedias es
+la escala global de siempre; con los onsets del original localizados en el
+render, el mapa sigue cualquier no-linealidad del engine de stretch.
+
+El engine lo usa para publicar la posición en tiempo original y para saltar
+de un render a otro en el mismo punto musical.
+"""
+
+import numpy as np
+
+MATCH_TOLERANCE = 0.04  # Segundos alrededor de la posición lineal esperada
+
+
+class TimeMap:
+    """
+    Anclas monótonas original <-> estirado (en frames)
+    """
+
+    def __init__(self, original, stretched):
+        self.original = np.asarray(original, dtype=np.float64)
+        self.stretched = np.asarray(stretched, dtype=np.float64)
+        self.identity = (len(self.original) == 2 and
+                         np.array_equal(self.original, self.stretched))
+
+    @classmethod
+    def identity_map(cls, num_frames):
+        return cls([0, num_frames], [0, num_frames])
+
+    @classmethod
+    def linear(cls, num_original, num_stretched):
+        return cls([0, num_original], [0, num_stretched])
+
+    @classmethod
+    def from_onsets(cls, onset_times, render, samplerate, num_original):
+        """
+        Mapa con un ancla por cada onset del original encontrado en el render
+        onset_times: onsets del original (s), p.ej. OnsetIndex.times
+        """
+        from onset_index import OnsetIndex
+
+        num_stretched = len(render)
+        if num_original == 0 or len(onset_times) == 0:
+            return cls.linear(num_original, num_stretched)
+
+        ratio = num_stretched / num_original
+        found = OnsetIndex.build(render, samplerate).times
+        if len(found) == 0:
+            return cls.linear(num_original, num_stretched)
+
+        # Para cada onset original: el onset del render más cercano a su
+        # posición lineal esperada, si está dentro de la tolerancia
+        expected = np.asarray(onset_times) * ratio
+        idx = np.clip(np.searchsorted(found, expected), 1, len(found) - 1)
+        left, right = found[idx - 1], found[idx]
+        nearest = np.where(np.abs(left - expected) <= np.abs(right - expected), left, right)
+        ok = np.abs(nearest - expected) <= MATCH_TOLERANCE * max(1.0, ratio)
+
+        original = np.concatenate(([0.0], np.asarray(onset_times)[ok] * samplerate, [num_original]))
+        stretched = np.concatenate(([0.0], nearest[ok] * samplerate, [num_stretched]))
+
+        # Quedarse solo con anclas estrictamente crecientes en ambos ejes
+        keep = np.ones(len(original), dtype=bool)
+        keep[1:] = (np.diff(original) > 0) & (np.diff(stretched) > 0)
+        return cls(original[keep], stretched[keep])
+
+    def shifted(self, offset):
+        """El mismo mapa para un render que empieza en el frame `offset` del original"""
+        return TimeMap(self.original + offset, self.stretched)
+
+    def to_stretched(self, frame):
+        if self.identity:
+            return frame
+        return float(np.interp(frame, self.original, self.stretched))
+
+    def to_original(self, frame):
+        if self.identity:
+            return frame
+        return float(np.interp(frame, self.stretched, self.original))
@@ -0,0 +1,116 @@
+"""
+Waveform Peaks - Índice multi-resolución de picos (min/max) del audio
+
+Se construye una sola vez al cargar el archivo. Cada nivel agrupa
+BASE_BLOCK * FACTOR**k samples por bucket, así que cualquier ventana se dibuja
+leyendo como mucho ~FACTOR buckets por columna: el coste de cada redibujo es
+constante, sin importar la duración del archivo.
+"""
+
+import numpy as np
+
+BASE_BLOCK = 64  # Samples por bucket en el nivel 0
+FACTOR = 4       # Cada nivel agrupa FACTOR buckets del anterior
+
+
+class PeakIndex:
+    """
+    Pirámide de picos min/max para dibujar la forma de onda con zoom
+    """
+
+    def __init__(self, audio_data, samplerate, base_block=BASE_BLOCK, factor=FACTOR):
+        self.samplerate = samplerate
+        self.base_block = base_block
+        self.factor = factor
+        self.levels = []  # [(block_size, mins, maxs), ...] de fino a grueso
+
+        mono = audio_data if audio_data.ndim == 1 else audio_data.mean(axis=1)
+        mono = np.asarray(mono, dtype=np.float32)
+        self.num_samples = len(mono)
+
+        if self.num_samples == 0:
+            self.peak = 1.0
+            return
+
+        # Nivel 0: min/max por bloque de base_block samples
+        mins, maxs = self._reduce(mono, mono, base_block)
+        block_size = base_block
+        self.levels.append((block_size, mins, maxs))
+
+        # Niveles superiores: reducir el nivel anterior de FACTOR en FACTOR
+        while len(mins) > 1:
+            mins, maxs = self._reduce(mins, maxs, factor)
+            block_size *= factor
+            self.levels.append((block_size, mins, maxs))
+
+        # Pico global para normalizar el dibujo
+        _, top_min, top_max = self.levels[-1]
+        self.peak = max(float(-top_min[0]), float(top_max[0]), 1e-6)
+
+    @staticmethod
+    def _reduce(mins, maxs, group):
+        """Agrupa de group en group (rellenando la cola con el último valor)"""
+        pad = (-len(mins)) % group
+        if pad:
+            mins = np.concatenate([mins, np.full(pad, mins[-1], dtype=mins.dtype)])
+            maxs = np.concatenate([maxs, np.full(pad, maxs[-1], dtype=maxs.dtype)])
+        return (mins.reshape(-1, group).min(axis=1),
+                maxs.reshape(-1, group).max(axis=1))
+
+    def _pick_level(self, samples_per_col):
+        """Nivel más grueso cuyo bucket no supera los samples por columna"""
+        chosen = self.levels[0]
+        for level in self.levels:
+            if level[0] <= samples_per_col:
+                chosen = level
+            else:
+                break
+        return chosen
+
+    def columns(self, center, span, num_cols):
+        """
+        Picos de una ventana de `span` segundos centrada en `center`
+
+        Returns:
+            (mins, maxs): arrays de num_cols valores normalizados a [-1, 1];
+            NaN en las columnas que caen fuera del archivo
+        """
+        mins_out = np.full(num_cols, np.nan, dtype=np.float32)
+        maxs_out = np.full(num_cols, np.nan, dtype=np.float32)
+
+        if not self.levels or span <= 0 or num_cols <= 0:
+            return mins_out, maxs_out
+
+        samples_per_col = span * self.samplerate / num_cols
+        block_size, mins, maxs = self._pick_level(samples_per_col)
+
+        # Límites de cada columna en samples y en buckets del nivel elegido
+        start_sample = (center - span / 2) * self.samplerate
+        samples = start_sample + np.arange(num_cols + 1) * samples_per_col
+        edges = np.floor(samples / block_size).astype(np.int64)
+
+        first = edges[:-1]
+        last = np.maximum(edges[1:], first + 1)  # Al menos un bucket por columna
+        # Fuera del archivo según los samples: el último bucket puede ser parcial
+        valid = (samples[1:] > 0) & (samples[:-1] < self.num_samples)
+        if not valid.any():
+            return mins_out, maxs_out
+
+        first = np.clip(first[valid], 0, len(mins) - 1)
+        last = np.clip(last[valid], 1, len(mins))
+
+        # Como mucho ~FACTOR buckets por columna: recorrerlos es de coste acotado
+        col_mins = mins[first].copy()
+        col_maxs = maxs[first].copy()
+        for offset in range(1, self.factor + 1):
+            idx = first + offset
+            inside = idx < last
+            if not inside.any():
+                break
+            idx = np.minimum(idx, len(mins) - 1)
+            np.minimum(col_mins, np.where(inside, mins[idx], col_mins), out=col_mins)
+            np.maximum(col_maxs, np.where(inside, maxs[idx], col_maxs), out=col_maxs)
+
+        mins_out[valid] = col_mins / self.peak
+        maxs_out[valid] = col_maxs / self.peak
+        return mins_out, maxs_out
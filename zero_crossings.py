@@ -0,0 +1,58 @@
+"""
+Zero Crossings - Índice de cruces por cero para alinear los bordes del loop
+
+Un loop cortado a mitad de ciclo produce un click en cada vuelta. El índice
+guarda (una vez por fuente de audio) los samples donde la señal cruza de
+negativo a positivo; en stereo se usa la suma L+R y, entre los cruces de la
+ventana, se elige el de menor energia |L|+|R|. Si no hay cruces cerca se usa
+el sample de menor energía de la ventana.
+
+Alinear un punto es una búsqueda binaria más una operación NumPy sobre unos
+pocos candidatos: se puede llamar en cada paso de un hold.
+"""
+
+import numpy as np
+
+WINDOW_MS = 5.0  # Distancia máxima de búsqueda a cada lado
+
+
+class ZeroCrossingIndex:
+    """
+    Cruces ascendentes por cero de una fuente de audio
+    """
+
+    def __init__(self, audio_data, samplerate, window_ms=WINDOW_MS):
+        self.audio = audio_data
+        self.window = max(1, int(samplerate * window_ms / 1000))
+
+        mid = audio_data if audio_data.ndim == 1 else audio_data.sum(axis=1)
+        negative = np.signbit(mid)
+        # i+1 tal que mid[i] < 0 <= mid[i+1]
+        self.crossings = (np.flatnonzero(negative[:-1] & ~negative[1:]) + 1).astype(np.int64)
+
+    def _energy(self, frames):
+        samples = self.audio[frames]
+        return np.abs(samples) if samples.ndim == 1 else np.abs(samples).sum(axis=1)
+
+    def snap(self, frame):
+        """Frame alineado más cercano a `frame` (dentro de la ventana)"""
+        total = len(self.audio)
+        if total == 0:
+            return frame
+        frame = min(max(frame, 0), total - 1)
+        lo = int(np.searchsorted(self.crossings, frame - self.window))
+        hi = int(np.searchsorted(self.crossings, frame + self.window, side='right'))
+
+        if hi > lo:
+            candidates = self.crossings[lo:hi]
+            if self.audio.ndim > 1:
+                # Stereo: el cruce de la suma con menos energía en ambos canales
+                energy = self._energy(candidates)
+                best = np.flatnonzero(energy <= energy.min() * 1.5 + 1e-6)
+                candidates = candidates[best]
+            return int(candidates[np.argmin(np.abs(candidates - frame))])
+
+        # Sin cruces (silencio, graves muy lentos): punto de menor energía
+        start = max(0, frame - self.window)
+        stop = min(total, frame + self.window + 1)
+        return start + int(np.argmin(self._energy(np.arange(start, stop))))